@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Boot-to-first-draw time and heap for the ways pico_main can be shipped,
+measured on the CPython stand-ins (headless.py):
+
+  single file   source with the UK map as a bytes literal (the old layout)
+  source        pico_main.py compiled at boot, map read from uk_map.jpg
+  mpy           precompiled bytecode loaded from a file (marshal standing
+                in for .mpy): no parse/compile at boot
+  frozen        bytecode and map bytes already resident (firmware flash)
+
+  python3 pico_weather/benchmarks/bench_boot.py [--rounds 5]
+
+Absolute numbers are the host's; the ratios and what each variant keeps
+on the heap are what carry over to the Pico. build.py produces the real
+.mpy files and frozen manifest.
+"""
+
+import gc
+import marshal
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+import build  # noqa: E402
+import headless  # noqa: E402
+
+MAP_IMPORT = """try:
+    from uk_map_asset import UK_MAP
+except ImportError:
+    UK_MAP = None
+"""
+
+
+def _map_bytes():
+    with open(os.path.join(HERE, build.MAP_FILE), "rb") as f:
+        return f.read()
+
+
+def variants():
+    """{name: boot callable returning the pico_main namespace}."""
+    path = headless._PICO_MAIN
+    src = headless.pico_main_source()
+    if MAP_IMPORT not in src:
+        raise RuntimeError("pico_main no longer imports uk_map_asset as expected")
+    jpeg = _map_bytes()
+    literal = src.replace(MAP_IMPORT, build.map_asset_source(jpeg).split("\n", 2)[2])
+    blob = marshal.dumps(compile(src, path, "exec"))
+    resident = compile(src, path, "exec")
+    asset = types.ModuleType("uk_map_asset")
+    asset.UK_MAP = jpeg
+
+    return {
+        "single file": lambda: headless.load_pico_main(
+            code=compile(literal, path, "exec")
+        ),
+        "source": lambda: headless.load_pico_main(code=compile(src, path, "exec")),
+        "mpy": lambda: headless.load_pico_main(code=marshal.loads(blob)),
+        "frozen": lambda: headless.load_pico_main(
+            code=resident, modules={"uk_map_asset": asset}
+        ),
+    }
+
+
+def boot_to_first_draw(boot):
+    """Seconds from boot to the first frame, traced peak and retained bytes."""
+    headless._DECODED.clear()  # the Pico decodes the map on every boot
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        ns = boot()
+        headless.fill_cache(ns)  # stands in for the first fetch
+        ns["draw_cache"](ns["weather_cache"][0], 0)
+        elapsed = time.perf_counter() - t0
+        gc.collect()  # retained: what is still reachable, not garbage awaiting GC
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, retained
+
+
+def measure(rounds=5):
+    """{variant: (median s, peak B, retained B)}."""
+    out = {}
+    for name, boot in variants().items():
+        boot_to_first_draw(boot)  # warm imports and Pillow
+        runs = [boot_to_first_draw(boot) for _ in range(rounds)]
+        out[name] = (
+            statistics.median(r[0] for r in runs),
+            max(r[1] for r in runs),
+            statistics.median(r[2] for r in runs),
+        )
+    return out
+
+
+def main():
+    rounds = 5
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+    results = measure(rounds)
+    base = results["single file"][0]
+    for name, (t, peak, retained) in results.items():
+        print(
+            "{:<12} {:7.1f} ms to first draw ({:4.0%})  peak {:7d} B  "
+            "retained {:7d} B".format(name, t * 1e3, t / base, peak, retained)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
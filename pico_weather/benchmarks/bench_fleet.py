@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Upstream load from a fleet of displays powered on together: requests per
+10 s window for N devices over a few hours, on the old fixed schedule
+(REFRESH_S after the last refresh, nothing retried before the next one)
+and with scheduler.Scheduler (jitter, token bucket, 429 backoff).
+
+  python3 pico_weather/benchmarks/bench_fleet.py [--devices 100] [--hours 6]
+
+Upstream is a fixed-window limiter: once LIMIT requests have arrived in a
+WINDOW_S window it answers 429 with Retry-After until the window ends.
+"""
+
+import heapq
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import Scheduler  # noqa: E402
+
+PERIOD_S = 600  # pico_main.REFRESH_S
+CALLS = 9  # one refresh: ip-api plus 8 Open-Meteo forecasts
+WINDOW_S = 10
+LIMIT = 200  # requests upstream accepts per window
+BOOT_S = 3  # the fleet finishes booting within this
+
+
+class Upstream:
+    def __init__(self, limit=LIMIT, window_s=WINDOW_S):
+        self.limit = limit
+        self.window_s = window_s
+        self.counts = Counter()  # window -> requests that arrived in it
+        self.refused = 0
+
+    def request(self, t):
+        """(status, retry_after) for a request arriving at t."""
+        w = int(t // self.window_s)
+        self.counts[w] += 1
+        if self.counts[w] > self.limit:
+            self.refused += 1
+            return 429, int((w + 1) * self.window_s - t) + 1
+        return 200, -1
+
+
+def simulate(devices=100, hours=6, scheduled=True, seed=1):
+    """Load and outcome of one run; peaks are requests per window."""
+    rng = random.Random(seed)
+    up = Upstream()
+    end = hours * 3600
+    scheds, events = [], []
+    for d in range(devices):
+        boot = rng.uniform(0, BOOT_S)
+        s = Scheduler(PERIOD_S, now=boot, rand=rng.random) if scheduled else None
+        scheds.append(s)
+        heapq.heappush(events, (s.wake_at() if s else boot, d))
+    ok = 0
+    while events:
+        t, d = heapq.heappop(events)
+        if t >= end:
+            break
+        s = scheds[d]
+        if s is None:
+            for _ in range(CALLS):
+                ok += up.request(t)[0] == 200
+            heapq.heappush(events, (t + PERIOD_S, d))
+            continue
+        if s.due(t):
+            for _ in range(CALLS):
+                if not s.acquire(t):
+                    continue
+                status, retry_after = up.request(t)
+                if status == 429:
+                    s.throttled(t, retry_after)
+                else:
+                    s.ok()
+                    ok += 1
+            s.refreshed(t)
+        heapq.heappush(events, (max(s.wake_at(), t + 1), d))
+
+    settled = int(2 * PERIOD_S // WINDOW_S)  # after everyone's first period
+    counts = up.counts
+    return {
+        "peak": max(counts.values()),
+        "steady_peak": max((n for w, n in counts.items() if w >= settled), default=0),
+        "requests": sum(counts.values()),
+        "refused": up.refused,
+        "ok_per_device_hour": ok / devices / hours,
+    }
+
+
+def main():
+    devices, hours = 100, 6
+    if "--devices" in sys.argv:
+        devices = int(sys.argv[sys.argv.index("--devices") + 1])
+    if "--hours" in sys.argv:
+        hours = float(sys.argv[sys.argv.index("--hours") + 1])
+    print(
+        "{} devices booted within {}s, {}h, upstream limit {}/{}s".format(
+            devices, BOOT_S, hours, LIMIT, WINDOW_S
+        )
+    )
+    for name, scheduled in (("fixed", False), ("scheduled", True)):
+        r = simulate(devices, hours, scheduled)
+        print(
+            "{:<10} peak {:4d}/window  after boot {:4d}/window  "
+            "{:6d} requests  {:5d} refused  {:4.1f} ok/device/h".format(
+                name,
+                r["peak"],
+                r["steady_peak"],
+                r["requests"],
+                r["refused"],
+                r["ok_per_device_hour"],
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
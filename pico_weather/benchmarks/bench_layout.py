@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Draw calls and allocations per draw_cache frame, with the layout cache
+and background snapshots warm versus cleared before every frame.
+
+  python3 pico_weather/benchmarks/bench_layout.py [--frames 500]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+
+
+class CountingDisplay:
+    """Forwards to a HeadlessGraphics, counting calls per method."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.counts = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.counts[name] += 1
+            return attr(*args, **kwargs)
+
+        return call
+
+
+def _cold(ns):
+    ns["_layouts"].clear()
+    ns["_backgrounds"].clear()
+
+
+def measure(frames=500, cold=False):
+    """Per-frame draw calls, peak traced bytes and wall time over all presets."""
+    disp = CountingDisplay(headless.HeadlessGraphics())
+    ns = headless.load_pico_main(disp)
+    cache = headless.fill_cache(ns)
+    draw = ns["draw_cache"]
+    for idx, entry in enumerate(cache):  # warm glyph masks and JPEG decode
+        draw(entry, idx)
+    disp.counts.clear()
+
+    n = len(cache)
+    tracemalloc.start()
+    peak = 0
+    for k in range(n):
+        if cold:
+            _cold(ns)
+        ns["_shown"] = None
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        draw(cache[k], k)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    calls = {name: c / n for name, c in disp.counts.items()}
+
+    updates = disp.updates
+    t0 = time.perf_counter()
+    for k in range(frames):
+        if cold:
+            _cold(ns)
+        ns["_shown"] = None  # a full frame, not the unchanged skip
+        draw(cache[k % n], k % n)
+    elapsed = time.perf_counter() - t0
+    if disp.updates - updates != frames:
+        raise RuntimeError("draw_cache skipped frames being timed")
+    return calls, peak, frames / elapsed
+
+
+def main():
+    frames = 500
+    if "--frames" in sys.argv:
+        frames = int(sys.argv[sys.argv.index("--frames") + 1])
+    for label, cold in (("cleared", True), ("cached", False)):
+        calls, peak, fps = measure(frames, cold)
+        total = sum(calls.values())
+        detail = ", ".join(
+            "{} {:.1f}".format(k, v) for k, v in sorted(calls.items()) if v
+        )
+        print(
+            "{:<8} {:5.1f} calls/frame  peak {:6d} B  {:7.0f} frames/s".format(
+                label, total, peak, fps
+            )
+        )
+        print("         {}".format(detail))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
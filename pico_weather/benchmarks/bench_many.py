@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Fetching many locations for the host scripts: one at a time against
+weather_api.fetch_many(), for 1, 10 and 100 places from uk_towns.csv.
+
+  python3 pico_weather/benchmarks/bench_many.py [--delay-ms 50]
+
+Both providers point at a local stand-in server that answers each request
+with the recorded payload from fixtures/ after DELAY_S, so the time is
+network wait, as it is against the real APIs.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import weather_api  # noqa: E402
+from city_db import read_csv  # noqa: E402
+from providers import OpenMeteo  # noqa: E402
+
+DELAY_S = 0.05
+COUNTS = (1, 10, 100)
+
+
+def fixture(name):
+    with open(os.path.join(HERE, "fixtures", name), "rb") as f:
+        return f.read()
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves body after delay_s; every stall_every'th request waits stall_s."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, body, delay_s=0.0, stall_every=0, stall_s=0.0, status=200):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.body = body
+        self.delay_s = delay_s
+        self.stall_every = stall_every
+        self.stall_s = stall_s
+        self.status = status
+        self.hits = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def base(self):
+        return "http://127.0.0.1:{}".format(self.server_address[1])
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self):
+        s = self.server
+        with s.lock:
+            s.hits += 1
+            n = s.hits
+        wait = s.delay_s
+        if s.stall_every and n % s.stall_every == 0:
+            wait += s.stall_s
+        time.sleep(wait)
+        self.send_response(s.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(s.body)))
+        self.end_headers()
+        self.wfile.write(s.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def places(n):
+    towns = read_csv(weather_api.TOWNS_CSV)
+    return [towns[i % len(towns)] for i in range(n)]
+
+
+def run(server, n, workers):
+    """Seconds to fetch n places, workers at a time (1: one after another)."""
+    providers = (OpenMeteo(server.base),)
+    todo = places(n)
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [weather_api.fetch_record(p, providers) for p in todo]
+    else:
+        results = weather_api.fetch_many(todo, providers, workers=workers)
+    dt = time.perf_counter() - t0
+    assert all(isinstance(r, tuple) for r in results), results
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--delay-ms", type=float, default=DELAY_S * 1000)
+    ap.add_argument("--workers", type=int, default=weather_api.WORKERS)
+    args = ap.parse_args()
+
+    server = StandIn(fixture("open_meteo.json"), delay_s=args.delay_ms / 1000)
+    try:
+        print(f"stand-in latency {args.delay_ms:.0f} ms, {args.workers} workers")
+        for n in COUNTS:
+            seq = run(server, n, 1)
+            par = run(server, n, args.workers)
+            print(
+                f"{n:>4} places  sequential {seq * 1000:7.0f} ms  "
+                f"concurrent {par * 1000:6.0f} ms  x{seq / par:.1f}"
+            )
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Nearest-place lookup cost: CityGrid versus a linear scan, for 30, 3,000
+and 30,000 random places over the UK bounding box.
+
+  python3 pico_weather/benchmarks/bench_nearest.py [--queries 2000]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from city_grid import CityGrid  # noqa: E402
+
+SIZES = (30, 3000, 30000)
+LAT = (49.9, 60.8)
+LON = (-6.4, 2.0)
+
+
+def random_places(n, seed=1):
+    rng = random.Random(seed)
+    return [("p{}".format(i), rng.uniform(*LAT), rng.uniform(*LON)) for i in range(n)]
+
+
+def linear_nearest(places, lat, lon, kx):
+    best, best_d = -1, float("inf")
+    for i, (_, plat, plon) in enumerate(places):
+        dx = (plon - lon) * kx
+        dy = plat - lat
+        d = dx * dx + dy * dy
+        if d < best_d:
+            best, best_d = i, d
+    return best
+
+
+def measure(n, queries=2000, linear=True):
+    """(build s, grid s/lookup, linear s/lookup or None) for n places."""
+    places = random_places(n)
+    rng = random.Random(2)
+    qs = [(rng.uniform(*LAT), rng.uniform(*LON)) for _ in range(queries)]
+    t0 = time.perf_counter()
+    grid = CityGrid(places)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for lat, lon in qs:
+        grid.nearest(lat, lon)
+    per_grid = (time.perf_counter() - t0) / queries
+
+    per_linear = None
+    if linear:
+        sample = qs[: max(10, queries * 30 // n)]  # keep the scan under a few s
+        t0 = time.perf_counter()
+        for lat, lon in sample:
+            linear_nearest(places, lat, lon, grid.kx)
+        per_linear = (time.perf_counter() - t0) / len(sample)
+    return build, per_grid, per_linear
+
+
+def main():
+    queries = 2000
+    if "--queries" in sys.argv:
+        queries = int(sys.argv[sys.argv.index("--queries") + 1])
+    for n in SIZES:
+        build, per_grid, per_linear = measure(n, queries)
+        print(
+            "{:>6} places  build {:7.1f} ms  grid {:6.1f} us/lookup"
+            "  linear {:9.1f} us/lookup".format(
+                n, build * 1e3, per_grid * 1e6, per_linear * 1e6
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+map_server pregen throughput: 1,000 maps rendered into an empty cache
+with 1, 2, 4 and os.cpu_count() worker processes.
+
+  python3 pico_weather/benchmarks/bench_pregen.py [--maps 1000]
+
+The places are uk_towns.csv repeated with small offsets, so every map is
+a distinct cache entry. Rendering is CPU-bound PIL work; the speed-up
+tracks the number of cores, so expect x1 on a single-core machine.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import map_server  # noqa: E402
+from map_cache import MapCache  # noqa: E402
+
+MAPS = 1000
+
+
+def places(n):
+    towns = map_server.read_csv(map_server.TOWNS_CSV)
+    out = []
+    for i in range(n):
+        name, lat, lon = towns[i % len(towns)]
+        step = i // len(towns)
+        out.append((name, lat + 0.05 * step, lon + 0.05 * step))
+    return out
+
+
+def run(todo, workers):
+    """Maps per second rendering todo into a fresh cache."""
+    with tempfile.TemporaryDirectory() as root:
+        t0 = time.perf_counter()
+        n = map_server.pregen(todo, MapCache(root), workers)
+        dt = time.perf_counter() - t0
+        assert n == len(todo) == len(MapCache(root)), n
+    return n / dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--maps", type=int, default=MAPS)
+    args = ap.parse_args()
+
+    todo = places(args.maps)
+    cores = os.cpu_count() or 1
+    print(f"{len(todo)} maps, {cores} cores")
+    base = None
+    for workers in sorted({1, 2, 4, cores}):
+        rate = run(todo, workers)
+        base = base or rate
+        print(f"{workers:>3} workers  {rate:7.0f} maps/s  x{rate / base:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Fetches and panel updates over a week of forecasts: the fixed REFRESH_S
+period against scheduler.refresh_period() choosing it from the forecast
+the device holds after each fetch.
+
+  python3 pico_weather/benchmarks/bench_refresh.py
+
+fixtures/open_meteo_week.json is nine days of hourly data in Open-Meteo's
+format (time, temperature_2m, precipitation, weathercode): a synthetic
+late-winter week with a cold front, a day of showers, a settled spell and
+two wet mornings. The two spare days let the last fetches see 48 hours
+ahead. A fetch at time t sees the hour it falls in as current weather and
+the 48 hours from there as the forecast; the panel is updated when the
+15-minute observation differs from the last fetch's (see draw_cache).
+"""
+
+import json
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from hourly import HOURS, HourlyRing  # noqa: E402
+from scheduler import (  # noqa: E402
+    NIGHT_END,
+    NIGHT_START,
+    Scheduler,
+    TokenBucket,
+    refresh_period,
+)
+
+PERIOD_S = 600  # pico_main.REFRESH_S
+DAYS = 7
+WEEK = os.path.join(HERE, "fixtures", "open_meteo_week.json")
+
+
+def load_week(path=WEEK):
+    with open(path) as f:
+        return json.load(f)["hourly"]
+
+
+def simulate(hourly, adaptive=True, days=DAYS, rand=random.random):
+    """Fetch count, panel updates and how late weathercode changes are seen.
+
+    Fetch times come from a scheduler.Scheduler booted at the start of the
+    week, as on the device (boot jitter, the first period scattered, then
+    +/- SPREAD).
+    """
+    times = hourly["time"]
+    temps = hourly["temperature_2m"]
+    rain = hourly["precipitation"]
+    codes = hourly["weathercode"]
+    ring = HourlyRing()
+    sched = Scheduler(PERIOD_S, rand=rand, bucket=TokenBucket(size=1 << 30))
+    end = days * 86400
+    fetches = []
+    t = sched.wake_at()
+    code = None
+    while t < end:
+        h = int(t // 3600)
+        changed = code is not None and codes[h] != code
+        code = codes[h]
+        fetches.append(t)
+        if adaptive:
+            ring.load(times[h], temps[h : h + HOURS], rain[h : h + HOURS])
+            sched.set_period(refresh_period(PERIOD_S, ring, h % 24, changed))
+        sched.refreshed(t)
+        t = sched.wake_at()
+
+    # Each weathercode change (on the hour) is shown at the next fetch
+    lags, day_lags = [], []
+    i = 0
+    for h in range(1, days * 24):
+        if codes[h] == codes[h - 1]:
+            continue
+        while i < len(fetches) and fetches[i] < h * 3600:
+            i += 1
+        lag = (fetches[i] if i < len(fetches) else end) - h * 3600
+        lags.append(lag)
+        if NIGHT_END <= h % 24 < NIGHT_START:
+            day_lags.append(lag)
+    slots = {int(t // 900) for t in fetches}  # a new observation each 15 minutes
+    return {
+        "fetches": len(fetches),
+        "updates": len(slots),
+        "lag_s": sum(lags) / len(lags),
+        "day_lag_s": sum(day_lags) / len(day_lags),
+        "max_day_lag_s": max(day_lags),
+    }
+
+
+def average(hourly, adaptive=True, runs=20, seed=1):
+    """simulate() averaged over runs devices."""
+    rng = random.Random(seed)
+    out = [simulate(hourly, adaptive, rand=rng.random) for _ in range(runs)]
+    avg = {key: sum(r[key] for r in out) / runs for key in out[0]}
+    avg["max_day_lag_s"] = max(r["max_day_lag_s"] for r in out)
+    return avg
+
+
+def main():
+    hourly = load_week()
+    codes = hourly["weathercode"][: DAYS * 24]
+    changes = sum(a != b for a, b in zip(codes, codes[1:]))
+    print("{} days, {} weathercode changes".format(DAYS, changes))
+    for name, adaptive in (("fixed", False), ("adaptive", True)):
+        r = average(hourly, adaptive)
+        print(
+            "{:<9} {:6.0f} fetches  {:6.0f} panel updates  change shown after "
+            "{:4.1f} min (daytime {:4.1f}, worst {:4.1f})".format(
+                name,
+                r["fetches"],
+                r["updates"],
+                r["lag_s"] / 60,
+                r["day_lag_s"] / 60,
+                r["max_day_lag_s"] / 60,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Frames/sec for pico_main.draw_cache on the headless renderer.
+Renders every PRESET_CITIES entry (Auto included) from a canned forecast.
+_shown is cleared before each draw, so every frame is rendered and sent
+to the panel rather than skipped as unchanged.
+
+  python3 pico_weather/benchmarks/bench_render.py [--seconds 1.0]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+
+
+def bench(seconds=1.0):
+    ns = headless.load_pico_main()
+    cache = headless.fill_cache(ns)
+    draw, display = ns["draw_cache"], ns["display"]
+    results = []
+    for idx, entry in enumerate(cache):
+        draw(entry, idx)  # warm the mask cache
+        frames = 0
+        updates = display.updates
+        t0 = time.perf_counter()
+        deadline = t0 + seconds
+        while True:
+            for _ in range(50):
+                ns["_shown"] = None  # a full frame, not the unchanged skip
+                draw(entry, idx)
+            frames += 50
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+        if display.updates - updates != frames:
+            raise RuntimeError("draw_cache skipped frames being timed")
+        results.append((entry["city"], idx, frames / (now - t0)))
+    return results
+
+
+def main():
+    seconds = 1.0
+    if "--seconds" in sys.argv:
+        seconds = float(sys.argv[sys.argv.index("--seconds") + 1])
+    results = bench(seconds)
+    for city, idx, fps in results:
+        label = "Auto" if idx == 0 else city
+        print("  {:<12} {:>9.0f} frames/s".format(label, fps))
+    mean = sum(r[2] for r in results) / len(results)
+    print("  {:<12} {:>9.0f} frames/s".format("mean", mean))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Serving /map from a tile_store.TileStore against rendering every request
+and against the map_cache.MapCache directory.
+
+  python3 pico_weather/benchmarks/bench_store.py [--maps 1000] [--requests 2000]
+
+Fills a store and a directory cache with the same maps (bench_pregen's
+places), then times reopening the store (the cold start), lookups in
+process, and /map requests from 8 client threads against a local
+map_server.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import map_server  # noqa: E402
+from bench_pregen import places  # noqa: E402
+from map_cache import MapCache, cache_key  # noqa: E402
+from tile_store import TileStore  # noqa: E402
+
+MAPS = 1000
+REQUESTS = 2000
+CLIENTS = 8
+
+
+def lookups(cache, keys):
+    """Cached maps read per second."""
+    t0 = time.perf_counter()
+    n = 0
+    for key in keys:
+        found = cache.get(key)
+        if isinstance(found, str):
+            with open(found, "rb") as f:
+                found = f.read()
+        n += len(found)
+    return len(keys) / (time.perf_counter() - t0)
+
+
+def renders(params):
+    t0 = time.perf_counter()
+    for p in params:
+        map_server.make_uk_map(*p)
+    return len(params) / (time.perf_counter() - t0)
+
+
+def serve_rate(cache, todo):
+    """/map requests per second with cache (None: render each one)."""
+    handler = type("Handler", (map_server.MapHandler,), {"cache": cache})
+    server = map_server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = "http://127.0.0.1:{}/map?".format(server.server_address[1])
+
+    def get(place):
+        name, lat, lon = place
+        url = base + "lat={}&lon={}&city={}".format(lat, lon, name.replace(" ", "+"))
+        with urllib.request.urlopen(url, timeout=30) as r:
+            return len(r.read())
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the per-request log
+        try:
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(CLIENTS) as pool:
+                sum(pool.map(get, todo))
+            dt = time.perf_counter() - t0
+        finally:
+            server.shutdown()
+            server.server_close()
+    return len(todo) / dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--maps", type=int, default=MAPS)
+    ap.add_argument("--requests", type=int, default=REQUESTS)
+    args = ap.parse_args()
+
+    towns = places(args.maps)
+    rng = random.Random(1)
+    todo = [rng.choice(towns) for _ in range(args.requests)]
+    params = [map_server.map_params(lat, lon, name) for name, lat, lon in towns]
+    keys = [cache_key(p) for p in params]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "maps.tiles")
+        store = TileStore(path)
+        directory = MapCache(os.path.join(tmp, "dir"))
+        map_server.pregen(towns, store)
+        for key in keys:
+            directory.put(key, bytes(store.get(key)))
+        store.close()
+        size = os.path.getsize(path)
+
+        t0 = time.perf_counter()
+        store = TileStore(path)
+        cold = time.perf_counter() - t0
+        print(
+            f"{len(store)} maps, {size / 1024:.0f} KiB store, "
+            f"reopened in {cold * 1000:.1f} ms"
+        )
+
+        print("in process (maps/s):")
+        print(f"  render      {renders(params[:200]):9.0f}")
+        print(f"  directory   {lookups(directory, keys):9.0f}")
+        print(f"  tile store  {lookups(store, keys):9.0f}")
+
+        print(f"/map over HTTP, {CLIENTS} clients (requests/s):")
+        for name, cache in (
+            ("render", None),
+            ("directory", directory),
+            ("tile store", store),
+        ):
+            print(f"  {name:<10}  {serve_rate(cache, todo):9.0f}")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+/map render and encode time against zoom level and size.
+
+  python3 pico_weather/benchmarks/bench_zoom.py [--rounds 50]
+
+Each zoom (1 = all of GB) is rendered around a few cities at the Pico
+panel's map size and at full panel width, through map_params() as /map
+does; times are medians in ms.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import map_server  # noqa: E402
+
+CITIES = (
+    ("Cambridge", 52.205, 0.122),
+    ("Glasgow", 55.864, -4.252),
+    ("Penzance", 50.119, -5.537),
+)
+ZOOMS = (1, 2, 4, 8, 16)
+SIZES = ((148, 108), (296, 128))
+ROUNDS = 50
+
+
+def time_ms(params, rounds):
+    render, encode = [], []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        img = map_server.render_uk_map(*params)
+        t1 = time.perf_counter()
+        map_server.encode_jpeg(img)
+        t2 = time.perf_counter()
+        render.append(t1 - t0)
+        encode.append(t2 - t1)
+    return statistics.median(render) * 1e3, statistics.median(encode) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=ROUNDS)
+    args = ap.parse_args()
+
+    for w, h in SIZES:
+        print(f"{w}x{h}")
+        for zoom in ZOOMS:
+            render, encode = zip(
+                *(
+                    time_ms(
+                        map_server.map_params(lat, lon, name, w, h, zoom), args.rounds
+                    )
+                    for name, lat, lon in CITIES
+                )
+            )
+            print(
+                f"  zoom {zoom:>2}  render {statistics.mean(render):5.2f} ms  "
+                f"encode {statistics.mean(encode):5.2f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the whole project, on recorded API payloads.
+
+  python3 pico_weather/benchmarks/run.py [-k NAME] [--quick] [--json out.json]
+  python3 pico_weather/benchmarks/run.py --json new.json --compare base.json
+
+Each benchmark reports seconds per operation (median/min/mean over rounds).
+--compare exits 1 when any median is more than --threshold (default 10%)
+slower than in the baseline JSON.
+
+Payloads in fixtures/: open_meteo.json (pico_main's forecast query),
+ip_api.json (Auto geolocation), wttr_in.json (format=j1, used by
+update_weather.py and weather_display.py).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import headless  # noqa: E402
+from scheduler import TokenBucket  # noqa: E402
+
+BENCHES = {}  # name -> (setup, description)
+
+
+def bench(name, description):
+    """Register a setup generator that yields the callable to time."""
+
+    def register(setup):
+        BENCHES[name] = (contextlib.contextmanager(setup), description)
+        return setup
+
+    return register
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class _Resp:
+    """http_client response over recorded bytes (json() really parses)."""
+
+    status_code = 200
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def json(self):
+        return json.loads(self.raw)
+
+    def close(self):
+        pass
+
+
+def _pico_main_online():
+    """pico_main namespace whose http_client serves the recorded payloads."""
+    ns = headless.load_pico_main()
+    loc, forecast = fixture("ip_api.json"), fixture("open_meteo.json")
+    ns["http_client"].get = lambda url, timeout=None: _Resp(
+        loc if "ip-api" in url else forecast
+    )
+    # Rounds of fetches, not one device's upstream budget
+    ns["sched"].bucket = TokenBucket(size=1 << 30)
+    return ns
+
+
+# ── benchmarks ────────────────────────────────────────────────────────────────
+
+
+@bench("fetch_weather", "pico_main.fetch_weather for all presets: JSON parse + format")
+def _fetch_weather():
+    ns = _pico_main_online()
+    fetch, n = ns["fetch_weather"], len(ns["PRESET_CITIES"])
+
+    def run():
+        for i in range(n):
+            fetch(i)
+
+    run()
+    if None in ns["weather_cache"]:
+        raise RuntimeError("fetch_weather failed on the recorded payload")
+    yield run
+
+
+def _drawn(ns, run):
+    """run, checked to reach display.update() each call (never the skip)."""
+    display = ns["display"]
+
+    def checked():
+        before = display.updates
+        run()
+        if display.updates != before + 1:
+            raise RuntimeError("draw_cache skipped the frame being timed")
+
+    return checked
+
+
+@bench("draw_cache", "pico_main.draw_cache on the headless display (caches warm)")
+def _draw_cache():
+    ns = _pico_main_online()
+    headless.fill_cache(ns)
+    draw, cache = ns["draw_cache"], ns["weather_cache"]
+    for i, c in enumerate(cache):
+        draw(c, i)
+
+    def run():
+        ns["_shown"] = None  # a full frame, not the unchanged skip
+        draw(cache[1], 1)
+
+    yield _drawn(ns, run)
+
+
+@bench("draw_cache_cold", "draw_cache with layout and background caches cleared")
+def _draw_cache_cold():
+    ns = _pico_main_online()
+    headless.fill_cache(ns)
+    draw, cache = ns["draw_cache"], ns["weather_cache"]
+    layouts, backgrounds = ns["_layouts"], ns["_backgrounds"]
+    draw(cache[1], 1)
+
+    def run():
+        layouts.clear()
+        backgrounds.clear()
+        ns["_shown"] = None
+        draw(cache[1], 1)
+
+    yield _drawn(ns, run)
+
+
+@bench("make_uk_map", "map_server.make_uk_map render + JPEG encode")
+def _make_uk_map():
+    import map_server
+
+    yield lambda: map_server.make_uk_map(52.205, 0.122, "Cambridge")
+
+
+@bench("map_http", "/map round trip to a local map_server")
+def _map_http():
+    import map_server
+
+    server = map_server.ThreadingHTTPServer(("127.0.0.1", 0), map_server.MapHandler)
+    url = "http://127.0.0.1:{}/map?lat=52.205&lon=0.122&city=Cambridge".format(
+        server.server_address[1]
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def run():
+        with urllib.request.urlopen(url, timeout=10) as r:
+            r.read()
+
+    # Handlers log a line per request; server_close() joins them
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            yield run
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+@bench("build_script", "update_weather: parse wttr.in payload + build_script")
+def _build_script():
+    import update_weather
+    from providers import Wttr
+
+    raw = fixture("wttr_in.json")
+    wttr = Wttr()
+
+    def run():
+        w = update_weather.parse_weather(wttr.parse(json.loads(raw)), "London")
+        return update_weather.build_script(**w)
+
+    yield run
+
+
+@bench("build_pico_script", "weather_display: format_weather + build_pico_script")
+def _build_pico_script():
+    import weather_display
+    from providers import Wttr
+
+    raw = fixture("wttr_in.json")
+    wttr = Wttr()
+
+    def run():
+        w = weather_display.format_weather(wttr.parse(json.loads(raw)))
+        return weather_display.build_pico_script(w)
+
+    yield run
+
+
+@bench("nearest", "city_grid.CityGrid.nearest over 3,000 random places")
+def _nearest():
+    import bench_nearest
+    from city_grid import CityGrid
+
+    grid = CityGrid(bench_nearest.random_places(3000))
+    qs = [(50.0 + k * 0.1, -6.0 + k * 0.08) for k in range(100)]
+
+    def run():
+        for lat, lon in qs:
+            grid.nearest(lat, lon)
+
+    yield run
+
+
+# ── runner ────────────────────────────────────────────────────────────────────
+
+
+def measure(fn, rounds=5, min_time=0.05):
+    """Seconds per call: loops calibrated so one round lasts >= min_time."""
+    fn()  # warm up
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    times = [elapsed / loops]
+    for _ in range(rounds - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - t0) / loops)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "mean": statistics.fmean(times),
+        "rounds": rounds,
+        "loops": loops,
+    }
+
+
+def _commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(names=None, rounds=5, min_time=0.05, log=print):
+    """Run the selected benchmarks; returns the JSON-ready result document."""
+    results = {}
+    for name, (setup, description) in BENCHES.items():
+        if names and not any(n in name for n in names):
+            continue
+        try:
+            with setup() as fn:
+                r = measure(fn, rounds, min_time)
+        except ImportError as e:  # e.g. Pillow or pyserial missing
+            log(f"  {name:<18} skipped ({e})")
+            continue
+        r["unit"] = "s/op"
+        r["description"] = description
+        results[name] = r
+        log(f"  {name:<18} {r['median'] * 1e3:10.3f} ms/op  (min {r['min'] * 1e3:.3f})")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "rounds": rounds,
+            "min_time": min_time,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """[(name, base s/op, current s/op, ratio, status)] on medians.
+
+    status is "regressed" (> 1 + threshold), "improved" (< 1 - threshold),
+    "ok", or "new" / "missing" for benchmarks only in one document.
+    """
+    rows = []
+    base, cur = baseline["results"], current["results"]
+    for name in sorted(set(base) | set(cur)):
+        if name not in base:
+            rows.append((name, None, cur[name]["median"], None, "new"))
+            continue
+        if name not in cur:
+            rows.append((name, base[name]["median"], None, None, "missing"))
+            continue
+        b, c = base[name]["median"], cur[name]["median"]
+        ratio = c / b if b else float("inf")
+        if ratio > 1 + threshold:
+            status = "regressed"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, b, c, ratio, status))
+    return rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the pico_weather benchmarks")
+    ap.add_argument("-k", action="append", metavar="NAME", help="substring filter")
+    ap.add_argument("--quick", action="store_true", help="1 short round each")
+    ap.add_argument("--json", metavar="PATH", help="write results here")
+    ap.add_argument("--compare", metavar="BASELINE", help="baseline results JSON")
+    ap.add_argument("--threshold", type=float, default=0.10, help="default 0.10")
+    ap.add_argument("--list", action="store_true", help="list benchmarks")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in BENCHES.items():
+            print(f"  {name:<18} {description}")
+        return 0
+
+    rounds, min_time = (1, 0.01) if args.quick else (5, 0.05)
+    doc = run(args.k, rounds, min_time)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(doc, f, indent=1, sort_keys=True)
+            f.write("\n")
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(baseline, doc, args.threshold)
+    print(f"\n  vs {args.compare} (threshold {args.threshold:.0%})")
+    for name, b, c, ratio, status in rows:
+        change = f"{(ratio - 1) * 100:+6.1f}%" if ratio is not None else "      "
+        print(f"  {name:<18} {change}  {status}")
+    return 1 if any(r[4] == "regressed" for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
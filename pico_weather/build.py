@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Build the Pico image from the device modules and assets.
+
+  python3 pico_weather/build.py [--out build] [--mpy-cross CMD]
+
+  build/fs/      copy to the Pico:  mpremote cp -r build/fs/. :
+                 main.py (just "import pico_main"), one .mpy per module
+                 (no compile at boot), uk_map.jpg and cities.bin if built
+  build/frozen/  module sources, uk_map_asset.py and manifest.py, for
+                 make BOARD=RPI_PICO_W FROZEN_MANIFEST=<abs>/manifest.py
+                 in micropython/ports/rp2; frozen bytecode and the map
+                 bytes then stay in flash instead of the heap
+
+The .mpy files must come from an mpy-cross matching the firmware's .mpy
+version (`pip install mpy-cross`, or the one built with the firmware).
+Without mpy-cross, fs/ gets the .py sources instead.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Everything pico_main imports that is not built into the firmware
+DEVICE_MODULES = (
+    "pico_main",
+    "city_db",
+    "city_dots",
+    "city_grid",
+    "fetch_worker",
+    "hourly",
+    "http_client",
+    "map_proj",
+    "perf",
+    "providers",
+    "scheduler",
+    "sleep_mode",
+    "wifi_manager",
+)
+MAP_FILE = "uk_map.jpg"
+ASSETS = (MAP_FILE, "cities.bin")  # copied when present
+MPY_ARCH = "armv6m"  # RP2040 (Cortex-M0+)
+
+
+def find_mpy_cross():
+    """Command list for mpy-cross, or None if it is not installed."""
+    exe = shutil.which("mpy-cross")
+    if exe:
+        return [exe]
+    try:
+        import mpy_cross  # noqa: F401
+    except ImportError:
+        return None
+    return [sys.executable, "-m", "mpy_cross"]
+
+
+def map_asset_source(data):
+    """Source of uk_map_asset.py holding the JPEG bytes."""
+    lines = [
+        '"""UK map JPEG, generated by build.py from uk_map.jpg -- do not edit."""',
+        "",
+        "UK_MAP = (",
+    ]
+    for i in range(0, len(data), 16):
+        chunk = data[i : i + 16]
+        lines.append('    b"{}"'.format("".join("\\x{:02x}".format(v) for v in chunk)))
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def build(out, mpy_cross=None, src=HERE):
+    """Write fs/ and frozen/ under out; returns {file name: size} for fs/."""
+    fs = os.path.join(out, "fs")
+    frozen = os.path.join(out, "frozen")
+    for d in (fs, frozen):
+        if os.path.isdir(d):
+            shutil.rmtree(d)
+        os.makedirs(d)
+
+    with open(os.path.join(fs, "main.py"), "w") as f:
+        f.write("import pico_main\n")
+    for name in DEVICE_MODULES:
+        py = os.path.join(src, name + ".py")
+        shutil.copy(py, frozen)
+        if mpy_cross:
+            subprocess.run(
+                mpy_cross
+                + ["-march=" + MPY_ARCH, "-o", os.path.join(fs, name + ".mpy"), py],
+                check=True,
+            )
+        else:
+            shutil.copy(py, fs)
+    for asset in ASSETS:
+        path = os.path.join(src, asset)
+        if os.path.exists(path):
+            shutil.copy(path, fs)
+
+    with open(os.path.join(src, MAP_FILE), "rb") as f:
+        jpeg = f.read()
+    with open(os.path.join(frozen, "uk_map_asset.py"), "w") as f:
+        f.write(map_asset_source(jpeg))
+    base = os.path.abspath(frozen)
+    with open(os.path.join(frozen, "manifest.py"), "w") as f:
+        f.write('include("$(PORT_DIR)/boards/manifest.py")\n')
+        for name in DEVICE_MODULES + ("uk_map_asset",):
+            f.write('module("{}.py", base_path="{}")\n'.format(name, base))
+
+    return {name: os.path.getsize(os.path.join(fs, name)) for name in os.listdir(fs)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build .mpy modules and frozen assets")
+    ap.add_argument("--out", default="build")
+    ap.add_argument("--mpy-cross", help="mpy-cross command (default: auto)")
+    args = ap.parse_args(argv)
+
+    mpy_cross = args.mpy_cross.split() if args.mpy_cross else find_mpy_cross()
+    if mpy_cross is None:
+        print("mpy-cross not found: fs/ gets .py sources (pip install mpy-cross)")
+    sizes = build(args.out, mpy_cross)
+    for name, size in sorted(sizes.items()):
+        print(f"  fs/{name:<20} {size:7d} B")
+    print(f"  {sum(sizes.values())} B in {args.out}/fs")
+    print(f"  frozen manifest: {os.path.abspath(args.out)}/frozen/manifest.py")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+On-flash city database for pico_main's city picker.
+
+cities.bin holds fixed-width records sorted by upper-cased name, so any
+record is one seek away and only a small sparse index lives in RAM:
+
+    header  "CDB1", count (uint32)
+    index   KEY_W bytes per STRIDE records: the first record's name key
+    records NAME_W-byte name (NUL padded), lat, lon (int32, 1e-5 deg)
+    grid    city_grid section over the records, for nearest-place lookups
+
+Records are read a WINDOW (= STRIDE) at a time into one preallocated
+buffer; browsing neighbours and prefix searches inside a window cost no
+further flash reads. Build the file on the host:
+
+    python3 pico_weather/city_db.py uk_towns.csv cities.bin
+"""
+
+import struct
+
+from city_grid import CityGrid, FlashGrid
+
+DB_FILE = "cities.bin"
+MAGIC = b"CDB1"
+NAME_W = 20  # bytes of name kept (longer names are truncated)
+KEY_W = 8  # bytes of each sparse index key
+STRIDE = 32  # records per index key (and per window read)
+WINDOW = STRIDE
+SCALE = 100000  # lat/lon fixed point
+
+_HEADER = "<4sI"
+_RECORD = "<{}sii".format(NAME_W)
+HEADER_SIZE = struct.calcsize(_HEADER)
+RECORD_SIZE = struct.calcsize(_RECORD)
+
+BLACK = 0
+WHITE = 15
+PICKER_ROWS = 11
+
+
+def _key(name):
+    return name.upper().encode()[:NAME_W]
+
+
+def _clip(name):
+    """name cut to NAME_W bytes of UTF-8 without splitting a character."""
+    return name.encode()[:NAME_W].decode("utf-8", "ignore")
+
+
+def build(cities, path=DB_FILE):
+    """Write (name, lat, lon) rows to path as a sorted database; returns count."""
+    names = [(_clip(n), lat, lon) for n, lat, lon in cities]
+    rows = sorted(
+        ((_key(n), n.encode(), lat, lon) for n, lat, lon in names),
+        key=lambda r: r[0],
+    )
+    n = len(rows)
+    with open(path, "wb") as f:
+        f.write(struct.pack(_HEADER, MAGIC, n))
+        for i in range(0, n, STRIDE):
+            key = rows[i][0][:KEY_W]
+            f.write(key + bytes(KEY_W - len(key)))
+        for _, name, lat, lon in rows:
+            f.write(
+                struct.pack(
+                    _RECORD, name, int(round(lat * SCALE)), int(round(lon * SCALE))
+                )
+            )
+        CityGrid([(None, lat, lon) for _, _, lat, lon in rows]).save(f)
+    return n
+
+
+class CityDB:
+    """Read-only view of a build() file; db[i] -> (name, lat, lon)."""
+
+    def __init__(self, path=DB_FILE):
+        self._f = open(path, "rb")
+        magic, self.count = struct.unpack(_HEADER, self._f.read(HEADER_SIZE))
+        if magic != MAGIC:
+            self._f.close()
+            raise ValueError("not a city database")
+        blocks = (self.count + STRIDE - 1) // STRIDE
+        self._index = self._f.read(blocks * KEY_W)
+        self._base = HEADER_SIZE + blocks * KEY_W
+        self._win = bytearray(WINDOW * RECORD_SIZE)
+        self._win_mv = memoryview(self._win)
+        self._win_start = -1
+        self._win_len = 0
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._f.close()
+
+    def grid(self, project=None):
+        """FlashGrid over the records (dots via project), or None if not built in."""
+        try:
+            return FlashGrid(
+                self._f, self._base + self.count * RECORD_SIZE, self, project
+            )
+        except ValueError:
+            return None
+
+    def _record(self, i):
+        """Offset of record i in the window buffer, loading its window."""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        k = i - self._win_start
+        if self._win_start < 0 or not 0 <= k < self._win_len:
+            start = i - i % WINDOW
+            self._f.seek(self._base + start * RECORD_SIZE)
+            n = min(WINDOW, self.count - start)
+            self._f.readinto(self._win_mv[: n * RECORD_SIZE])
+            self._win_start, self._win_len = start, n
+            k = i - start
+        return k * RECORD_SIZE
+
+    def name(self, i):
+        off = self._record(i)
+        return bytes(self._win[off : off + NAME_W]).rstrip(b"\0").decode()
+
+    def __getitem__(self, i):
+        name, lat, lon = struct.unpack_from(_RECORD, self._win, self._record(i))
+        return name.rstrip(b"\0").decode(), lat / SCALE, lon / SCALE
+
+    def _block_key(self, b):
+        return self._index[b * KEY_W : (b + 1) * KEY_W].rstrip(b"\0")
+
+    def bisect(self, prefix):
+        """Index of the first record whose name sorts at or after prefix."""
+        key = _key(prefix)
+        # Last block whose key sorts before the prefix: nothing earlier matches
+        lo, hi = 0, len(self._index) // KEY_W
+        short = key[:KEY_W]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._block_key(mid) < short:
+                lo = mid + 1
+            else:
+                hi = mid
+        i = max(lo - 1, 0) * STRIDE
+        while i < self.count and _key(self.name(i)) < key:
+            i += 1
+        return i
+
+    def find(self, prefix):
+        """Index of the first record starting with prefix, or -1."""
+        i = self.bisect(prefix)
+        if i < self.count and _key(self.name(i)).startswith(_key(prefix)):
+            return i
+        return -1
+
+    def jump(self, i, step):
+        """First record of the next (step=1) or previous (-1) initial letter."""
+        if not self.count:
+            return 0
+        initial = self.name(i)[:1].upper()
+        if step > 0:
+            j = self.bisect(chr(ord(initial) + 1)) if initial else i + 1
+            return j if j < self.count else 0
+        start = self.bisect(initial)
+        if start > 0:
+            return self.bisect(self.name(start - 1)[:1])
+        return self.bisect(self.name(self.count - 1)[:1])
+
+
+def open_db(path=DB_FILE):
+    """CityDB for path, or None if it is missing or invalid."""
+    try:
+        return CityDB(path)
+    except (OSError, ValueError):
+        return None
+
+
+def draw_picker(display, db, cursor, x=4, y=16):
+    """City list around cursor; the selected row is drawn inverted."""
+    display.set_pen(WHITE)
+    display.clear()
+    display.set_pen(BLACK)
+    display.rectangle(0, 0, 296, 14)
+    display.set_font("bitmap6")
+    display.set_pen(WHITE)
+    display.text("Choose city", 3, 4, scale=1)
+    display.text("{}/{}".format(cursor + 1, len(db)), 220, 4, scale=1)
+    first = max(0, min(cursor - PICKER_ROWS // 2, len(db) - PICKER_ROWS))
+    for row in range(min(PICKER_ROWS, len(db))):
+        i = first + row
+        ry = y + row * 10
+        if i == cursor:
+            display.set_pen(BLACK)
+            display.rectangle(0, ry - 1, 296, 10)
+            display.set_pen(WHITE)
+        else:
+            display.set_pen(BLACK)
+        name, lat, lon = db[i]
+        display.text(name, x, ry, scale=1)
+        display.text("{:.2f},{:.2f}".format(lat, lon), 200, ry, scale=1)
+
+
+def read_csv(path):
+    """[(name, lat, lon)] from a name,lat,lon CSV (host side)."""
+    import csv
+
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#") or row[0] == "name":
+                continue
+            rows.append((row[0], float(row[1]), float(row[2])))
+    return rows
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build cities.bin from a CSV")
+    ap.add_argument("csv", help="name,lat,lon rows (header optional)")
+    ap.add_argument("out", nargs="?", default=DB_FILE)
+    args = ap.parse_args()
+    n = build(read_csv(args.csv), args.out)
+    print(f"{n} cities -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Generated by gen_city_dots.py from uk_towns.csv -- do not edit."""
+
+# Sorted city names; DOTS[2 * i], DOTS[2 * i + 1] is NAMES[i]'s (x, y)
+NAMES = (
+    "Aberdeen",
+    "Aberystwyth",
+    "Ayr",
+    "Bangor",
+    "Barnsley",
+    "Basingstoke",
+    "Bath",
+    "Bedford",
+    "Belfast",
+    "Birmingham",
+    "Blackburn",
+    "Blackpool",
+    "Bolton",
+    "Bournemouth",
+    "Bradford",
+    "Brighton",
+    "Bristol",
+    "Cambridge",
+    "Canterbury",
+    "Cardiff",
+    "Carlisle",
+    "Chelmsford",
+    "Cheltenham",
+    "Chester",
+    "Chesterfield",
+    "Colchester",
+    "Coventry",
+    "Crawley",
+    "Darlington",
+    "Derby",
+    "Doncaster",
+    "Dover",
+    "Dumfries",
+    "Dundee",
+    "Durham",
+    "Eastbourne",
+    "Edinburgh",
+    "Exeter",
+    "Falkirk",
+    "Fort William",
+    "Glasgow",
+    "Gloucester",
+    "Grimsby",
+    "Guildford",
+    "Harrogate",
+    "Hastings",
+    "Hereford",
+    "Huddersfield",
+    "Hull",
+    "Inverness",
+    "Ipswich",
+    "Kendal",
+    "Kilmarnock",
+    "Kirkwall",
+    "Lancaster",
+    "Leeds",
+    "Leicester",
+    "Lerwick",
+    "Lincoln",
+    "Liverpool",
+    "London",
+    "Luton",
+    "Maidstone",
+    "Manchester",
+    "Middlesbrough",
+    "Milton Keynes",
+    "Newcastle",
+    "Newport",
+    "Northampton",
+    "Norwich",
+    "Nottingham",
+    "Oban",
+    "Oldham",
+    "Oxford",
+    "Penzance",
+    "Perth",
+    "Peterborough",
+    "Plymouth",
+    "Portsmouth",
+    "Preston",
+    "Reading",
+    "Salisbury",
+    "Scarborough",
+    "Sheffield",
+    "Shrewsbury",
+    "Southampton",
+    "Southend-on-Sea",
+    "St Andrews",
+    "Stirling",
+    "Stockport",
+    "Stoke-on-Trent",
+    "Stornoway",
+    "Sunderland",
+    "Swansea",
+    "Swindon",
+    "Taunton",
+    "Telford",
+    "Thurso",
+    "Truro",
+    "Ullapool",
+    "Wakefield",
+    "Warrington",
+    "Watford",
+    "Weymouth",
+    "Wick",
+    "Wigan",
+    "Winchester",
+    "Wolverhampton",
+    "Worcester",
+    "Wrexham",
+    "Yeovil",
+    "York",
+)
+DOTS = (
+    b"\xde\x36\xd4\x61\xd1\x45\xd4\x59\xe1\x56\xe3\x6b\xdd\x6a\xe6\x63"
+    b"\xca\x4d\xdf\x60\xdc\x55\xd9\x54\xdc\x56\xdf\x70\xe0\x54\xe8\x6f"
+    b"\xdc\x69\xe9\x63\xee\x6b\xd8\x69\xda\x4a\xeb\x67\xde\x65\xda\x5a"
+    b"\xe1\x59\xed\x65\xe1\x61\xe8\x6d\xe1\x4e\xe1\x5c\xe3\x57\xef\x6c"
+    b"\xd6\x49\xda\x3c\xe1\x4b\xea\x70\xd8\x41\xd7\x70\xd5\x40\xcf\x39"
+    b"\xd3\x41\xdd\x66\xe8\x56\xe6\x6b\xe1\x52\xec\x6f\xdb\x64\xe0\x56"
+    b"\xe7\x55\xd3\x33\xef\x64\xdb\x4f\xd2\x44\xda\x25\xda\x52\xe1\x54"
+    b"\xe3\x5f\xe3\x1a\xe6\x59\xd9\x58\xe8\x69\xe7\x66\xeb\x6b\xdd\x57"
+    b"\xe2\x4d\xe5\x64\xe0\x49\xd9\x68\xe4\x62\xef\x5f\xe3\x5c\xcd\x3c"
+    b"\xde\x56\xe2\x67\xcc\x76\xd7\x3c\xe8\x5f\xd4\x73\xe3\x6f\xdb\x54"
+    b"\xe4\x69\xe0\x6d\xe7\x50\xe1\x58\xdb\x5e\xe2\x6e\xec\x69\xda\x3d"
+    b"\xd5\x3f\xde\x58\xde\x5b\xc8\x2c\xe2\x4a\xd5\x68\xe0\x69\xd9\x6d"
+    b"\xdc\x5e\xd7\x28\xcf\x74\xce\x2f\xe1\x55\xdb\x58\xe7\x68\xdc\x71"
+    b"\xd9\x2a\xdb\x56\xe2\x6d\xde\x5f\xdd\x63\xd9\x5b\xdb\x6e\xe3\x53"
+)
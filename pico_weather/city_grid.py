@@ -0,0 +1,255 @@
+"""
+Grid spatial index for nearest-place lookups (Pico and map_server).
+
+Places are bucketed into a uniform grid sized for about PER_CELL places
+per cell and stored in cell order in flat arrays: fixed-point lat/lon,
+the index into the source sequence and, optionally, a precomputed map
+dot. A lookup scans the query's cell, then rings of neighbouring cells
+until no closer place can exist, so its cost stays at a few cells
+whether there are 30 places or 30,000.
+
+    grid = CityGrid(read_csv("uk_towns.csv"))   # host: built in RAM
+    grid = CityDB().grid(latlon_to_dot)          # Pico: read from flash
+    k = grid.nearest(52.2, 0.1, max_km=25)
+    if k >= 0:
+        name, lat, lon = grid.place(k)
+        x, y = grid.dot(k)
+
+Distances are equirectangular (scaled by cos of the mid latitude), which
+is well within a pixel of the map over the UK.
+
+On the Pico the grid is not built at boot: city_db.build() appends it to
+cities.bin (save()) and FlashGrid reads the cells a lookup visits from
+flash, so RAM holds only the header and one cell's slots:
+
+    grid    "CGR1", count, cols, rows, lat0, lon0 (int32), cell, kx
+            (float64), most (uint32: places in the fullest cell)
+    start   (cols * rows + 1) uint32: first slot of each cell
+    slots   lat, lon, index (int32) per place, in cell order
+"""
+
+import math
+import struct
+from array import array
+
+SCALE = 100000  # fixed point for lat/lon (1e-5 deg)
+PER_CELL = 2  # target places per grid cell
+KM_PER_DEG = 111.2
+
+GRID_MAGIC = b"CGR1"
+_GRID_HEADER = "<4sIIIiiddI"
+GRID_HEADER_SIZE = struct.calcsize(_GRID_HEADER)
+
+
+class CityGrid:
+    """Nearest-place index over places[i] -> (name, lat, lon)."""
+
+    def __init__(self, places, project=None, per_cell=PER_CELL):
+        self.places = places
+        n = len(places)
+        lats = array("i", bytes(4 * n))
+        lons = array("i", bytes(4 * n))
+        for i in range(n):
+            _, lat, lon = places[i]
+            lats[i] = int(round(lat * SCALE))
+            lons[i] = int(round(lon * SCALE))
+        if n:
+            self.lat0, lat1 = min(lats), max(lats)
+            self.lon0, lon1 = min(lons), max(lons)
+        else:
+            self.lat0 = lat1 = self.lon0 = lon1 = 0
+        # x distances are scaled so grid cells are square on the ground
+        self.kx = math.cos(math.radians((self.lat0 + lat1) / 2 / SCALE))
+        w = (lon1 - self.lon0) * self.kx + 1
+        h = lat1 - self.lat0 + 1
+        self.cell = math.sqrt(w * h * per_cell / max(n, 1))
+        self.cols = int(w / self.cell) + 1
+        self.rows = int(h / self.cell) + 1
+        self._cell_lon = self.cell / self.kx
+
+        # Counting sort of the places into cell order
+        cells = self.cols * self.rows
+        typecode = "H" if n < 0x10000 else "I"
+        start = array(typecode, bytes((cells + 1) * (2 if typecode == "H" else 4)))
+        which = array("I", bytes(4 * n))
+        for i in range(n):
+            c = self._cell(lats[i], lons[i])
+            which[i] = c
+            start[c + 1] += 1
+        for c in range(cells):
+            start[c + 1] += start[c]
+        fill = array(typecode, start)
+        self._slots = array("i", bytes(12 * n))  # lat, lon, index per slot
+        for i in range(n):
+            k = fill[which[i]]
+            fill[which[i]] = k + 1
+            self._slots[3 * k] = lats[i]
+            self._slots[3 * k + 1] = lons[i]
+            self._slots[3 * k + 2] = i
+        self._start = start
+        self.count = n
+
+        self._dots = None
+        if project is not None:
+            self._dots = array("H", bytes(4 * n))
+            for k in range(n):
+                x, y = project(
+                    self._slots[3 * k] / SCALE, self._slots[3 * k + 1] / SCALE
+                )
+                self._dots[2 * k] = x
+                self._dots[2 * k + 1] = y
+
+    def __len__(self):
+        return self.count
+
+    def save(self, f):
+        """Write the grid section FlashGrid reads to the binary file f."""
+        start = self._start
+        cells = self.cols * self.rows
+        most = max((start[c + 1] - start[c] for c in range(cells)), default=0)
+        f.write(
+            struct.pack(
+                _GRID_HEADER,
+                GRID_MAGIC,
+                self.count,
+                self.cols,
+                self.rows,
+                self.lat0,
+                self.lon0,
+                self.cell,
+                self.kx,
+                most,
+            )
+        )
+        f.write(struct.pack("<{}I".format(cells + 1), *start))
+        f.write(struct.pack("<{}i".format(3 * self.count), *self._slots))
+
+    def _span(self, c):
+        """(first, end, slots, base) of cell c: slot k is at slots[3 * (k - base)]."""
+        return self._start[c], self._start[c + 1], self._slots, 0
+
+    def _slot(self, k):
+        """(lat, lon, index) of grid slot k, lat/lon in fixed point."""
+        s = self._slots
+        return s[3 * k], s[3 * k + 1], s[3 * k + 2]
+
+    def _col_row(self, lat, lon):
+        col = int((lon - self.lon0) / self._cell_lon)
+        row = int((lat - self.lat0) / self.cell)
+        col = 0 if col < 0 else self.cols - 1 if col >= self.cols else col
+        row = 0 if row < 0 else self.rows - 1 if row >= self.rows else row
+        return col, row
+
+    def _cell(self, lat, lon):
+        col, row = self._col_row(lat, lon)
+        return row * self.cols + col
+
+    def nearest(self, lat, lon, max_km=None):
+        """Grid slot of the place nearest (lat, lon), or -1 (none within max_km)."""
+        if not self.count:
+            return -1
+        qlat = lat * SCALE
+        qlon = lon * SCALE
+        col, row = self._col_row(qlat, qlon)
+        kx = self.kx
+        cols, rows = self.cols, self.rows
+        limit = None if max_km is None else (max_km / KM_PER_DEG * SCALE) ** 2
+        best, best_d = -1, limit if limit is not None else float("inf")
+        ring = 0
+        while True:
+            r0, r1 = row - ring, row + ring
+            for r in range(max(r0, 0), min(r1, rows - 1) + 1):
+                edge = r == r0 or r == r1
+                c_step = 1 if edge else 2 * ring  # only the ring's two sides
+                c = col - ring
+                while c <= col + ring:
+                    if 0 <= c < cols:
+                        first, end, slots, base = self._span(r * cols + c)
+                        for k in range(first, end):
+                            j = 3 * (k - base)
+                            dy = slots[j] - qlat
+                            dx = (slots[j + 1] - qlon) * kx
+                            d = dx * dx + dy * dy
+                            if d < best_d:
+                                best, best_d = k, d
+                    c += c_step
+            # Every cell further out is at least ring * cell away
+            bound = ring * self.cell
+            if bound * bound >= best_d or (ring > cols and ring > rows):
+                return best
+            ring += 1
+
+    def place(self, k):
+        """(name, lat, lon) of grid slot k from the source sequence."""
+        return self.places[self._slot(k)[2]]
+
+    def index(self, k):
+        """Index into the source sequence of grid slot k."""
+        return self._slot(k)[2]
+
+    def dot(self, k):
+        """Precomputed (x, y) map dot of grid slot k (needs project)."""
+        return self._dots[2 * k], self._dots[2 * k + 1]
+
+    def km(self, k, lat, lon):
+        """Distance in km from (lat, lon) to grid slot k."""
+        plat, plon, _ = self._slot(k)
+        dy = plat / SCALE - lat
+        dx = (plon / SCALE - lon) * self.kx
+        return math.sqrt(dx * dx + dy * dy) * KM_PER_DEG
+
+
+class FlashGrid(CityGrid):
+    """CityGrid read from a save()d section of the open binary file f.
+
+    Only the header, a start pair and one cell's slots are held in RAM;
+    each cell a lookup visits costs two small reads. Dots are projected
+    on demand. Raises ValueError if there is no grid at offset.
+    """
+
+    def __init__(self, f, offset, places=None, project=None):
+        f.seek(offset)
+        head = f.read(GRID_HEADER_SIZE)
+        if len(head) < GRID_HEADER_SIZE or head[:4] != GRID_MAGIC:
+            raise ValueError("no city grid")
+        (
+            _,
+            self.count,
+            self.cols,
+            self.rows,
+            self.lat0,
+            self.lon0,
+            self.cell,
+            self.kx,
+            most,
+        ) = struct.unpack(_GRID_HEADER, head)
+        self._cell_lon = self.cell / self.kx
+        self.places = places
+        self._project = project
+        self._f = f
+        self._start_at = offset + GRID_HEADER_SIZE
+        self._slots_at = self._start_at + 4 * (self.cols * self.rows + 1)
+        # Little-endian file read straight into native arrays (as on the Pico)
+        self._pair = array("I", bytes(8))
+        self._buf = array("i", bytes(12 * max(most, 1)))
+        self._buf_mv = memoryview(self._buf)
+
+    def _span(self, c):
+        self._f.seek(self._start_at + 4 * c)
+        self._f.readinto(self._pair)
+        first, end = self._pair[0], self._pair[1]
+        if end > first:
+            self._f.seek(self._slots_at + 12 * first)
+            self._f.readinto(self._buf_mv[: 3 * (end - first)])
+        return first, end, self._buf, first
+
+    def _slot(self, k):
+        self._f.seek(self._slots_at + 12 * k)
+        self._f.readinto(self._buf_mv[:3])
+        b = self._buf
+        return b[0], b[1], b[2]
+
+    def dot(self, k):
+        """(x, y) map dot of grid slot k (needs project)."""
+        lat, lon, _ = self._slot(k)
+        return self._project(lat / SCALE, lon / SCALE)
@@ -0,0 +1,164 @@
+"""
+Fetch worker on the RP2040's second core.
+
+_thread.start_new_thread() runs a function on core 1. The Worker owns
+Wi-Fi and the HTTP client there: each refresh period (or at once for a
+slot the UI asks for) it joins, fetches a record per slot, powers the
+radio down and posts the records to a Mailbox. The UI loop on core 0
+takes whatever has arrived each time it polls the buttons, so a slow
+join or fetch never holds up a press or draw_cache.
+
+    mailbox = Mailbox(len(PRESET_CITIES))
+    Worker(mailbox, fetch_record, connect_wifi, radio_off, 600).start()
+    ...
+    for idx, record in mailbox.take():  # core 0: never waits for a fetch
+        ...
+
+The mailbox carries the records between the cores. Its lock is held for
+a few assignments at a time, never across a fetch. perf and the
+scheduler, which fetches on core 1 also update, keep locks of their own.
+"""
+
+import _thread
+import time
+
+POLL_S = 0.1  # worker's idle poll
+
+
+class Mailbox:
+    """Records by slot from the worker, fetch requests from the UI."""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.lock = _thread.allocate_lock()
+        self._records = [None] * slots
+        self._posted = 0  # bitmask: slots posted and not taken yet
+        self._wanted = 0  # bitmask: slots the UI asked for
+        self.cycles = 0  # complete refresh cycles
+        self.last_refresh = 0  # clock() at the start of the last cycle
+        self.retry_ms = 0  # Wi-Fi backoff after a failed join (0 = joined)
+
+    def post(self, idx, record):
+        """Worker: publish slot idx's record (None: its fetch failed)."""
+        with self.lock:
+            self._records[idx] = record
+            self._posted |= 1 << idx
+
+    def take(self):
+        """UI: [(idx, record)] posted since the last take, latest per slot."""
+        if not self._posted:  # unlocked peek: a post now shows next poll
+            return ()
+        out = []
+        with self.lock:
+            posted, self._posted = self._posted, 0
+            for idx in range(self.slots):
+                if posted >> idx & 1:
+                    out.append((idx, self._records[idx]))
+                    self._records[idx] = None
+        return out
+
+    def ask(self, mask):
+        """Fetch the slots in bitmask `mask` at the worker's next poll."""
+        with self.lock:
+            self._wanted |= mask
+
+    def wanted(self):
+        """Worker: take the bitmask of slots asked for."""
+        with self.lock:
+            mask, self._wanted = self._wanted, 0
+        return mask
+
+    def cycle_done(self, started):
+        with self.lock:
+            self.cycles += 1
+            self.last_refresh = started
+
+
+class Worker:
+    """Fetches every slot each period_s, and asked-for slots at once.
+
+    fetch(idx) returns a slot's record (or raises); connect() joins Wi-Fi
+    and returns False while it is down or backing off; disconnect()
+    closes the connection and powers the radio down. A schedule (with
+    due(now) and refreshed(now), e.g. scheduler.Scheduler) replaces the
+    fixed period.
+    """
+
+    def __init__(
+        self,
+        mailbox,
+        fetch,
+        connect,
+        disconnect,
+        period_s,
+        retry_in_ms=None,
+        clock=time.time,
+        sleep=time.sleep,
+        schedule=None,
+    ):
+        self.mailbox = mailbox
+        self.fetch = fetch
+        self.connect = connect
+        self.disconnect = disconnect
+        self.period_s = period_s
+        self.retry_in_ms = retry_in_ms
+        self.clock = clock
+        self.sleep = sleep
+        self.schedule = schedule
+        self.next_refresh = 0  # the first cycle is due at once
+        self.running = False
+        self.errors = 0
+
+    def step(self):
+        """One poll: fetch whatever is due; True if it fetched."""
+        mb = self.mailbox
+        now = self.clock()
+        mask = mb.wanted()
+        if self.schedule is not None:
+            due = self.schedule.due(now)
+        else:
+            due = now >= self.next_refresh
+        if due:
+            mask = (1 << mb.slots) - 1
+        if not mask:
+            return False
+        if not self.connect():
+            self.disconnect()  # radio off through the backoff
+            mb.retry_ms = self.retry_in_ms() if self.retry_in_ms else 1000
+            if not due:
+                mb.ask(mask)  # still wanted once Wi-Fi is back
+            return False
+        mb.retry_ms = 0
+        try:
+            for idx in range(mb.slots):
+                if mask >> idx & 1:
+                    try:
+                        record = self.fetch(idx)
+                    except Exception:
+                        record = None
+                    mb.post(idx, record)
+        finally:
+            self.disconnect()
+        if due:
+            if self.schedule is not None:
+                self.schedule.refreshed(now)
+            self.next_refresh = now + self.period_s
+            mb.cycle_done(now)
+        return True
+
+    def run(self):
+        """Poll until stop(); an error ends a step, never the thread."""
+        while self.running:
+            try:
+                if self.step():
+                    continue
+            except Exception:
+                self.errors += 1
+            self.sleep(POLL_S)
+
+    def start(self):
+        self.running = True
+        _thread.start_new_thread(self.run, ())
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Generate city_dots.py: the map dot of every known city, projected at
+build time with map_proj.project() so the Pico never projects them.
+
+  python3 pico_weather/gen_city_dots.py [uk_towns.csv] [city_dots.py]
+
+Run it after editing uk_towns.csv; test_map_proj.py fails while the
+checked-in table is stale.
+"""
+
+import os
+import sys
+
+from city_db import read_csv
+from map_proj import project
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOWNS_CSV = os.path.join(HERE, "uk_towns.csv")
+OUT = os.path.join(HERE, "city_dots.py")
+
+
+def generate(rows):
+    """Source of city_dots.py for (name, lat, lon) rows."""
+    dots = {}
+    for name, lat, lon in rows:
+        dots[name] = project(lat, lon)
+    names = sorted(dots)
+    packed = bytes(v for name in names for v in dots[name])
+    lines = [
+        '"""Generated by gen_city_dots.py from uk_towns.csv -- do not edit."""',
+        "",
+        "# Sorted city names; DOTS[2 * i], DOTS[2 * i + 1] is NAMES[i]'s (x, y)",
+        "NAMES = (",
+    ]
+    lines += ['    "{}",'.format(name) for name in names]
+    lines.append(")")
+    lines.append("DOTS = (")
+    for i in range(0, len(packed), 16):
+        chunk = packed[i : i + 16]
+        lines.append('    b"{}"'.format("".join("\\x{:02x}".format(v) for v in chunk)))
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    src = argv[0] if argv else TOWNS_CSV
+    out = argv[1] if len(argv) > 1 else OUT
+    rows = read_csv(src)
+    with open(out, "w") as f:
+        f.write(generate(rows))
+    print(f"{len(rows)} cities -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Headless PicoGraphics for the host — renders pico_main without hardware.
+
+Implements the PicoGraphics subset pico_main uses (pens, clear, pixel,
+rectangle, line, circle, bitmap6/bitmap8 text, jpegdec) into the same
+framebuffer layout as the Inky Pack: 296x128, 1 bit per pixel, row-major,
+MSB first, 37 bytes per row, set bit = white. render_script() runs the
+scripts update_weather.py and weather_display.py send to the Pico.
+
+Shapes and the map are drawn as on the device, but text uses the
+approximate glyphs in headless_fonts.py, not Pimoroni's font data: glyph
+shapes and widths can differ by a pixel or so, so a host frame is a
+faithful preview of the layout, not the device's exact pixels.
+
+Every primitive is turned into a full-frame bit mask (cached by its
+arguments), so a redraw of an unchanged layout is a handful of big-int
+ops per call — thousands of frames per second on a laptop.
+
+  python3 pico_weather/headless.py Cambridge --png cambridge.png
+"""
+
+import io
+import math
+import os
+import struct
+import sys
+import time
+import types
+import zlib
+
+from headless_fonts import FONTS
+
+WIDTH, HEIGHT = 296, 128
+DISPLAY_INKY_PACK = "INKY_PACK"
+PEN_1BIT = 0
+
+_MASK_CACHE_MAX = 4096
+_BAYER4 = (0, 8, 2, 10, 12, 4, 14, 6, 3, 11, 1, 9, 15, 7, 13, 5)
+_PICO_MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pico_main.py")
+
+
+def get_buffer_size(display=DISPLAY_INKY_PACK, pen_type=PEN_1BIT):
+    return WIDTH * HEIGHT // 8
+
+
+def _text_rows(font, text, scale, spacing, wrap):
+    """Lay out text the way PicoGraphics does.
+
+    Returns (width, rows) where rows is a list of (dy, row_bits) with
+    row_bits MSB-first over `width` columns starting at the text origin.
+    """
+    height, glyphs = FONTS[font]
+    if wrap is None or wrap < 0:
+        wrap = 1 << 31
+    placed = []  # (char, col, line_offset)
+    co = lo = 0
+    i, n = 0, len(text)
+    while i < n:
+        nxt = text.find(" ", i + 1)
+        if nxt == -1:
+            nxt = n
+        word_w = 0
+        for ch in text[i:nxt]:
+            g = glyphs.get(ch)
+            word_w += (g[0] * scale if g else 0) + spacing * scale
+        if co != 0 and co + word_w > wrap:
+            co = 0
+            lo += (height + 1) * scale
+        for ch in text[i : min(nxt + 1, n)]:
+            if ch == "\n":
+                lo += (height + 1) * scale
+                co = 0
+                continue
+            g = glyphs.get(ch)
+            if g is None:
+                co += spacing * scale
+                continue
+            placed.append((g, co, lo))
+            co += g[0] * scale + spacing * scale
+        i = nxt + 1
+
+    width = max([co + g[0] * scale for g, co, _ in placed] or [0])
+    rows = {}
+    for (gw, bits), co, lo in placed:
+        sw = gw * scale
+        for cy, b in enumerate(bits):
+            if not b:
+                continue
+            if scale > 1:
+                wide = 0
+                for cx in range(gw):
+                    wide <<= scale
+                    if b >> (gw - 1 - cx) & 1:
+                        wide |= (1 << scale) - 1
+                b = wide
+            shifted = b << (width - co - sw)
+            for k in range(scale):
+                dy = lo + cy * scale + k
+                rows[dy] = rows.get(dy, 0) | shifted
+    return width, sorted(rows.items())
+
+
+class HeadlessGraphics:
+    """CPython stand-in for picographics.PicoGraphics on an Inky Pack."""
+
+    def __init__(self, display=DISPLAY_INKY_PACK, buffer=None, **kwargs):
+        self.width, self.height = WIDTH, HEIGHT
+        self._stride = WIDTH // 8
+        size = self._stride * HEIGHT
+        self.buffer = buffer if buffer is not None else bytearray(size)
+        self._row_ones = (1 << WIDTH) - 1
+        self._pen = 15
+        self._font = "bitmap8"
+        self._masks = {}
+        self.updates = 0
+        self.partials = 0
+        self.calls = 0
+
+    # ── state ─────────────────────────────────────────────────────────────────
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def set_pen(self, pen):
+        self._pen = pen
+
+    def create_pen(self, r, g, b):
+        return ((r + g + b) // 3) >> 4
+
+    def set_font(self, font):
+        if font not in FONTS:
+            raise ValueError("unsupported font: {}".format(font))
+        self._font = font
+
+    def set_update_speed(self, speed):
+        pass
+
+    def update(self):
+        self.updates += 1
+
+    def partial_update(self, x, y, w, h):
+        # The Inky Pack's UC8151 takes whole 8-row bands
+        if y % 8 or h % 8 or h <= 0 or y + h > self.height:
+            raise ValueError("partial_update needs 8-row bands")
+        self.partials += 1
+
+    # ── framebuffer ───────────────────────────────────────────────────────────
+
+    def _apply(self, mask):
+        start, end, m = mask
+        if not m:
+            return
+        buf = self.buffer
+        v = int.from_bytes(buf[start:end], "big")
+        if self._pen >= 8:
+            v |= m
+        else:
+            v &= ~m
+        buf[start:end] = v.to_bytes(end - start, "big")
+
+    def _cached(self, key, build):
+        m = self._masks.get(key)
+        if m is None:
+            if len(self._masks) >= _MASK_CACHE_MAX:
+                self._masks.clear()
+            m = self._masks[key] = build()
+        self.calls += 1
+        self._apply(m)
+
+    def _frame_mask(self, rows):
+        """Build (start, end, bits) covering only the rows touched.
+
+        rows: iterable of (y, row_bits) with row_bits MSB-first at x=0.
+        """
+        h, ones = self.height, self._row_ones
+        rows = [(y, bits & ones) for y, bits in rows if 0 <= y < h and bits & ones]
+        if not rows:
+            return 0, 0, 0
+        y0 = min(y for y, _ in rows)
+        y1 = max(y for y, _ in rows)
+        m = 0
+        for y, bits in rows:
+            m |= bits << (self.width * (y1 - y))
+        return y0 * self._stride, (y1 + 1) * self._stride, m
+
+    def _span_bits(self, x, length):
+        if length <= 0:
+            return 0
+        pos = self.width - x - length
+        run = (1 << length) - 1
+        return run << pos if pos >= 0 else run >> -pos
+
+    def get_pixel(self, x, y):
+        """Return True if (x, y) is white."""
+        byte = self.buffer[y * self._stride + (x >> 3)]
+        return bool(byte >> (7 - (x & 7)) & 1)
+
+    # ── primitives ────────────────────────────────────────────────────────────
+
+    def clear(self):
+        self.calls += 1
+        fill = 0xFF if self._pen >= 8 else 0x00
+        self.buffer[:] = bytes((fill,)) * len(self.buffer)
+
+    def pixel(self, x, y):
+        self.pixel_span(x, y, 1)
+
+    def pixel_span(self, x, y, length):
+        self._cached(
+            ("span", x, y, length),
+            lambda: self._frame_mask([(y, self._span_bits(x, length))]),
+        )
+
+    def rectangle(self, x, y, w, h):
+        def build():
+            bits = self._span_bits(x, w)
+            return self._frame_mask((yy, bits) for yy in range(y, y + h))
+
+        self._cached(("rect", x, y, w, h), build)
+
+    def line(self, x1, y1, x2, y2, thickness=1):
+        self._cached(("line", x1, y1, x2, y2), lambda: self._line_mask(x1, y1, x2, y2))
+
+    def _line_mask(self, x1, y1, x2, y2):
+        # Same stepping as PicoGraphics::line: axis-aligned lines exclude the
+        # end point, general lines walk 16.16 fixed point along the long axis.
+        pts = []
+        if y1 == y2:
+            start = min(x1, x2)
+            return self._frame_mask([(y1, self._span_bits(start, max(x1, x2) - start))])
+        if x1 == x2:
+            start = min(y1, y2)
+            pts = [(x1, yy) for yy in range(start, max(y1, y2))]
+        else:
+            dx, dy = x2 - x1, y2 - y1
+            if abs(dx) > abs(dy):
+                s = abs(dx)
+                sx = -1 if dx < 0 else 1
+                sy = int((dy << 16) / s)
+                x, y = x1, y1 << 16
+                for _ in range(s):
+                    pts.append((x, y >> 16))
+                    y += sy
+                    x += sx
+            else:
+                s = abs(dy)
+                sy = -1 if dy < 0 else 1
+                sx = int((dx << 16) / s)
+                y, x = y1, x1 << 16
+                for _ in range(s):
+                    pts.append((x >> 16, y))
+                    y += sy
+                    x += sx
+        rows = {}
+        for x, y in pts:
+            rows[y] = rows.get(y, 0) | self._span_bits(x, 1)
+        return self._frame_mask(rows.items())
+
+    def circle(self, x, y, r):
+        self._cached(("circle", x, y, r), lambda: self._circle_mask(x, y, r))
+
+    def _circle_mask(self, px, py, radius):
+        # Midpoint fill from PicoGraphics::circle.
+        rows = {}
+
+        def span(x, y, length):
+            rows[y] = rows.get(y, 0) | self._span_bits(x, length)
+
+        ox, oy, err = radius, 0, -radius
+        while ox >= oy:
+            last_oy = oy
+            err += oy
+            oy += 1
+            err += oy
+            span(px - ox, py + last_oy, ox * 2 + 1)
+            if last_oy != 0:
+                span(px - ox, py - last_oy, ox * 2 + 1)
+            if err >= 0 and ox != last_oy:
+                span(px - last_oy, py + ox, last_oy * 2 + 1)
+                if ox != 0:
+                    span(px - last_oy, py - ox, last_oy * 2 + 1)
+                err -= ox
+                ox -= 1
+                err -= ox
+        return self._frame_mask(rows.items())
+
+    def text(self, text, x, y, wordwrap=-1, scale=2, angle=0, spacing=1):
+        text, scale = str(text), int(scale)
+        font = self._font
+
+        def build():
+            width, rows = _text_rows(font, text, scale, spacing, wordwrap)
+            shift = self.width - x - width
+            out = []
+            for dy, bits in rows:
+                out.append((y + dy, bits << shift if shift >= 0 else bits >> -shift))
+            return self._frame_mask(out)
+
+        self._cached(("text", font, text, x, y, scale, spacing, wordwrap), build)
+
+    def measure_text(self, text, scale=2, spacing=1):
+        _, glyphs = FONTS[self._font]
+        width = 0
+        for ch in str(text):
+            g = glyphs.get(ch)
+            width += (g[0] * scale if g else 0) + spacing * scale
+        return width - spacing * scale if text else 0
+
+    def blit(self, bits_rows, x, y, w):
+        """Overwrite a w-wide region with rows of MSB-first white bits."""
+        key = ("blit", id(bits_rows), x, y, w)
+        entry = self._masks.get(key)
+        if entry is None:
+            ys = [yy for yy in range(y, y + len(bits_rows)) if 0 <= yy < self.height]
+            area = white = 0
+            shift = self.width - x - w
+            span = self._span_bits(x, w)
+            for yy in ys:
+                b = bits_rows[yy - y]
+                b = b << shift if shift >= 0 else b >> -shift
+                area |= span << (self.width * (ys[-1] - yy))
+                white |= (b & span) << (self.width * (ys[-1] - yy))
+            start = ys[0] * self._stride if ys else 0
+            end = (ys[-1] + 1) * self._stride if ys else 0
+            entry = self._masks[key] = (start, end, area, white, bits_rows)
+        start, end, area, white, _ = entry
+        self.calls += 1
+        buf = self.buffer
+        v = (int.from_bytes(buf[start:end], "big") & ~area) | white
+        buf[start:end] = v.to_bytes(end - start, "big")
+
+
+# ── jpegdec stand-in ──────────────────────────────────────────────────────────
+
+_DECODED = {}
+
+
+def _decode_jpeg(data):
+    """Decode and ordered-dither a JPEG to 1-bit rows (needs Pillow)."""
+    rows = _DECODED.get(data)
+    if rows is not None:
+        return rows
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data)).convert("L")
+    w, h = img.size
+    px = img.tobytes()
+    out = []
+    for yy in range(h):
+        bits = 0
+        base = yy * w
+        for xx in range(w):
+            bits <<= 1
+            if px[base + xx] > _BAYER4[(xx & 3) | ((yy & 3) << 2)] * 16 + 8:
+                bits |= 1
+        out.append(bits)
+    rows = _DECODED[data] = (w, h, tuple(out))
+    return rows
+
+
+class JPEG:
+    """Stand-in for jpegdec.JPEG drawing into a HeadlessGraphics."""
+
+    def __init__(self, graphics):
+        self._g = graphics
+        self._data = None
+
+    def open_RAM(self, data):
+        self._data = bytes(data)
+
+    def open_file(self, path):
+        # Relative paths are on the Pico's filesystem: files copied from here
+        if not os.path.isabs(path) and not os.path.exists(path):
+            path = os.path.join(os.path.dirname(_PICO_MAIN), path)
+        with open(path, "rb") as f:
+            self._data = f.read()
+
+    def get_width(self):
+        return _decode_jpeg(self._data)[0]
+
+    def get_height(self):
+        return _decode_jpeg(self._data)[1]
+
+    def decode(self, x=0, y=0, scale=0, dither=True):
+        w, _, rows = _decode_jpeg(self._data)
+        self._g.blit(rows, x, y, w)
+
+
+# ── image export ──────────────────────────────────────────────────────────────
+
+
+def to_png(buffer, width=WIDTH, height=HEIGHT):
+    """Encode a packed 1-bit framebuffer as a 1-bit greyscale PNG."""
+    stride = width // 8
+
+    def chunk(kind, body):
+        crc = zlib.crc32(kind + body) & 0xFFFFFFFF
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", crc)
+
+    raw = b"".join(
+        b"\x00" + bytes(buffer[r * stride : (r + 1) * stride]) for r in range(height)
+    )
+    ihdr = struct.pack(">IIBBBBB", width, height, 1, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", ihdr)
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def to_pbm(buffer, width=WIDTH, height=HEIGHT):
+    """Encode a framebuffer as binary PBM (P4, where a set bit is black)."""
+    inverted = bytes(b ^ 0xFF for b in buffer)
+    return b"P4\n%d %d\n" % (width, height) + inverted
+
+
+def from_pbm(data):
+    """Decode a binary PBM written by to_pbm back into framebuffer bytes."""
+    magic, dims, body = data.split(b"\n", 2)
+    if magic != b"P4":
+        raise ValueError("not a binary PBM")
+    width, height = (int(v) for v in dims.split())
+    if len(body) != width * height // 8:
+        raise ValueError("truncated PBM")
+    return bytes(b ^ 0xFF for b in body)
+
+
+# ── running pico_main on the host ─────────────────────────────────────────────
+
+
+class _Pin:
+    IN, OUT, PULL_UP, PULL_DOWN = 0, 1, 1, 2
+    IRQ_FALLING, IRQ_RISING = 4, 8
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def value(self, *args):
+        return 1  # pull-up: never pressed
+
+    def irq(self, *args, **kwargs):
+        pass
+
+
+class _WLAN:
+    def __init__(self, *args):
+        pass
+
+    def active(self, *args):
+        return False
+
+    def isconnected(self):
+        return False
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def status(self):
+        return -2  # no AP found
+
+    def scan(self):
+        return []
+
+
+def _offline(*args, **kwargs):
+    raise OSError("no network on host")
+
+
+def host_modules():
+    """MicroPython modules pico_main imports, backed by host stand-ins."""
+    mods = {}
+    pg = mods["picographics"] = types.ModuleType("picographics")
+    pg.PicoGraphics = HeadlessGraphics
+    pg.DISPLAY_INKY_PACK = DISPLAY_INKY_PACK
+    pg.PEN_1BIT = PEN_1BIT
+    pg.get_buffer_size = get_buffer_size
+    jd = mods["jpegdec"] = types.ModuleType("jpegdec")
+    jd.JPEG = JPEG
+    mach = mods["machine"] = types.ModuleType("machine")
+    mach.Pin = _Pin
+    mach.lightsleep = mach.deepsleep = lambda ms=0: time.sleep(ms / 1000)
+    net = mods["network"] = types.ModuleType("network")
+    net.WLAN = _WLAN
+    net.STA_IF = 0
+    http = mods["http_client"] = types.ModuleType("http_client")
+    http.get = _offline
+    http.close = lambda: None
+    # A full CPython collection per draw would dwarf the render itself.
+    hgc = mods["gc"] = types.ModuleType("gc")
+    hgc.collect = lambda: None
+    hgc.mem_free = lambda: 192 * 1024
+    hgc.mem_alloc = lambda: 0
+    return mods
+
+
+def pico_main_source(path=_PICO_MAIN):
+    """pico_main's source up to its MAIN section."""
+    with open(path) as f:
+        src = f.read()
+    cut = src.find("# ===== MAIN =====")
+    return src if cut == -1 else src[:cut]
+
+
+def load_pico_main(display=None, path=_PICO_MAIN, code=None, modules=None):
+    """Exec pico_main up to its MAIN section against host stand-ins.
+
+    code is a precompiled pico_main_source() (skips the compile); modules
+    adds to or overrides the stand-ins. Returns the module namespace with
+    `display` bound to a HeadlessGraphics.
+    """
+    if code is None:
+        code = compile(pico_main_source(path), path, "exec")
+    mods = host_modules()
+    mods.update(modules or {})
+    saved = {}
+    for name, mod in mods.items():
+        saved[name] = sys.modules.get(name)
+        sys.modules[name] = mod
+    try:
+        ns = {"__name__": "pico_main"}
+        exec(code, ns)
+    finally:
+        for name, mod in saved.items():
+            if mod is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = mod
+    ns["display"] = display if display is not None else HeadlessGraphics()
+    ns["_FB"] = ns["display"].buffer
+    return ns
+
+
+def _sample_hourly(hours=48, start="2026-02-22T08:00"):
+    day, hour = start[:11], int(start[11:13])
+    times, temps, rain = [], [], []
+    for k in range(hours):
+        h = hour + k
+        times.append("{}{:02d}:00".format(day, h % 24))
+        temps.append(round(9.0 - 5.0 * math.cos((h % 24 - 3) * math.pi / 12), 1))
+        rain.append(round(max(0.0, 1.6 * math.sin((k - 14) * math.pi / 10)), 1))
+    return {"time": times, "temperature_2m": temps, "precipitation": rain}
+
+
+SAMPLE_FORECAST = {
+    "current_weather": {
+        "temperature": 12.3,
+        "weathercode": 3,
+        "windspeed": 18.0,
+        "winddirection": 250.0,
+        "time": "2026-02-22T08:45",
+    },
+    "daily": {
+        "temperature_2m_max": [14.0, 11.0],
+        "temperature_2m_min": [8.0, 5.0],
+        "weathercode": [3, 61],
+        "precipitation_sum": [0.5, 2.1],
+    },
+    "hourly": _sample_hourly(),
+}
+
+
+def fill_cache(ns, forecast=SAMPLE_FORECAST, location=(52.205, 0.122, "Cambridge")):
+    """Populate ns["weather_cache"] for every preset via the real fetch_weather."""
+    ns["get_weather"] = lambda lat, lon: forecast
+    ns["get_location"] = lambda: location
+    for i in range(len(ns["PRESET_CITIES"])):
+        ns["fetch_weather"](i)
+    return ns["weather_cache"]
+
+
+def render(ns, idx, hourly_page=None):
+    """Draw weather_cache[idx] and return the framebuffer bytes."""
+    ns["_shown"] = None  # draw even if the panel already shows it
+    ns["draw_cache"](ns["weather_cache"][idx], idx, hourly_page)
+    return bytes(ns["display"].buffer)
+
+
+def render_script(script):
+    """Run a generated display script (update_weather.build_script(),
+    weather_display.build_pico_script()) against the stand-ins; returns the
+    framebuffer bytes it leaves on the panel."""
+    shown = []
+
+    class Display(HeadlessGraphics):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            shown.append(self)
+
+    mods = host_modules()
+    mods["picographics"].PicoGraphics = Display
+    pim = mods["pimoroni"] = types.ModuleType("pimoroni")
+    pim.Button = _Pin
+    saved = {name: sys.modules.get(name) for name in mods}
+    sys.modules.update(mods)
+    try:
+        exec(compile(script, "<display script>", "exec"), {"print": lambda *a: None})
+    finally:
+        for name, mod in saved.items():
+            if mod is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = mod
+    return bytes(shown[-1].buffer)
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Render pico_main frames on the host")
+    ap.add_argument("city", nargs="?", default="Auto", help="preset name or Auto")
+    ap.add_argument("--png", default="preview.png", help="output PNG path")
+    ap.add_argument("--hourly", type=int, metavar="PAGE", help="hourly view page")
+    args = ap.parse_args()
+
+    ns = load_pico_main()
+    fill_cache(ns)
+    names = ["Auto"] + [c[0] for c in ns["PRESET_CITIES"][1:]]
+    if args.city not in names:
+        print("Unknown city {!r}; choose from {}".format(args.city, ", ".join(names)))
+        return 1
+    t0 = time.perf_counter()
+    fb = render(ns, names.index(args.city), args.hourly)
+    ms = (time.perf_counter() - t0) * 1000
+    with open(args.png, "wb") as f:
+        f.write(to_png(fb))
+    print("{} -> {} ({:.1f}ms)".format(args.city, args.png, ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Glyph tables for the headless PicoGraphics renderer (host only).
+Hand-drawn approximations of the Pimoroni bitmap fonts, not their data:
+printable ASCII, variable width, bitmap6 is 6px tall and bitmap8 is 8px
+tall, but individual glyphs and advance widths may differ from the
+device's by a pixel. pico_main fits text with measure_text in whatever
+font is active, so fit checks need no margin; only host previews and
+golden pixels differ from the panel's.
+Rows are drawn top to bottom, '#' = ink; missing trailing rows are blank.
+"""
+
+_BITMAP6 = {
+    " ": "... ... ... ... ...",
+    "!": "# # # . #",
+    '"': "#.# #.#",
+    "#": ".#.#. ##### .#.#. ##### .#.#.",
+    "$": ".#### #.#.. .###. ..#.# ####.",
+    "%": "#...# ...#. ..#.. .#... #...#",
+    "&": ".#.. #.#. .#.. #.#. .#.#",
+    "'": "# #",
+    "(": ".# #. #. #. .#",
+    ")": "#. .# .# .# #.",
+    "*": "#.# .#. #.#",
+    "+": "... .#. ### .#. ...",
+    ",": ".. .. .. .# #.",
+    "-": "... ... ### ... ...",
+    ".": ". . . . #",
+    "/": "..# ..# .#. #.. #..",
+    "0": ".##. #..# #..# #..# .##.",
+    "1": ".#. ##. .#. .#. ###",
+    "2": "###. ...# .##. #... ####",
+    "3": "###. ...# .##. ...# ###.",
+    "4": "#..# #..# #### ...# ...#",
+    "5": "#### #... ###. ...# ###.",
+    "6": ".##. #... ###. #..# .##.",
+    "7": "#### ...# ..#. .#.. .#..",
+    "8": ".##. #..# .##. #..# .##.",
+    "9": ".##. #..# .### ...# .##.",
+    ":": ". # . # .",
+    ";": ".. .# .. .# #.",
+    "<": "..# .#. #.. .#. ..#",
+    "=": "... ### ... ### ...",
+    ">": "#.. .#. ..# .#. #..",
+    "?": "###. ...# .##. .... .#..",
+    "@": ".##. #.## #.## #... .##.",
+    "A": ".##. #..# #### #..# #..#",
+    "B": "###. #..# ###. #..# ###.",
+    "C": ".### #... #... #... .###",
+    "D": "###. #..# #..# #..# ###.",
+    "E": "#### #... ###. #... ####",
+    "F": "#### #... ###. #... #...",
+    "G": ".### #... #.## #..# .###",
+    "H": "#..# #..# #### #..# #..#",
+    "I": "### .#. .#. .#. ###",
+    "J": "...# ...# ...# #..# .##.",
+    "K": "#..# #.#. ##.. #.#. #..#",
+    "L": "#... #... #... #... ####",
+    "M": "#...# ##.## #.#.# #...# #...#",
+    "N": "#..# ##.# #.## #..# #..#",
+    "O": ".##. #..# #..# #..# .##.",
+    "P": "###. #..# ###. #... #...",
+    "Q": ".##. #..# #..# #.#. .#.#",
+    "R": "###. #..# ###. #.#. #..#",
+    "S": ".### #... .##. ...# ###.",
+    "T": "### .#. .#. .#. .#.",
+    "U": "#..# #..# #..# #..# .##.",
+    "V": "#...# #...# .#.#. .#.#. ..#..",
+    "W": "#...# #...# #.#.# ##.## #...#",
+    "X": "#..# #..# .##. #..# #..#",
+    "Y": "#.# #.# .#. .#. .#.",
+    "Z": "#### ...# .##. #... ####",
+    "[": "## #. #. #. ##",
+    "\\": "#.. #.. .#. ..# ..#",
+    "]": "## .# .# .# ##",
+    "^": ".#. #.#",
+    "_": ".... .... .... .... ####",
+    "`": "#. .#",
+    "a": ".... .### #..# #..# .###",
+    "b": "#... ###. #..# #..# ###.",
+    "c": "... .## #.. #.. .##",
+    "d": "...# .### #..# #..# .###",
+    "e": ".... .##. #### #... .###",
+    "f": ".## #.. ### #.. #..",
+    "g": ".... .### #..# .### ...# .##.",
+    "h": "#... ###. #..# #..# #..#",
+    "i": "# . # # #",
+    "j": ".# .. .# .# .# #.",
+    "k": "#... #.#. ##.. #.#. #..#",
+    "l": "#. #. #. #. .#",
+    "m": "..... ##.#. #.#.# #.#.# #.#.#",
+    "n": ".... ###. #..# #..# #..#",
+    "o": ".... .##. #..# #..# .##.",
+    "p": ".... ###. #..# ###. #... #...",
+    "q": ".... .### #..# .### ...# ...#",
+    "r": "... #.# ##. #.. #..",
+    "s": ".... .### ##.. ..## ###.",
+    "t": ".#. ### .#. .#. ..#",
+    "u": ".... #..# #..# #..# .###",
+    "v": "... #.# #.# #.# .#.",
+    "w": "..... #...# #.#.# #.#.# .#.#.",
+    "x": ".... #..# .##. .##. #..#",
+    "y": ".... #..# #..# .### ...# .##.",
+    "z": ".... #### ..#. .#.. ####",
+    "{": "..# .#. ##. .#. ..#",
+    "|": "# # # # #",
+    "}": "#.. .#. .## .#. #..",
+    "~": ".... .#.# #.#.",
+}
+
+_BITMAP8 = {
+    " ": "... ... ... ... ... ... ...",
+    "!": "# # # # # . #",
+    '"': "#.# #.# #.#",
+    "#": ".#.#. .#.#. ##### .#.#. ##### .#.#. .#.#.",
+    "$": "..#.. .#### #.#.. .###. ..#.# ####. ..#..",
+    "%": "##... ##..# ...#. ..#.. .#... #..## ...##",
+    "&": ".##.. #..#. #.#.. .#... #.#.# #..#. .##.#",
+    "'": "# # #",
+    "(": "..# .#. #.. #.. #.. .#. ..#",
+    ")": "#.. .#. ..# ..# ..# .#. #..",
+    "*": "..... ..#.. #.#.# .###. #.#.# ..#.. .....",
+    "+": "..... ..#.. ..#.. ##### ..#.. ..#.. .....",
+    ",": ".. .. .. .. .. .# .# #.",
+    "-": "..... ..... ..... ##### ..... ..... .....",
+    ".": ".. .. .. .. .. ## ##",
+    "/": "....# ...#. ...#. ..#.. .#... .#... #....",
+    "0": ".###. #...# #..## #.#.# ##..# #...# .###.",
+    "1": "..#.. .##.. ..#.. ..#.. ..#.. ..#.. .###.",
+    "2": ".###. #...# ....# ...#. ..#.. .#... #####",
+    "3": "##### ...#. ..#.. ...#. ....# #...# .###.",
+    "4": "...#. ..##. .#.#. #..#. ##### ...#. ...#.",
+    "5": "##### #.... ####. ....# ....# #...# .###.",
+    "6": "..##. .#... #.... ####. #...# #...# .###.",
+    "7": "##### ....# ...#. ..#.. .#... .#... .#...",
+    "8": ".###. #...# #...# .###. #...# #...# .###.",
+    "9": ".###. #...# #...# .#### ....# ...#. .##..",
+    ":": ".. ## ## .. ## ## ..",
+    ";": ".. ## ## .. ## .# #.",
+    "<": "...# ..#. .#.. #... .#.. ..#. ...#",
+    "=": "..... ..... ##### ..... ##### ..... .....",
+    ">": "#... .#.. ..#. ...# ..#. .#.. #...",
+    "?": ".###. #...# ....# ...#. ..#.. ..... ..#..",
+    "@": ".###. #...# ....# .##.# #.#.# #.#.# .###.",
+    "A": ".###. #...# #...# #...# ##### #...# #...#",
+    "B": "####. #...# #...# ####. #...# #...# ####.",
+    "C": ".###. #...# #.... #.... #.... #...# .###.",
+    "D": "###.. #..#. #...# #...# #...# #..#. ###..",
+    "E": "##### #.... #.... ####. #.... #.... #####",
+    "F": "##### #.... #.... ####. #.... #.... #....",
+    "G": ".###. #...# #.... #.### #...# #...# .####",
+    "H": "#...# #...# #...# ##### #...# #...# #...#",
+    "I": "### .#. .#. .#. .#. .#. ###",
+    "J": "..### ...#. ...#. ...#. ...#. #..#. .##..",
+    "K": "#...# #..#. #.#.. ##... #.#.. #..#. #...#",
+    "L": "#.... #.... #.... #.... #.... #.... #####",
+    "M": "#...# ##.## #.#.# #.#.# #...# #...# #...#",
+    "N": "#...# #...# ##..# #.#.# #..## #...# #...#",
+    "O": ".###. #...# #...# #...# #...# #...# .###.",
+    "P": "####. #...# #...# ####. #.... #.... #....",
+    "Q": ".###. #...# #...# #...# #.#.# #..#. .##.#",
+    "R": "####. #...# #...# ####. #.#.. #..#. #...#",
+    "S": ".#### #.... #.... .###. ....# ....# ####.",
+    "T": "##### ..#.. ..#.. ..#.. ..#.. ..#.. ..#..",
+    "U": "#...# #...# #...# #...# #...# #...# .###.",
+    "V": "#...# #...# #...# #...# #...# .#.#. ..#..",
+    "W": "#...# #...# #...# #.#.# #.#.# #.#.# .#.#.",
+    "X": "#...# #...# .#.#. ..#.. .#.#. #...# #...#",
+    "Y": "#...# #...# #...# .#.#. ..#.. ..#.. ..#..",
+    "Z": "##### ....# ...#. ..#.. .#... #.... #####",
+    "[": "### #.. #.. #.. #.. #.. ###",
+    "\\": "#.... .#... .#... ..#.. ...#. ...#. ....#",
+    "]": "### ..# ..# ..# ..# ..# ###",
+    "^": "..#.. .#.#. #...#",
+    "_": "..... ..... ..... ..... ..... ..... ..... #####",
+    "`": "#. .#",
+    "a": "..... ..... .###. ....# .#### #...# .####",
+    "b": "#.... #.... #.##. ##..# #...# #...# ####.",
+    "c": "..... ..... .###. #.... #.... #...# .###.",
+    "d": "....# ....# .##.# #..## #...# #...# .####",
+    "e": "..... ..... .###. #...# ##### #.... .###.",
+    "f": "..##. .#..# .#... ###.. .#... .#... .#...",
+    "g": "..... ..... .#### #...# #...# .#### ....# .###.",
+    "h": "#.... #.... #.##. ##..# #...# #...# #...#",
+    "i": ".#. ... ##. .#. .#. .#. ###",
+    "j": "...# .... ..## ...# ...# #..# .##.",
+    "k": "#... #... #..# #.#. ##.. #.#. #..#",
+    "l": "##. .#. .#. .#. .#. .#. ###",
+    "m": "..... ..... ##.#. #.#.# #.#.# #...# #...#",
+    "n": "..... ..... #.##. ##..# #...# #...# #...#",
+    "o": "..... ..... .###. #...# #...# #...# .###.",
+    "p": "..... ..... ####. #...# #...# ####. #.... #....",
+    "q": "..... ..... .##.# #..## #...# .#### ....# ....#",
+    "r": "..... ..... #.##. ##..# #.... #.... #....",
+    "s": "..... ..... .###. #.... .###. ....# ####.",
+    "t": ".#... .#... ###.. .#... .#... .#..# ..##.",
+    "u": "..... ..... #...# #...# #...# #..## .##.#",
+    "v": "..... ..... #...# #...# #...# .#.#. ..#..",
+    "w": "..... ..... #...# #...# #.#.# #.#.# .#.#.",
+    "x": "..... ..... #...# .#.#. ..#.. .#.#. #...#",
+    "y": "..... ..... #...# #...# #...# .#### ....# .###.",
+    "z": "..... ..... ##### ...#. ..#.. .#... #####",
+    "{": "..# .#. .#. #.. .#. .#. ..#",
+    "|": "# # # # # # #",
+    "}": "#.. .#. .#. ..# .#. .#. #..",
+    "~": "..... ..... .#... #.#.# ...#.",
+}
+
+
+def _compile(glyphs, height):
+    """Turn ASCII-art glyphs into {char: (width, (row_bits, ...))}.
+
+    Row bits are MSB-first: the leftmost column is bit (width - 1).
+    """
+    font = {}
+    for ch, art in glyphs.items():
+        rows = art.split(" ")
+        width = len(rows[0])
+        bits = []
+        for r in range(height):
+            row = rows[r] if r < len(rows) else "." * width
+            bits.append(int(row.replace("#", "1").replace(".", "0"), 2))
+        font[ch] = (width, tuple(bits))
+    return font
+
+
+FONTS = {
+    "bitmap6": (6, _compile(_BITMAP6, 6)),
+    "bitmap8": (8, _compile(_BITMAP8, 8)),
+}
@@ -0,0 +1,143 @@
+"""
+Hourly forecast storage and sparkline view for pico_main.
+
+Each city keeps one preallocated ring of HOURS samples: temperature in
+whole degrees C as array('b') and precipitation in 0.1mm units as
+array('H'). Refreshes overwrite the ring in place, so ten cities of
+48-hour data cost a fixed few hundred bytes of payload on the device
+instead of lists of boxed floats (see HOURLY_BUDGET_BYTES).
+"""
+
+from array import array
+
+HOURS = 48  # forecast_hours requested from Open-Meteo
+PAGE_HOURS = 12  # hours per sparkline page
+PAGES = HOURS // PAGE_HOURS
+NO_RAIN = 0xFFFF  # precipitation missing
+
+# CPython tracemalloc of ten filled rings (see test_hourly.py). MicroPython
+# object headers are smaller, so the device footprint sits well below this.
+HOURLY_BUDGET_BYTES = 4096
+
+BLACK = 0
+
+
+class HourlyRing:
+    """Fixed-capacity ring of (temp C, rain 0.1mm) samples, oldest first."""
+
+    __slots__ = ("temps", "rain", "head", "count", "start_hour")
+
+    def __init__(self, size=HOURS):
+        self.temps = array("b", bytes(size))
+        self.rain = array("H", bytes(2 * size))
+        self.head = 0  # index of the oldest sample
+        self.count = 0
+        self.start_hour = 0  # hour of day (0-23) of the oldest sample
+
+    def __len__(self):
+        return self.count
+
+    def clear(self, start_hour=0):
+        self.head = 0
+        self.count = 0
+        self.start_hour = start_hour
+
+    def push(self, temp, rain_mm):
+        """Append one hour, dropping the oldest sample when full."""
+        size = len(self.temps)
+        t = -128 if temp < -128 else 127 if temp > 127 else int(round(temp))
+        if rain_mm is None:
+            r = NO_RAIN
+        else:
+            r = int(rain_mm * 10 + 0.5)
+            r = 0 if r < 0 else NO_RAIN - 1 if r >= NO_RAIN else r
+        if self.count < size:
+            i = (self.head + self.count) % size
+            self.count += 1
+        else:
+            i = self.head
+            self.head = (self.head + 1) % size
+            self.start_hour = (self.start_hour + 1) % 24
+        self.temps[i] = t
+        self.rain[i] = r
+
+    def load(self, first_time, temps, rains):
+        """Replace contents from Open-Meteo hourly arrays (no reallocation)."""
+        try:
+            start = int(first_time[11:13])
+        except (TypeError, ValueError):
+            start = 0
+        self.clear(start)
+        n = min(len(temps), len(self.temps))
+        for k in range(n):
+            t = temps[k]
+            if t is None:
+                t = self.temps[(self.head + k - 1) % len(self.temps)] if k else 0
+            self.push(t, rains[k] if k < len(rains) else None)
+
+    def temp(self, k):
+        return self.temps[(self.head + k) % len(self.temps)]
+
+    def rain_tenths(self, k):
+        return self.rain[(self.head + k) % len(self.rain)]
+
+    def hour(self, k):
+        return (self.start_hour + k) % 24
+
+
+def draw_hourly(display, ring, page, x=4, y=16, w=140, h=110):
+    """Draw one PAGE_HOURS window of ring as a sparkline + rain bars.
+
+    Occupies the left panel (x..x+w, y..y+h) below the header bar.
+    """
+    display.set_pen(BLACK)
+    display.set_font("bitmap6")
+    first = page * PAGE_HOURS
+    n = min(PAGE_HOURS, ring.count - first)
+    display.text("Hourly {}/{}".format(page + 1, PAGES), x, y + 1, scale=1)
+    if n <= 0:
+        display.text("No data", x, y + 20, scale=1)
+        return
+
+    lo = hi = ring.temp(first)
+    rain_hi = 0
+    for k in range(first, first + n):
+        t = ring.temp(k)
+        lo = t if t < lo else lo
+        hi = t if t > hi else hi
+        r = ring.rain_tenths(k)
+        if r != NO_RAIN and r > rain_hi:
+            rain_hi = r
+    display.text("{}..{}C".format(lo, hi), x + 70, y + 1, scale=1)
+
+    # Temperature sparkline
+    cy0, ch = y + 14, 38
+    step = w // PAGE_HOURS
+    span = (hi - lo) or 1
+    px = py = None
+    for i in range(n):
+        t = ring.temp(first + i)
+        sx = x + i * step + step // 2
+        sy = cy0 + ch - 1 - (t - lo) * (ch - 1) // span
+        if px is not None:
+            display.line(px, py, sx, sy)
+        display.circle(sx, sy, 1)
+        px, py = sx, sy
+
+    # Rain bars (scaled to the page maximum, at least 1mm full scale)
+    by0, bh = cy0 + ch + 10, 24
+    scale = rain_hi if rain_hi > 10 else 10
+    display.line(x, by0 + bh, x + w, by0 + bh)
+    for i in range(n):
+        r = ring.rain_tenths(first + i)
+        if r == NO_RAIN or r == 0:
+            continue
+        bar = r * bh // scale or 1
+        display.rectangle(x + i * step + 2, by0 + bh - bar, step - 3, bar)
+    display.text("Rain max {:.1f}mm".format(rain_hi / 10), x, cy0 + ch + 2, scale=1)
+
+    # Hour ticks
+    for i in (0, n // 2, n - 1):
+        display.text(
+            "{:02d}h".format(ring.hour(first + i)), x + i * step, y + h - 8, scale=1
+        )
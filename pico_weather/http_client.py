@@ -0,0 +1,327 @@
+"""
+Minimal HTTP GET client for the Pico that parses responses in place.
+
+urequests reads the whole body into a bytes object and json() decodes a
+copy of it, so a forecast needs twice its size free in one piece. Here
+the status line, headers and body are read with readinto() straight into
+one preallocated bytearray (the pool) and json() is handed a memoryview
+slice of it. The pool is allocated on the first request and reused by
+every request after it, so fetching the next city allocates nothing for
+the response itself.
+
+Requests are HTTP/1.1 keep-alive: the connection (and its TLS session,
+by far the slowest part of a fetch on the Pico W) stays open for the
+next request to the same host, so a refresh cycle costs one handshake
+with api.open-meteo.com rather than one per city. A connection the
+server has dropped in the meantime is reopened and the request resent.
+close() ends it once the cycle is done.
+
+    r = http_client.get(url, timeout=15)
+    d = r.json()  # r.body is a view into the pool: use it before the next get
+    r.close()
+    ...
+    http_client.close()  # before powering the radio down
+"""
+
+import json
+import socket
+
+try:
+    import ssl
+except ImportError:  # firmware built without TLS
+    ssl = None
+
+BUF_SIZE = 8192  # largest response: status line, headers and body
+_CONTENT_LENGTH = b"content-length:"
+_TRANSFER_ENCODING = b"transfer-encoding:"
+_CONNECTION = b"connection:"
+_RETRY_AFTER = b"retry-after:"
+
+
+def split_url(url):
+    """(tls, host, port, path) of an http:// or https:// URL."""
+    proto, _, host, path = (url + "/").split("/", 3)
+    if proto == "https:":
+        tls, port = True, 443
+    elif proto == "http:":
+        tls, port = False, 80
+    else:
+        raise ValueError("unsupported URL: " + url)
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    return tls, host, port, "/" + path[:-1] if path else "/"
+
+
+def _digits(buf, i, end):
+    """Non-negative integer at buf[i:end] after optional spaces, or -1."""
+    while i < end and buf[i] == 32:
+        i += 1
+    v = -1
+    while i < end and 48 <= buf[i] <= 57:
+        v = (v if v > 0 else 0) * 10 + buf[i] - 48
+        i += 1
+    return v
+
+
+def _header_end(buf, start, n):
+    """Offset just past the blank line ending the headers in buf[:n], or -1.
+
+    A byte loop rather than find(): MicroPython's bytearray has no find and
+    slicing out the head to search it would copy it.
+    """
+    i = start if start > 3 else 3
+    while i < n:
+        if buf[i] == 10 and buf[i - 1] == 13 and buf[i - 2] == 10:
+            return i + 1
+        i += 1
+    return -1
+
+
+def _match(buf, i, end, word):
+    """True if buf[i:end] starts with lowercase `word`, ignoring case."""
+    m = len(word)
+    if i + m > end:
+        return False
+    for j in range(m):
+        c = buf[i + j]
+        if 65 <= c <= 90:
+            c += 32
+        if c != word[j]:
+            return False
+    return True
+
+
+def _header(buf, end, name):
+    """Offset of header `name`'s value (name lowercase, with colon), or -1."""
+    i = 0
+    while i < end:
+        if _match(buf, i, end, name):
+            i += len(name)
+            while i < end and buf[i] == 32:
+                i += 1
+            return i
+        while i < end and buf[i] != 10:  # next line
+            i += 1
+        i += 1
+    return -1
+
+
+def _chunk_size(buf, i, n):
+    """(size, data offset) of the chunk whose size line starts at i.
+
+    The offset is -1 while the size line is still incomplete in buf[:n].
+    """
+    size = 0
+    while i < n:
+        c = buf[i]
+        if 48 <= c <= 57:
+            size = size * 16 + c - 48
+        elif 97 <= c | 32 <= 102:
+            size = size * 16 + (c | 32) - 87
+        else:
+            break
+        i += 1
+    while i < n:  # skip extensions to the end of the line
+        if buf[i] == 10:
+            return size, i + 1
+        i += 1
+    return size, -1
+
+
+def _unchunk(mv, buf, i, n):
+    """Join the chunked body starting at i in place; returns its end."""
+    end = i
+    while True:
+        size, i = _chunk_size(buf, i, n)
+        if size <= 0 or i < 0:
+            return end
+        if i != end:
+            mv[end : end + size] = mv[i : i + size]  # down over the framing
+        end += size
+        i += size + 2
+
+
+def _loads(body):
+    try:
+        return json.loads(body)  # MicroPython parses any buffer in place
+    except TypeError:
+        return json.loads(bytes(body))  # CPython wants bytes or str
+
+
+class Response:
+    """Status and body of the last response; body is a view into the pool."""
+
+    def __init__(self):
+        self.status_code = 0
+        self.retry_after = -1  # seconds, on a 429/503 that says
+        self.body = None
+
+    def json(self):
+        return _loads(self.body)
+
+    def close(self):
+        self.body = None
+
+
+class Client:
+    """GET requests answered into one reused buffer of `size` bytes.
+
+    connects and handshakes count TCP connections and TLS sessions
+    opened, requests the responses read.
+    """
+
+    def __init__(self, size=BUF_SIZE, context=None):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.context = context
+        self.response = Response()
+        self.sock = None
+        self.peer = None  # (tls, host, port) of the open connection
+        self.received = 0
+        self.connects = 0
+        self.handshakes = 0
+        self.requests = 0
+
+    def _tls(self, sock, host):
+        if self.context is None:
+            if not hasattr(ssl, "SSLContext"):  # older firmware
+                return ssl.wrap_socket(sock, server_hostname=host)
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            # No CA bundle on the Pico: unverified, as urequests does
+            if hasattr(ctx, "check_hostname"):
+                ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+            self.context = ctx
+        return self.context.wrap_socket(sock, server_hostname=host)
+
+    def _connect(self, tls, host, port, timeout):
+        addr = socket.getaddrinfo(host, port)[0][-1]
+        sock = socket.socket()
+        try:
+            sock.settimeout(timeout)
+            sock.connect(addr)
+            self.connects += 1
+            if tls:
+                sock = self._tls(sock, host)
+                self.handshakes += 1
+        except Exception:
+            sock.close()
+            raise
+        self.sock = sock
+        self.peer = (tls, host, port)
+
+    def close(self):
+        """Close the kept-alive connection, if any."""
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = self.peer = None
+
+    def get(self, url, timeout=10):
+        """Fetch url; the Response (and its body) is reused by the next get."""
+        tls, host, port, path = split_url(url)
+        request = "GET {} HTTP/1.1\r\nHost: {}\r\nConnection: keep-alive\r\n\r\n"
+        request = request.format(path, host).encode()
+        while True:
+            reused = self.sock is not None and self.peer == (tls, host, port)
+            if not reused:
+                self.close()
+                self._connect(tls, host, port, timeout)
+            self.received = 0
+            try:
+                sock = self.sock
+                if hasattr(sock, "write"):
+                    sock.write(request)
+                else:
+                    sock.sendall(request)
+                return self._read(sock)
+            except Exception:
+                self.close()
+                # A kept-alive connection the server dropped while idle:
+                # nothing came back, so send the request again on a new one
+                if not reused or self.received:
+                    raise
+
+    def _read(self, sock):
+        readinto = getattr(sock, "readinto", None) or sock.recv_into
+        buf, mv, size = self.buf, self.mv, len(self.buf)
+        n, head, want, chunk = 0, -1, -1, -1
+        chunked = False
+        while want < 0 or n < want:
+            if n == size:
+                raise OSError("response larger than {} B".format(size))
+            k = readinto(mv[n:])
+            if not k:
+                break
+            if head < 0:
+                head = _header_end(buf, n - 3, n + k)
+                if head > 0:
+                    i = _header(buf, head, _TRANSFER_ENCODING)
+                    if i >= 0 and _match(buf, i, head, b"chunked"):
+                        chunked, chunk = True, head
+                    else:
+                        i = _header(buf, head, _CONTENT_LENGTH)
+                        length = _digits(buf, i, head) if i >= 0 else -1
+                        if length >= 0:
+                            want = head + length
+            n += k
+            self.received = n
+            while chunk >= 0 and chunk < n:  # walk the chunks read so far
+                length, i = _chunk_size(buf, chunk, n)
+                if i < 0:
+                    break
+                if length == 0:
+                    want, chunk = i + 2, -1  # no trailers
+                else:
+                    chunk = i + length + 2
+            if want > size:
+                raise OSError("response larger than {} B".format(size))
+        if head < 0 or n < 12 or buf[0] != 72:  # "HTTP/1.x nnn"
+            raise OSError("bad HTTP response")
+        if want > n:
+            raise OSError("response truncated")
+        if want < 0:  # body ran to the end of the connection
+            self.close()
+        else:
+            i = _header(buf, head, _CONNECTION)
+            if (i >= 0 and _match(buf, i, head, b"close")) or buf[7] == 48:
+                self.close()  # the server will not take another (or is 1.0)
+        end = _unchunk(mv, buf, head, n) if chunked else n
+        r = self.response
+        r.status_code = _digits(buf, 9, 12)
+        r.retry_after = -1
+        if r.status_code == 429 or r.status_code == 503:
+            i = _header(buf, head, _RETRY_AFTER)
+            if i >= 0:
+                r.retry_after = _digits(buf, i, head)  # (-1 for an HTTP-date)
+        r.body = mv[head:end]
+        self.requests += 1
+        return r
+
+
+_client = None
+
+
+def get(url, timeout=10):
+    """urequests.get() stand-in that answers into the shared pool."""
+    global _client
+    if _client is None:
+        _client = Client()
+    return _client.get(url, timeout)
+
+
+def close():
+    """Close the shared client's connection (end of a refresh cycle)."""
+    if _client is not None:
+        _client.close()
+
+
+def stats():
+    """Connections, TLS handshakes and requests of the shared client."""
+    c = _client
+    if c is None:
+        return {"connects": 0, "handshakes": 0, "requests": 0}
+    return {"connects": c.connects, "handshakes": c.handshakes, "requests": c.requests}
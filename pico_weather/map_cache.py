@@ -0,0 +1,78 @@
+"""
+On-disk cache of rendered /map JPEGs for map_server (host side).
+
+Each map is stored under cache_key(), the SHA-1 of its normalised render
+parameters (see map_server.map_params()), so the same request always
+finds the same file and a changed renderer only needs a new KEY_VERSION:
+
+    cache = MapCache("map_cache")
+    key = cache_key(params)
+    path = cache.get(key)        # file path, or None if not rendered yet
+    cache.put(key, jpeg)
+
+Files go in 256 subdirectories by the key's first byte and are written
+to a temporary name and renamed into place, so a reader never sees half
+a JPEG, even with several pre-generation processes writing at once.
+"""
+
+import hashlib
+import os
+import threading
+
+KEY_VERSION = 1  # bump when the renderer's output changes
+
+
+def cache_key(params):
+    """Hex key for a tuple of normalised render parameters."""
+    text = "{}|{}".format(KEY_VERSION, "|".join(str(p) for p in params))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class MapCache:
+    """A directory of JPEGs named by cache_key()."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + ".jpg")
+
+    def get(self, key):
+        """Path of the cached map for key, or None."""
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def put(self, key, jpeg):
+        """Store jpeg under key (atomic); returns its path."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as f:
+            f.write(jpeg)
+        os.replace(tmp, path)
+        return path
+
+    def prune(self, keep=None):
+        """Delete the maps whose key is not in keep.
+
+        Returns (maps, bytes) before and after, like tile_store.compact().
+        """
+        before = after = (0, 0)
+        for top, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".jpg"):
+                    continue  # a put() in progress
+                path = os.path.join(top, name)
+                size = os.path.getsize(path)
+                before = (before[0] + 1, before[1] + size)
+                if keep is not None and name[:-4] not in keep:
+                    os.remove(path)
+                else:
+                    after = (after[0] + 1, after[1] + size)
+        return before, after
+
+    def __len__(self):
+        n = 0
+        for _, _, files in os.walk(self.root):
+            n += sum(name.endswith(".jpg") for name in files)
+        return n
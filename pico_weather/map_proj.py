@@ -0,0 +1,64 @@
+"""
+Projection of lat/lon onto the Inky map panel, and the city dot table.
+
+The RP2040 has no FPU, so latlon_to_dot() converts its inputs to 1e-4
+degree integers once and does the rest in integer arithmetic. Known
+cities are not projected at all: gen_city_dots.py runs project() (the
+float reference) at build time and writes city_dots.py, a sorted name
+tuple and one packed (x, y) byte pair per city, to freeze into the
+firmware alongside this module.
+"""
+
+try:
+    from city_dots import DOTS, NAMES
+except ImportError:  # not generated yet
+    NAMES, DOTS = (), b""
+
+# Map panel: x=148..295, y=14..127 (148x113px)
+# UK drawn at correct Mercator proportions: 44x101px, offset (52,6) within panel
+MAP_X, MAP_Y = 148, 14
+_X_OFF, _MAP_W = 52, 44
+_Y_OFF, _MAP_H = 6, 101
+_LON_MIN, _LON_MAX = -6.5, 2.1
+_LAT_MIN, _LAT_MAX = 49.8, 60.9
+
+# Fixed point (1e-4 degrees) copies of the bounds for latlon_to_dot()
+E4 = 10000
+_LON_MIN_E4 = int(round(_LON_MIN * E4))
+_LON_SPAN_E4 = int(round((_LON_MAX - _LON_MIN) * E4))
+_LAT_MAX_E4 = int(round(_LAT_MAX * E4))
+_LAT_SPAN_E4 = int(round((_LAT_MAX - _LAT_MIN) * E4))
+_X0, _X1 = MAP_X + _X_OFF, MAP_X + _X_OFF + _MAP_W
+_Y0, _Y1 = MAP_Y + _Y_OFF, MAP_Y + _Y_OFF + _MAP_H
+
+
+def project(lat, lon):
+    """Float reference projection (host/build time)."""
+    x = MAP_X + _X_OFF + int((lon - _LON_MIN) / (_LON_MAX - _LON_MIN) * _MAP_W)
+    y = MAP_Y + _Y_OFF + int((_LAT_MAX - lat) / (_LAT_MAX - _LAT_MIN) * _MAP_H)
+    x = max(_X0, min(_X1, x))
+    y = max(_Y0, min(_Y1, y))
+    return x, y
+
+
+def latlon_to_dot(lat, lon):
+    """Map panel pixel for (lat, lon), clamped to the UK outline's box."""
+    dx = (int(lon * E4) - _LON_MIN_E4) * _MAP_W
+    dy = (_LAT_MAX_E4 - int(lat * E4)) * _MAP_H
+    x = _X0 + (dx // _LON_SPAN_E4 if dx > 0 else 0)
+    y = _Y0 + (dy // _LAT_SPAN_E4 if dy > 0 else 0)
+    return (x if x < _X1 else _X1), (y if y < _Y1 else _Y1)
+
+
+def city_dot(name):
+    """Precomputed (x, y) for a known city name, or None."""
+    lo, hi = 0, len(NAMES)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if NAMES[mid] < name:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo < len(NAMES) and NAMES[lo] == name:
+        return DOTS[2 * lo], DOTS[2 * lo + 1]
+    return None
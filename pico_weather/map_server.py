@@ -3,14 +3,87 @@
 Local map proxy for Pico W
 Draws a UK country outline map with location marker
 GET /map?lat=52.19&lon=0.14&city=Cambridge
+GET /map?lat=52.19&lon=0.14&width=296&height=128&zoom=4[&centre=52.2,0.1]
+GET /metrics  (Prometheus text format)
+
+  python3 map_server.py [serve] [--cache DIR | --store FILE] [--cities CSV]
+                         [--max-maps N]
+  python3 map_server.py pregen [--cities CSV] [--workers N] [--cache DIR | --store FILE]
+  python3 map_server.py compact (--cache DIR | --store FILE) [--cities CSV]
+
+With --cache, maps are kept in a map_cache.MapCache directory and served
+from it with sendfile(); with --store, in one tile_store.TileStore file
+served from mmap. pregen renders a city list into either on every core
+first; compact rewrites a store without dead records, and drops maps
+outside --cities from either.
+
+Clients choose what /map draws, so the server stores a map it had to
+render only if it is one of the --cities maps, or while the cache holds
+fewer than --max-maps; past that, other requests are rendered each time
+until compact makes room.
 """
 import io
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import parse_qs, urlparse
 
+from city_db import read_csv
+from city_grid import CityGrid
+from map_cache import MapCache, cache_key
+from metrics import Counter, Gauge, Histogram, Registry
 from PIL import Image, ImageDraw, ImageFont
+from tile_store import TileStore, compact
 
 PORT = 8765
+TOWNS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uk_towns.csv")
+NEAREST_KM = 25  # label a /map request without city= with a place this close
+COORD_DP = 2  # /map lat/lon are rounded to this (~1 km, under a pixel)
+# /map render parameters are snapped to buckets, so nearby requests share a
+# cached map: sizes to SIZE_STEP px, zoom to a power of two (1 = all of GB)
+# and a zoomed view's centre to 1/CENTRE_STEPS of its span.
+SIZE_STEP = 4
+MIN_SIZE, MAX_SIZE = 32, 640
+MAX_ZOOM = 16
+CENTRE_STEPS = 8
+CACHE_DIR = "map_cache"
+CACHE_MAX = 20000  # maps the server may store on misses, cache included
+PREGEN_CHUNK = 16  # maps per task handed to a pre-generation process
+
+REQUESTS = Counter(
+    "mapserver_requests_total", "HTTP requests by path and status", ("path", "code")
+)
+ERRORS = Counter("mapserver_errors_total", "Failed /map requests by stage", ("stage",))
+IN_FLIGHT = Gauge("mapserver_in_flight_requests", "Requests being handled")
+BYTES_SENT = Counter("mapserver_bytes_sent_total", "Response body bytes", ("path",))
+RENDER_SECONDS = Histogram("mapserver_render_seconds", "make_uk_map drawing time")
+ENCODE_SECONDS = Histogram("mapserver_encode_seconds", "JPEG encoding time")
+CACHE_LOOKUPS = Counter(
+    "mapserver_cache_lookups_total", "Map cache lookups by result", ("result",)
+)
+CACHE_STORES = Counter(
+    "mapserver_cache_stores_total",
+    "Rendered maps stored, or not stored with the cache full",
+    ("result",),
+)
+REQUEST_SECONDS = Histogram(
+    "mapserver_request_seconds", "Time to handle a request", ("path",)
+)
+METRICS = Registry(
+    REQUESTS,
+    ERRORS,
+    IN_FLIGHT,
+    BYTES_SENT,
+    RENDER_SECONDS,
+    ENCODE_SECONDS,
+    CACHE_LOOKUPS,
+    CACHE_STORES,
+    REQUEST_SECONDS,
+)
 
 # Simplified Great Britain outline (lon, lat) clockwise from SW
 GB = [
@@ -74,23 +147,55 @@ LON_MIN, LON_MAX = -6.5, 2.1
 LAT_MIN, LAT_MAX = 49.8, 60.9
 
 
-def coord_to_px(lat, lon, w, h, padding=6):
-    """Convert lat/lon to pixel coordinates on a w×h canvas."""
-    lon_range = LON_MAX - LON_MIN
-    lat_range = LAT_MAX - LAT_MIN
-    x = padding + int((lon - LON_MIN) / lon_range * (w - 2 * padding))
-    y = padding + int((LAT_MAX - lat) / lat_range * (h - 2 * padding))
+PLACES = CityGrid(read_csv(TOWNS_CSV))
+
+
+def nearest_place(lat, lon, max_km=NEAREST_KM):
+    """Name of the known place nearest (lat, lon), or None if none that close."""
+    k = PLACES.nearest(lat, lon, max_km)
+    return PLACES.place(k)[0] if k >= 0 else None
+
+
+def view_bounds(zoom=1, clat=None, clon=None):
+    """(lon_min, lon_max, lat_min, lat_max) shown at zoom around clat, clon."""
+    if zoom <= 1 or clat is None:
+        return LON_MIN, LON_MAX, LAT_MIN, LAT_MAX
+    half_lon = (LON_MAX - LON_MIN) / zoom / 2
+    half_lat = (LAT_MAX - LAT_MIN) / zoom / 2
+    return clon - half_lon, clon + half_lon, clat - half_lat, clat + half_lat
+
+
+def coord_to_px(lat, lon, w, h, padding=6, bounds=None):
+    """Convert lat/lon to pixel coordinates on a w×h canvas showing bounds."""
+    lon_min, lon_max, lat_min, lat_max = bounds or view_bounds()
+    lon_range = lon_max - lon_min
+    lat_range = lat_max - lat_min
+    x = padding + int((lon - lon_min) / lon_range * (w - 2 * padding))
+    y = padding + int((lat_max - lat) / lat_range * (h - 2 * padding))
     return x, y
 
 
-def make_uk_map(lat, lon, city, width=148, height=108):
+def render_uk_map(lat, lon, city, width=148, height=108, zoom=1, clat=None, clon=None):
+    """Draw the map with a marker for city; returns a greyscale PIL image.
+
+    zoom > 1 shows 1/zoom of GB each way around (clat, clon), with the
+    known places in view as dots.
+    """
+    bounds = view_bounds(zoom, clat, clon)
     img = Image.new("L", (width, height), color=255)  # white background
     draw = ImageDraw.Draw(img)
 
     # Draw GB outline
-    points = [coord_to_px(la, lo, width, height) for lo, la in GB]
+    points = [coord_to_px(la, lo, width, height, bounds=bounds) for lo, la in GB]
     draw.polygon(points, outline=0, fill=230)  # light grey fill, black outline
 
+    if zoom > 1:
+        lon_min, lon_max, lat_min, lat_max = bounds
+        for _, plat, plon in PLACES.places:
+            if lat_min <= plat <= lat_max and lon_min <= plon <= lon_max:
+                px, py = coord_to_px(plat, plon, width, height, bounds=bounds)
+                draw.rectangle([px - 1, py - 1, px, py], fill=100)
+
     # Draw some major cities as reference dots
     refs = [
         (51.51, -0.13, "London"),
@@ -99,11 +204,11 @@ def make_uk_map(lat, lon, city, width=148, height=108):
         (53.80, -1.55, "Leeds"),
     ]
     for rlat, rlon, rname in refs:
-        rx, ry = coord_to_px(rlat, rlon, width, height)
+        rx, ry = coord_to_px(rlat, rlon, width, height, bounds=bounds)
         draw.ellipse([rx - 2, ry - 2, rx + 2, ry + 2], fill=100)
 
     # Draw the target city
-    tx, ty = coord_to_px(lat, lon, width, height)
+    tx, ty = coord_to_px(lat, lon, width, height, bounds=bounds)
 
     # Crosshair lines
     draw.line([tx - 8, ty, tx + 8, ty], fill=0, width=1)
@@ -124,41 +229,288 @@ def make_uk_map(lat, lon, city, width=148, height=108):
 
     # Border
     draw.rectangle([0, 0, width - 1, height - 1], outline=0)
+    return img
+
 
+def encode_jpeg(img, quality=75):
     buf = io.BytesIO()
-    img.save(buf, format="JPEG", quality=75)
+    img.save(buf, format="JPEG", quality=quality)
     return buf.getvalue()
 
 
+def make_uk_map(lat, lon, city, width=148, height=108, zoom=1, clat=None, clon=None):
+    return encode_jpeg(render_uk_map(lat, lon, city, width, height, zoom, clat, clon))
+
+
+def _bucket_size(px):
+    px = min(MAX_SIZE, max(MIN_SIZE, int(px)))
+    return (px + SIZE_STEP // 2) // SIZE_STEP * SIZE_STEP
+
+
+def _bucket_zoom(zoom):
+    return 2 ** round(math.log2(min(MAX_ZOOM, max(1, float(zoom)))))
+
+
+def _bucket_centre(zoom, clat, clon):
+    """clat, clon on the zoom's centre grid, kept so the view stays on GB."""
+    half_lon = (LON_MAX - LON_MIN) / zoom / 2
+    half_lat = (LAT_MAX - LAT_MIN) / zoom / 2
+    step_lon = 2 * half_lon / CENTRE_STEPS
+    step_lat = 2 * half_lat / CENTRE_STEPS
+    clon = min(
+        LON_MAX - half_lon, max(LON_MIN + half_lon, round(clon / step_lon) * step_lon)
+    )
+    clat = min(
+        LAT_MAX - half_lat, max(LAT_MIN + half_lat, round(clat / step_lat) * step_lat)
+    )
+    return round(clat, 4), round(clon, 4)
+
+
+def map_params(lat, lon, city, width=148, height=108, zoom=1, centre=None):
+    """Normalised make_uk_map() arguments: requests for the same map agree.
+
+    Sizes, zoom and centre (lat, lon; default the marker) are snapped to
+    their buckets, and the centre dropped at zoom 1.
+    """
+    lat, lon = round(lat, COORD_DP), round(lon, COORD_DP)
+    zoom = _bucket_zoom(zoom)
+    clat = clon = None
+    if zoom > 1:
+        clat, clon = _bucket_centre(zoom, *(centre or (lat, lon)))
+    return (lat, lon, city, _bucket_size(width), _bucket_size(height), zoom, clat, clon)
+
+
+def _pregen_one(params):
+    """(key, JPEG) for one map (in a worker process)."""
+    return cache_key(params), make_uk_map(*params)
+
+
+def pregen(places, cache, workers=None, chunksize=PREGEN_CHUNK):
+    """Render a map for each (name, lat, lon) into cache.
+
+    cache is a MapCache or TileStore. Rendering is spread over workers
+    processes (default: one per core) and this process stores the
+    results. Maps already cached are skipped. Returns the number rendered.
+    """
+    todo = {}
+    for name, lat, lon in places:
+        params = map_params(lat, lon, name)
+        key = cache_key(params)
+        if cache.get(key) is None:
+            todo[key] = params
+    if not todo:
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for key, jpeg in pool.map(_pregen_one, todo.values(), chunksize=chunksize):
+            cache.put(key, jpeg)
+    return len(todo)
+
+
+def place_keys(places):
+    """Cache keys of the default /map for each (name, lat, lon)."""
+    return {cache_key(map_params(lat, lon, name)) for name, lat, lon in places}
+
+
+class StoreBudget:
+    """How many more maps /map misses may add to the cache."""
+
+    def __init__(self, maps):
+        self.left = maps
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Use up one map; False once there are none left."""
+        with self.lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+
+def open_cache(cache_dir=None, store=None):
+    """MapCache for a directory, TileStore for a file, or None."""
+    if store:
+        return TileStore(store)
+    if cache_dir:
+        return MapCache(cache_dir)
+    return None
+
+
 class MapHandler(BaseHTTPRequestHandler):
+    cache = None  # a MapCache or TileStore to serve from and fill, if set
+    keep = frozenset()  # keys always stored on a miss (place_keys(--cities))
+    budget = None  # StoreBudget for any other key (None: store none)
+
+    def store(self, key, jpeg):
+        """Keep a rendered map if it is a --cities map or the budget allows."""
+        if key in self.keep or (self.budget is not None and self.budget.take()):
+            self.cache.put(key, jpeg)
+            CACHE_STORES.inc(result="stored")
+        else:
+            CACHE_STORES.inc(result="full")
+
     def log_message(self, fmt, *args):
         print(f"[map] {args[0]} {args[1]}")
 
+    def send_body(self, code, ctype, body, path):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", len(body))
+        self.end_headers()
+        self.wfile.write(body)
+        BYTES_SENT.inc(len(body), path=path)
+
+    def send_file(self, ctype, path, url_path):
+        """Send the file at path as the body, with sendfile() where possible."""
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", size)
+            self.end_headers()
+            self.wfile.flush()
+            self.connection.sendfile(f)
+        BYTES_SENT.inc(size, path=url_path)
+        return size
+
     def do_GET(self):
+        t0 = time.perf_counter()
+        IN_FLIGHT.inc()
         parsed = urlparse(self.path)
-        if parsed.path == "/map":
-            params = parse_qs(parsed.query)
-            try:
-                lat = float(params["lat"][0])
-                lon = float(params["lon"][0])
-                city = params.get("city", ["Location"])[0]
-                jpeg = make_uk_map(lat, lon, city)
-                self.send_response(200)
-                self.send_header("Content-Type", "image/jpeg")
-                self.send_header("Content-Length", len(jpeg))
-                self.end_headers()
-                self.wfile.write(jpeg)
-                print(f"  {len(jpeg)}B for {city} ({lat:.2f},{lon:.2f})")
-            except Exception as e:
-                print(f"  Error: {e}")
-                self.send_response(500)
+        path = parsed.path if parsed.path in ("/map", "/metrics") else "other"
+        code = 500
+        try:
+            if parsed.path == "/map":
+                code = self.get_map(parse_qs(parsed.query))
+            elif parsed.path == "/metrics":
+                body = METRICS.exposition().encode()
+                code = 200
+                self.send_body(code, "text/plain; version=0.0.4", body, path)
+            else:
+                code = 404
+                self.send_response(code)
                 self.end_headers()
-        else:
-            self.send_response(404)
+        finally:
+            IN_FLIGHT.dec()
+            REQUESTS.inc(path=path, code=code)
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, path=path)
+
+    def get_map(self, params):
+        """Serve /map; returns the status code sent."""
+        stage = "params"
+        try:
+            lat = float(params["lat"][0])
+            lon = float(params["lon"][0])
+            city = params.get("city", [None])[0]
+            city = city or nearest_place(lat, lon) or "Location"
+            centre = params.get("centre", params.get("center", [None]))[0]
+            if centre:
+                centre = tuple(float(v) for v in centre.split(","))
+            params = map_params(
+                lat,
+                lon,
+                city,
+                float(params.get("width", [148])[0]),
+                float(params.get("height", [108])[0]),
+                params.get("zoom", [1])[0],
+                centre,
+            )
+            if self.cache is not None:
+                key = cache_key(params)
+                cached = self.cache.get(key)
+                CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+                if isinstance(cached, str):
+                    stage = "send"
+                    self.send_file("image/jpeg", cached, "/map")
+                    return 200
+                if cached is not None:  # a view of the store's mmap
+                    stage = "send"
+                    self.send_body(200, "image/jpeg", cached, "/map")
+                    return 200
+            lat, lon = params[:2]
+            stage = "render"
+            t0 = time.perf_counter()
+            img = render_uk_map(*params)
+            t1 = time.perf_counter()
+            stage = "encode"
+            jpeg = encode_jpeg(img)
+            t2 = time.perf_counter()
+            RENDER_SECONDS.observe(t1 - t0)
+            ENCODE_SECONDS.observe(t2 - t1)
+            if self.cache is not None:
+                self.store(key, jpeg)
+            stage = "send"
+            self.send_body(200, "image/jpeg", jpeg, "/map")
+            print(
+                f"  {len(jpeg)}B for {city} ({lat:.2f},{lon:.2f})"
+                f" render {(t1 - t0) * 1000:.1f}ms encode {(t2 - t1) * 1000:.1f}ms"
+            )
+            return 200
+        except Exception as e:
+            print(f"  Error ({stage}): {e}")
+            ERRORS.inc(stage=stage)
+            if stage == "send":
+                return 200  # headers already sent
+            self.send_response(500)
             self.end_headers()
+            return 500
 
 
-if __name__ == "__main__":
-    server = HTTPServer(("0.0.0.0", PORT), MapHandler)
-    print(f"Map proxy on :{PORT}")
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="UK map server for the Pico")
+    ap.add_argument(
+        "command", nargs="?", default="serve", choices=("serve", "pregen", "compact")
+    )
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument(
+        "--cache", help="map cache directory (pregen: " + CACHE_DIR + ")"
+    )
+    where.add_argument("--store", help="single-file tile store")
+    ap.add_argument("--cities", help="name,lat,lon CSV (default: uk_towns.csv)")
+    ap.add_argument("--workers", type=int, help="pregen: processes (default: cores)")
+    ap.add_argument(
+        "--max-maps",
+        type=int,
+        default=CACHE_MAX,
+        help="serve: store other maps only while the cache holds fewer",
+    )
+    args = ap.parse_args(argv)
+
+    if args.command == "compact":
+        keep = place_keys(read_csv(args.cities)) if args.cities else None
+        if args.store:
+            (n0, b0), (n1, b1) = compact(args.store, keep)
+        elif args.cache:
+            (n0, b0), (n1, b1) = MapCache(args.cache).prune(keep)
+        else:
+            ap.error("compact needs --cache or --store")
+        where = args.store or args.cache
+        print(f"{where}: {n0} maps, {b0} B -> {n1} maps, {b1} B")
+        return 0
+
+    if args.command == "pregen":
+        cache = open_cache(
+            args.cache or (None if args.store else CACHE_DIR), args.store
+        )
+        places = read_csv(args.cities or TOWNS_CSV)
+        t0 = time.perf_counter()
+        n = pregen(places, cache, args.workers)
+        dt = time.perf_counter() - t0
+        where = args.store or args.cache or CACHE_DIR
+        print(f"Rendered {n} of {len(places)} maps into {where} in {dt:.1f}s")
+        return 0
+
+    cache = MapHandler.cache = open_cache(args.cache, args.store)
+    if cache is not None:
+        MapHandler.keep = place_keys(read_csv(args.cities or TOWNS_CSV))
+        MapHandler.budget = StoreBudget(args.max_maps - len(cache))
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), MapHandler)
+    where = args.store or args.cache
+    print(f"Map proxy on :{PORT}" + (f", cache {where}" if where else ""))
     server.serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Prometheus-style metrics for map_server (host side).
+
+Request threads never take a lock: each observation is appended to a
+collections.deque (atomic under the GIL) and folded into totals when
+/metrics is scraped, or by whichever writer finds more than FOLD_AT
+observations pending and wins a non-blocking try-lock.
+
+    REQUESTS = Counter("mapserver_requests_total", "Requests", ("path", "code"))
+    REQUESTS.inc(path="/map", code="200")
+    print(Registry(REQUESTS).exposition())
+"""
+
+import threading
+from collections import deque
+
+FOLD_AT = 4096  # pending observations before a writer folds them
+
+# Latency buckets in seconds (render/encode run from ~1ms to tens of ms)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _fmt(v):
+    if v == float("inf"):
+        return "+Inf"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return repr(v)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, v) for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._pending = deque()
+        self._fold_lock = threading.Lock()  # only held while folding
+        self._values = {}  # label values tuple -> folded state
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                "{} takes labels {}, got {}".format(
+                    self.name, self.label_names, tuple(labels)
+                )
+            )
+        return tuple(str(labels[k]) for k in self.label_names)
+
+    def _record(self, item):
+        self._pending.append(item)
+        if len(self._pending) > FOLD_AT and self._fold_lock.acquire(False):
+            try:
+                self._drain()
+            finally:
+                self._fold_lock.release()
+
+    def _drain(self):
+        pop = self._pending.popleft
+        while True:
+            try:
+                item = pop()
+            except IndexError:
+                return
+            self._fold(*item)
+
+    def snapshot(self):
+        """Fold pending observations; {label values: state} copy."""
+        with self._fold_lock:
+            self._drain()
+            return {k: self._copy(v) for k, v in self._values.items()}
+
+    def _copy(self, v):
+        return v
+
+    def exposition(self):
+        lines = [
+            "# HELP {} {}".format(self.name, self.help),
+            "# TYPE {} {}".format(self.name, self.kind),
+        ]
+        for key, v in sorted(self.snapshot().items()):
+            lines.extend(self._lines(key, v))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, n=1, **labels):
+        self._record((self._key(labels), n))
+
+    def _fold(self, key, n):
+        self._values[key] = self._values.get(key, 0) + n
+
+    def value(self, **labels):
+        return self.snapshot().get(self._key(labels), 0)
+
+    def _lines(self, key, v):
+        return ["{}{} {}".format(self.name, _labels(self.label_names, key), _fmt(v))]
+
+
+class Gauge(Counter):
+    """Up/down value (e.g. requests in flight)."""
+
+    kind = "gauge"
+
+    def dec(self, n=1, **labels):
+        self.inc(-n, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, v, **labels):
+        self._record((self._key(labels), v))
+
+    def _fold(self, key, v):
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if v <= bound:
+                state[0][i] += 1
+                break
+        state[1] += v
+        state[2] += 1
+
+    def _copy(self, v):
+        return [list(v[0]), v[1], v[2]]
+
+    def _lines(self, key, v):
+        counts, total, n = v
+        out = []
+        acc = 0
+        for bound, c in zip(self.buckets, counts):
+            acc += c
+            out.append(
+                "{}_bucket{} {}".format(
+                    self.name,
+                    _labels(self.label_names, key, [("le", _fmt(bound))]),
+                    acc,
+                )
+            )
+        lab = _labels(self.label_names, key)
+        out.append("{}_sum{} {}".format(self.name, lab, _fmt(total)))
+        out.append("{}_count{} {}".format(self.name, lab, n))
+        return out
+
+
+class Registry:
+    """Ordered set of metrics rendered together for /metrics."""
+
+    def __init__(self, *metrics):
+        self.metrics = list(metrics)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def exposition(self):
+        """Prometheus text format (version 0.0.4)."""
+        lines = []
+        for m in self.metrics:
+            lines.extend(m.exposition())
+        return "\n".join(lines) + "\n"
+
+
+def parse_exposition(text):
+    """{(name, ((label, value), ...)): float} from exposition() output."""
+    out = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        labels = ()
+        if "{" in series:
+            series, rest = series.split("{", 1)
+            labels = tuple(
+                (k, v.strip('"'))
+                for k, v in (p.split("=", 1) for p in rest.rstrip("}").split(","))
+            )
+        out[(series, labels)] = float(value)
+    return out
@@ -0,0 +1,156 @@
+"""
+On-device performance instrumentation for pico_main.
+
+Spans are timed with ticks_us and stored, with a gc.mem_free() snapshot
+taken at the end of each span, in a fixed-size ring (preallocated arrays,
+so recording does not allocate). Counters are a small dict. Everything is
+off until enable(); while disabled start() and stop() return at once.
+
+    t = perf.start()
+    ...
+    perf.stop("wx_http", t)
+
+dump() prints the ring and a per-span summary (over USB serial on the
+Pico); draw_diagnostics() renders the summary on the display.
+
+Spans and counts come from both cores (fetches run on core 1 with
+WORKER), so recording and reading the ring take a lock.
+"""
+
+import _thread
+import gc
+import time
+from array import array
+
+SIZE = 64  # spans kept
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:  # CPython
+
+    def _ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def _ticks_diff(a, b):
+        return a - b
+
+
+_mem_free = getattr(gc, "mem_free", lambda: 0)
+
+enabled = False
+_lock = _thread.allocate_lock()
+_names = [None] * SIZE
+_us = array("i", bytes(4 * SIZE))
+_free = array("i", bytes(4 * SIZE))
+_head = 0  # next slot to write
+_count = 0
+counters = {}
+low_free = -1  # lowest mem_free seen at a span end (-1 = none yet)
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    """Forget recorded spans, counters and the heap low-water mark."""
+    global _head, _count, low_free
+    with _lock:
+        _head = _count = 0
+        low_free = -1
+        counters.clear()
+
+
+def start():
+    """Span start ticks (0 when disabled)."""
+    return _ticks_us() if enabled else 0
+
+
+def stop(name, t0):
+    """Record span `name` begun at t0 = start()."""
+    global _head, _count, low_free
+    if not enabled or not t0:
+        return
+    dt = _ticks_diff(_ticks_us(), t0)
+    free = _mem_free()
+    with _lock:
+        i = _head
+        _names[i] = name
+        _us[i] = dt
+        _free[i] = free
+        _head = (i + 1) % SIZE
+        if _count < SIZE:
+            _count += 1
+        if low_free < 0 or free < low_free:
+            low_free = free
+
+
+def count(name, n=1):
+    """Add n to counter `name` (no-op when disabled)."""
+    if enabled:
+        with _lock:
+            counters[name] = counters.get(name, 0) + n
+
+
+def spans():
+    """Recorded spans as (name, us, mem_free), oldest first."""
+    with _lock:  # a copy, so a span recorded meanwhile cannot tear it
+        first = (_head - _count) % SIZE
+        out = []
+        for k in range(_count):
+            i = (first + k) % SIZE
+            out.append((_names[i], _us[i], _free[i]))
+    return out
+
+
+def summary():
+    """{name: (calls, total_us, max_us)} over the recorded spans."""
+    out = {}
+    for name, us, _ in spans():
+        n, total, worst = out.get(name, (0, 0, 0))
+        out[name] = (n + 1, total + us, us if us > worst else worst)
+    return out
+
+
+def dump(out=print):
+    """Write spans, summary, counters and heap low-water mark line by line."""
+    out("perf: {} spans".format(_count))
+    for name, us, free in spans():
+        out("span {} {}us free={}".format(name, us, free))
+    for name, (n, total, worst) in sorted(summary().items()):
+        out("sum {} n={} avg={}us max={}us".format(name, n, total // n, worst))
+    with _lock:
+        counts = sorted(counters.items())
+    for name, n in counts:
+        out("count {} {}".format(name, n))
+    out("mem low_free={} free={}".format(low_free, _mem_free()))
+
+
+def draw_diagnostics(display, x=4, y=4):
+    """Hidden diagnostics page: one line per span name, then heap."""
+    display.set_pen(15)
+    display.clear()
+    display.set_pen(0)
+    display.set_font("bitmap6")
+    if not enabled:
+        display.text("perf off", x, y, scale=1)
+        return
+    line = 0
+    for name, (n, total, worst) in sorted(summary().items()):
+        display.text(
+            "{:<9}{:>3} {:>7}us {:>7}us".format(name, n, total // n, worst),
+            x,
+            y + line * 9,
+            scale=1,
+        )
+        line += 1
+        if line == 11:
+            break
+    display.text(
+        "low free {}  free {}".format(low_free, _mem_free()),
+        x,
+        y + 12 * 9 + 3,
+        scale=1,
+    )
@@ -0,0 +1,238 @@
+"""
+Weather providers behind one normalised record.
+
+pico_main reads Open-Meteo; update_weather.py and weather_display.py
+read wttr.in. Each provider turns its own JSON into the same record, with
+the condition as a WMO code (wttr.in's codes are mapped onto them), so one
+WMO description table serves all three:
+
+    temp, feels     C (int; feels None if the provider has none)
+    humidity        % (int or None)
+    code, tmr_code  WMO weathercode now and for tomorrow
+    hmax, hmin      today's high / low, C
+    tmax, tmin      tomorrow's high / low, C
+    wind_spd        km/h (int)
+    wind_deg        direction the wind blows from (float)
+    rain_0, rain_1  today's / tomorrow's precipitation, mm (None if unknown)
+    time            local observation time, "YYYY-MM-DDTHH:MM" ("" if unknown)
+    hourly          (first time, temperatures, precipitation) or None
+
+    p = OpenMeteo()
+    record = p.parse(json_from(p.url(lat, lon)))
+
+Nothing here needs more than MicroPython; weather_api.py does the host
+side fetching, with hedged requests across providers.
+"""
+
+from hourly import HOURS
+
+WMO = {
+    0: "Clear",
+    1: "Clear",
+    2: "P.Cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Icy Fog",
+    51: "Drizzle",
+    53: "Drizzle",
+    55: "Drizzle",
+    56: "Fz Drizzle",
+    57: "Fz Drizzle",
+    61: "Lt Rain",
+    63: "Rain",
+    65: "Hvy Rain",
+    66: "Fz Rain",
+    67: "Fz Rain",
+    68: "Sleet",
+    69: "Hvy Sleet",
+    71: "Lt Snow",
+    73: "Snow",
+    75: "Hvy Snow",
+    77: "Ice Pellets",
+    80: "Showers",
+    81: "Showers",
+    82: "Showers",
+    85: "Snow Shwrs",
+    86: "Snow Shwrs",
+    95: "Thunder",
+    96: "Thunder",
+    99: "Thunder",
+}
+
+# wttr.in (WorldWeatherOnline) condition code -> WMO code, as pairs: only
+# the host scripts look these up, so no dict is built on the Pico.
+_WTTR = (
+    (113, 0),  # sunny / clear
+    (116, 2),
+    (119, 3),
+    (122, 3),
+    (143, 45),  # mist
+    (176, 80),  # patchy rain possible
+    (179, 71),
+    (182, 68),
+    (185, 56),
+    (200, 95),
+    (227, 73),  # blowing snow
+    (230, 75),  # blizzard
+    (248, 45),
+    (260, 48),
+    (263, 51),
+    (266, 53),
+    (281, 56),
+    (284, 57),
+    (293, 61),
+    (296, 61),
+    (299, 63),
+    (302, 63),
+    (305, 65),
+    (308, 65),
+    (311, 66),
+    (314, 67),
+    (317, 68),
+    (320, 69),
+    (323, 71),
+    (326, 71),
+    (329, 73),
+    (332, 73),
+    (335, 75),
+    (338, 75),
+    (350, 77),
+    (353, 80),
+    (356, 81),
+    (359, 82),
+    (362, 68),
+    (365, 69),
+    (368, 85),
+    (371, 86),
+    (374, 77),
+    (377, 77),
+    (386, 95),
+    (389, 99),
+    (392, 95),
+    (395, 99),
+)
+
+
+def describe(code):
+    """Short description of WMO code for the panel ("?" if unknown)."""
+    return WMO.get(code, "?")
+
+
+def wttr_to_wmo(code):
+    """WMO code for a wttr.in weatherCode (string or int); -1 if unknown."""
+    code = int(code)
+    for w, m in _WTTR:
+        if w == code:
+            return m
+    return -1
+
+
+def _int(v):
+    return None if v is None else int(round(float(v)))
+
+
+class OpenMeteo:
+    """api.open-meteo.com forecast: current weather, 2 days, HOURS hourly."""
+
+    name = "open-meteo"
+
+    def __init__(self, base="https://api.open-meteo.com", feels=False):
+        self.base = base
+        # Feels-like and humidity cost the Pico bytes it does not show
+        self.feels = feels
+
+    def url(self, lat, lon, place=None):
+        """Request URL for lat/lon (None without coordinates)."""
+        if lat is None:
+            return None
+        return (
+            "{}/v1/forecast"
+            "?latitude={}&longitude={}"
+            "&current_weather=true"
+            "&daily=temperature_2m_max,temperature_2m_min,weathercode,precipitation_sum"
+            "&hourly=temperature_2m,precipitation&forecast_hours={}"
+            "&forecast_days=2&timezone=auto{}"
+        ).format(
+            self.base,
+            lat,
+            lon,
+            HOURS,
+            "&current=apparent_temperature,relative_humidity_2m" if self.feels else "",
+        )
+
+    def parse(self, data):
+        cw = data["current_weather"]
+        daily = data["daily"]
+        cur = data.get("current") or {}
+        rain = daily["precipitation_sum"]
+        hourly = data.get("hourly")
+        if hourly:
+            hourly = (
+                hourly["time"][0],
+                hourly["temperature_2m"],
+                hourly.get("precipitation", ()),
+            )
+        return {
+            "temp": int(cw["temperature"]),
+            "feels": _int(cur.get("apparent_temperature")),
+            "humidity": _int(cur.get("relative_humidity_2m")),
+            "code": int(cw["weathercode"]),
+            "tmr_code": int(daily["weathercode"][1]),
+            "hmax": int(daily["temperature_2m_max"][0]),
+            "hmin": int(daily["temperature_2m_min"][0]),
+            "tmax": int(daily["temperature_2m_max"][1]),
+            "tmin": int(daily["temperature_2m_min"][1]),
+            "wind_spd": int(cw.get("windspeed", 0)),
+            "wind_deg": float(cw.get("winddirection", 0)),
+            "rain_0": rain[0],
+            "rain_1": rain[1],
+            "time": cw.get("time", ""),
+            "hourly": hourly or None,
+        }
+
+
+def _wttr_time(s):
+    """ "2026-02-22 08:14 PM" -> "2026-02-22T20:14" ("" if malformed)."""
+    try:
+        h = int(s[11:13]) % 12 + (12 if s[17:19] == "PM" else 0)
+        return "{}T{:02d}:{}".format(s[:10], h, s[14:16])
+    except (TypeError, ValueError):
+        return ""
+
+
+class Wttr:
+    """wttr.in j1 format: a place name, or lat,lon."""
+
+    name = "wttr.in"
+
+    def __init__(self, base="https://wttr.in"):
+        self.base = base
+
+    def url(self, lat, lon, place=None):
+        where = place.replace(" ", "+") if place else "{},{}".format(lat, lon)
+        return "{}/{}?format=j1".format(self.base, where)
+
+    def parse(self, data):
+        c = data["current_condition"][0]
+        today = data["weather"][0]
+        tmr = data["weather"][1]
+        rain = [
+            sum(float(h["precipMM"]) for h in day["hourly"]) for day in (today, tmr)
+        ]
+        return {
+            "temp": int(c["temp_C"]),
+            "feels": _int(c.get("FeelsLikeC")),
+            "humidity": _int(c.get("humidity")),
+            "code": wttr_to_wmo(c["weatherCode"]),
+            "tmr_code": wttr_to_wmo(tmr["hourly"][4]["weatherCode"]),  # noon
+            "hmax": int(today["maxtempC"]),
+            "hmin": int(today["mintempC"]),
+            "tmax": int(tmr["maxtempC"]),
+            "tmin": int(tmr["mintempC"]),
+            "wind_spd": int(c.get("windspeedKmph", 0)),
+            "wind_deg": float(c.get("winddirDegree", 0)),
+            "rain_0": round(rain[0], 1),
+            "rain_1": round(rain[1], 1),
+            "time": _wttr_time(c.get("localObsDateTime", "")),
+            "hourly": None,  # 3-hourly only
+        }
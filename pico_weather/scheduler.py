@@ -0,0 +1,215 @@
+"""
+Refresh scheduling that keeps a fleet of displays from calling the
+weather APIs in step.
+
+Every device used to refresh exactly REFRESH_S after the last one, so
+a batch powered on together (or back after a power cut) hit Open-Meteo
+and ip-api in lockstep bursts for as long as it ran. Scheduler spreads
+them out and slows them down when upstream pushes back:
+
+  jitter   the boot fetch waits a random 0..BOOT_JITTER_S, the first
+           periodic refresh lands anywhere from half to one and a half
+           periods later and each one after it period +/- SPREAD, so the
+           devices' phases drift apart rather than staying aligned
+  backoff  a 429/503 reply blocks upstream calls for its Retry-After or
+           BACKOFF_S doubling per refusal in a row (up to BACKOFF_MAX_S),
+           whichever is longer, plus jitter; a success resets it
+  budget   a token bucket caps upstream calls per interval, whether they
+           come from a refresh cycle or a one-off fetch
+  adapt    refresh_period() picks the period from the forecast already on
+           the device: REFRESH_FAST_S while the weather is on the move,
+           REFRESH_SLOW_S overnight or when nothing is about to change
+
+    sched = Scheduler(REFRESH_S, now=time.time())
+    if sched.due(now) and refresh_all():
+        sched.refreshed(now)
+    ...
+    if not sched.acquire(now):  # before each API call
+        ...  # skip it: over budget or backing off
+    if r.status_code == 429:
+        sched.throttled(now, r.retry_after)
+
+Times are in seconds from the caller's clock. With WORKER the fetches
+(acquire, throttled, ok) run on core 1 while core 0 plans the period,
+so every method holds the scheduler's lock for its few assignments.
+On the Pico random is seeded from the ring oscillator at boot, so
+devices draw different jitter without any per-device setup.
+"""
+
+import _thread
+import random
+
+from hourly import NO_RAIN
+
+BOOT_JITTER_S = 15  # boot fetch delay, at most
+SPREAD = 0.1  # +/- fraction of the period between refreshes
+BACKOFF_S = 60  # first wait after a 429/503
+BACKOFF_MAX_S = 3600
+# Upstream calls in one go: a full refresh is 1 ip-api call plus one
+# forecast per city, and one spare for a one-off fetch. pico_main passes
+# burst=len(PRESET_CITIES) + 2; this default fits its 10 cities.
+BUCKET_SIZE = 12
+# Refill: 15 tokens per REFRESH_FAST_S (300 s), a full refresh of 11
+# calls plus a few one-off fetches
+BUCKET_PER_S = 30 / 600
+
+REFRESH_FAST_S = 300  # weather changing, or rain within SOON_H
+REFRESH_SLOW_S = 3600  # overnight, or settled
+NIGHT_START, NIGHT_END = 22, 7  # overnight back-off, local hours
+SOON_H = 3  # hours ahead that count as "changing quickly"
+SETTLED_H = 6  # hours ahead that must be quiet to count as settled
+SWING_C = 4  # temperature change within SOON_H that counts as quick
+SETTLED_C = 3  # and the most a settled SETTLED_H may vary
+RAIN_TENTHS = 2  # 0.2mm in an hour counts as precipitation
+
+
+class TokenBucket:
+    """size tokens, refilled at per_s a second; one per upstream call."""
+
+    def __init__(self, size=BUCKET_SIZE, per_s=BUCKET_PER_S, now=0):
+        self.size = size
+        self.per_s = per_s
+        self.tokens = size
+        self.at = now
+
+    def _fill(self, now):
+        if now > self.at:
+            tokens = self.tokens + (now - self.at) * self.per_s
+            self.tokens = tokens if tokens < self.size else self.size
+            self.at = now
+
+    def take(self, now, n=1):
+        """Spend n tokens if there are that many; False otherwise."""
+        self._fill(now)
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        return True
+
+    def wait_s(self, now, n=1):
+        """Seconds until n tokens are available."""
+        self._fill(now)
+        return 0 if self.tokens >= n else (n - self.tokens) / self.per_s
+
+
+def _outlook(ring, hours):
+    """(largest temperature change from now, rain flags) over the next hours.
+
+    The flags have bit 0 set for a wet hour and bit 1 for a dry one.
+    """
+    n = hours + 1 if hours < ring.count else ring.count
+    if not n:
+        return 0, 0
+    t0 = ring.temp(0)
+    swing = 0
+    wet = 0
+    for k in range(n):
+        d = ring.temp(k) - t0
+        d = -d if d < 0 else d
+        swing = d if d > swing else swing
+        r = ring.rain_tenths(k)
+        wet |= 1 if r != NO_RAIN and r >= RAIN_TENTHS else 2
+    return swing, wet
+
+
+def refresh_period(period_s, ring, hour=-1, changed=False):
+    """Seconds to the next refresh for the forecast in ring.
+
+    ring is the home city's hourly.HourlyRing, starting at the current hour
+    (Open-Meteo's forecast_hours); hour is the local hour of day (-1 if
+    unknown) and changed is True when the weathercode differs from the
+    last refresh. Any rain within SOON_H keeps the fast period, steady
+    rain included, as its amount and end move between forecasts.
+    Overnight always backs off, as nobody is watching, up to the hour
+    before NIGHT_END so that the first morning refresh is not an hour
+    late.
+    """
+    if NIGHT_START <= hour or 0 <= hour < NIGHT_END - 1:
+        return REFRESH_SLOW_S
+    swing, wet = _outlook(ring, SOON_H)
+    if changed or wet & 1 or swing >= SWING_C:
+        return REFRESH_FAST_S
+    swing, wet = _outlook(ring, SETTLED_H)
+    if wet == 2 and swing < SETTLED_C:
+        return REFRESH_SLOW_S
+    return period_s
+
+
+class Scheduler:
+    """When to refresh and whether an upstream call may go out now."""
+
+    def __init__(
+        self, period_s, now=0, rand=random.random, bucket=None, burst=BUCKET_SIZE
+    ):
+        self.lock = _thread.allocate_lock()
+        self.period = period_s
+        self.rand = rand
+        if bucket is None:
+            bucket = TokenBucket(size=burst, now=now)
+        self.bucket = bucket
+        self.next_at = now + rand() * BOOT_JITTER_S
+        self.last_at = now  # start of the last refresh
+        self.blocked_until = 0
+        self.strikes = 0  # 429/503 replies in a row
+        self.refreshes = 0
+        self.throttles = 0  # 429/503 replies
+        self.denied = 0  # calls held back by the bucket or a backoff
+
+    def due(self, now):
+        """True once the next refresh is due and no backoff is running."""
+        with self.lock:
+            return now >= self.next_at and now >= self.blocked_until
+
+    def wake_at(self):
+        """When due() turns True (for sleeping until then)."""
+        with self.lock:
+            if self.next_at > self.blocked_until:
+                return self.next_at
+            return self.blocked_until
+
+    def refreshed(self, now):
+        """A refresh cycle ran at now: schedule the next one."""
+        with self.lock:
+            if self.refreshes == 0:  # scatter the phase across a whole period
+                gap = self.period * (0.5 + self.rand())
+            else:
+                gap = self.period * (1 - SPREAD + 2 * SPREAD * self.rand())
+            self.refreshes += 1
+            self.last_at = now
+            self.next_at = now + gap
+            if self.blocked_until > now:
+                # Cut short by a 429: go again as soon as the backoff ends
+                self.next_at = self.blocked_until
+
+    def set_period(self, period_s):
+        """Change the period, stretching the wait already planned to match."""
+        with self.lock:
+            if self.refreshes and period_s != self.period:
+                wait = self.next_at - self.last_at
+                self.next_at = self.last_at + wait * period_s / self.period
+            self.period = period_s
+
+    def acquire(self, now):
+        """Take one upstream call from the budget; False to skip it."""
+        with self.lock:
+            if now < self.blocked_until or not self.bucket.take(now):
+                self.denied += 1
+                return False
+            return True
+
+    def throttled(self, now, retry_after=-1):
+        """Upstream answered 429/503 (retry_after in seconds, -1 if absent)."""
+        with self.lock:
+            self.throttles += 1
+            wait = BACKOFF_S << (self.strikes if self.strikes < 6 else 6)
+            if wait > BACKOFF_MAX_S:
+                wait = BACKOFF_MAX_S
+            if retry_after > wait:
+                wait = retry_after
+            self.blocked_until = now + wait * (1 + SPREAD * self.rand())
+            self.strikes += 1
+
+    def ok(self):
+        """An upstream call succeeded: the backoff starts over."""
+        with self.lock:
+            self.strikes = 0
@@ -0,0 +1,123 @@
+"""
+Low-power helpers for pico_main (LOW_POWER mode).
+
+Instead of polling the buttons every 100ms, pico_main sleeps with
+machine.lightsleep (RAM kept) or machine.deepsleep (reset on wake) until
+the next scheduled refresh or a falling edge on a button pin. Deep sleep
+loses RAM, so the weather cache, hourly rings and view are written to
+STATE_FILE first and read back at boot.
+
+The RP2040 resets on any wake from deepsleep, so which button woke it is
+not known after the reset: an early wake redraws the saved view and
+stays in light sleep for MANUAL_TIMEOUT so the next press is acted on.
+machine.reset_cause() is the same for a button and for the timer, so
+button_woke() reads the pins and the saved times instead.
+"""
+
+import json
+import time
+
+import machine
+from hourly import NO_RAIN
+from machine import Pin
+
+STATE_FILE = "state.json"
+WAKE_PINS = (12, 13, 14)  # A, B, C
+
+
+def save_state(
+    weather_cache,
+    hourly_cache,
+    city_idx,
+    mode,
+    last_refresh,
+    wake_at=0,
+    path=STATE_FILE,
+):
+    """Write everything needed to resume after deepsleep; False on error.
+
+    wake_at is the time.time() of the scheduled wake: booting before it
+    means a button woke the Pico (see button_woke).
+    """
+    rings = []
+    for r in hourly_cache:
+        n = len(r)
+        rings.append(
+            [
+                r.start_hour,
+                [r.temp(k) for k in range(n)],
+                [r.rain_tenths(k) for k in range(n)],
+            ]
+        )
+    state = {
+        "cache": weather_cache,
+        "hourly": rings,
+        "city_idx": city_idx,
+        "mode": mode,
+        "last_refresh": last_refresh,
+        "wake_at": wake_at,
+        "saved_at": time.time(),
+    }
+    try:
+        with open(path, "w") as f:
+            json.dump(state, f)
+        return True
+    except Exception:
+        return False
+
+
+def load_state(path=STATE_FILE):
+    """State dict written by save_state(), or None if missing/corrupt."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        state["cache"], state["city_idx"], state["last_refresh"]
+        return state
+    except Exception:
+        return None
+
+
+def button_woke(state, pins, now):
+    """True if a button rather than the timer ended the deepsleep.
+
+    A button still held at boot decides it. Otherwise booting before the
+    saved wake_at does, but only if the RTC kept time across the reset:
+    a clock that reads earlier than saved_at was lost, and the wake is
+    taken as the timer's.
+    """
+    if any(not pin.value() for pin in pins):
+        return True
+    return state.get("saved_at", 0) <= now < state.get("wake_at", 0)
+
+
+def restore_hourly(hourly_cache, rings):
+    """Refill preallocated HourlyRings from save_state() data."""
+    for ring, (start_hour, temps, rains) in zip(hourly_cache, rings):
+        ring.clear(start_hour)
+        for t, r in zip(temps, rains):
+            ring.push(t, None if r == NO_RAIN else r / 10)
+
+
+class ButtonWake:
+    """Records which button (by name) raised the falling edge that woke us."""
+
+    def __init__(self, buttons):
+        self.pressed = None
+        for name, pin in buttons.items():
+            pin.irq(trigger=Pin.IRQ_FALLING, handler=self._handler(name))
+
+    def _handler(self, name):
+        def irq(pin):
+            if self.pressed is None:
+                self.pressed = name
+
+        return irq
+
+    def sleep(self, ms, deep=False):
+        """Sleep up to ms; returns the button name that woke us, or None."""
+        self.pressed = None
+        if deep:
+            machine.deepsleep(ms)  # does not return on the Pico
+        else:
+            machine.lightsleep(ms)
+        return self.pressed
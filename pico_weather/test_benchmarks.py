@@ -0,0 +1,115 @@
+"""
+Smoke tests for benchmarks/run.py: every benchmark runs on the recorded
+payloads, the JSON document has the expected shape, and --compare flags
+regressions past the threshold.
+Run: python3 -m pytest pico_weather/test_benchmarks.py -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import headless
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+)
+
+import run as bench_run  # noqa: E402
+
+try:
+    import PIL
+except ImportError:  # map render and JPEG decode need Pillow
+    PIL = None
+
+
+def _doc(**medians):
+    return {
+        "meta": {},
+        "results": {k: {"median": v, "unit": "s/op"} for k, v in medians.items()},
+    }
+
+
+class TestFixtures(unittest.TestCase):
+    def test_payloads_parse(self):
+        for name in ("open_meteo.json", "ip_api.json", "wttr_in.json"):
+            json.loads(bench_run.fixture(name))
+
+    def test_fetch_weather_uses_payload(self):
+        ns = bench_run._pico_main_online()
+        ns["fetch_weather"](0)
+        ns["fetch_weather"](1)
+        self.assertNotIn(None, ns["weather_cache"][:2])
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestRun(unittest.TestCase):
+    def test_all_benchmarks_quick(self):
+        logged = []
+        doc = bench_run.run(rounds=1, min_time=0.001, log=logged.append)
+        skipped = {line.split()[0] for line in logged if "skipped" in line}
+        self.assertLessEqual(skipped, {"build_script"})  # needs pyserial
+        self.assertEqual(set(doc["results"]) | skipped, set(bench_run.BENCHES))
+        for r in doc["results"].values():
+            self.assertEqual(r["unit"], "s/op")
+            self.assertGreater(r["median"], 0)
+            self.assertLessEqual(r["min"], r["median"])
+            self.assertGreaterEqual(r["loops"], 1)
+        self.assertEqual(doc["meta"]["rounds"], 1)
+        json.dumps(doc)
+
+    def test_filter(self):
+        doc = bench_run.run(["draw_cache"], rounds=1, min_time=0.001, log=[].append)
+        self.assertEqual(set(doc["results"]), {"draw_cache", "draw_cache_cold"})
+
+    def test_draws_reach_the_panel(self):
+        # Timing the unchanged-frame skip instead of a draw is an error
+        ns = bench_run._pico_main_online()
+        headless.fill_cache(ns)
+        c = ns["weather_cache"][1]
+        ns["draw_cache"](c, 1)
+        skip = bench_run._drawn(ns, lambda: ns["draw_cache"](c, 1))
+        with self.assertRaises(RuntimeError):
+            skip()
+        for name in ("draw_cache", "draw_cache_cold"):
+            with bench_run.BENCHES[name][0]() as run:
+                for _ in range(3):
+                    run()
+
+
+class TestCompare(unittest.TestCase):
+    def test_statuses(self):
+        base = _doc(a=1.0, b=1.0, c=1.0, gone=1.0)
+        cur = _doc(a=1.05, b=1.2, c=0.5, added=1.0)
+        status = {r[0]: r[4] for r in bench_run.compare(base, cur, 0.10)}
+        self.assertEqual(
+            status,
+            {
+                "a": "ok",
+                "b": "regressed",
+                "c": "improved",
+                "gone": "missing",
+                "added": "new",
+            },
+        )
+
+    def test_threshold(self):
+        rows = bench_run.compare(_doc(a=1.0), _doc(a=1.2), 0.25)
+        self.assertEqual(rows[0][4], "ok")
+
+    def test_main_exit_code(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fast = os.path.join(tmp, "fast.json")
+            with open(fast, "w") as f:
+                json.dump(_doc(build_pico_script=1e-9), f)
+            argv = ["-k", "build_pico_script", "--quick", "--compare", fast]
+            self.assertEqual(bench_run.main(argv), 1)
+            with open(fast, "w") as f:
+                json.dump(_doc(build_pico_script=1e3), f)
+            self.assertEqual(bench_run.main(argv), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
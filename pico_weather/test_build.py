@@ -0,0 +1,135 @@
+"""
+Tests for build.py (.mpy/frozen Pico image) and pico_main loading the map
+from uk_map.jpg or a frozen uk_map_asset module.
+Run: python3 -m pytest pico_weather/test_build.py -v
+"""
+
+import ast
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+import build
+import headless
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+)
+
+import bench_boot  # noqa: E402
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+
+def _map_bytes():
+    with open(os.path.join(build.HERE, build.MAP_FILE), "rb") as f:
+        return f.read()
+
+
+class BuildTestCase(unittest.TestCase):
+    mpy_cross = None
+
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out)
+        self.sizes = build.build(self.out, self.mpy_cross)
+
+
+class TestBuildWithoutMpyCross(BuildTestCase):
+    def test_fs(self):
+        names = set(os.listdir(os.path.join(self.out, "fs")))
+        expected = {m + ".py" for m in build.DEVICE_MODULES}
+        self.assertLessEqual(expected | {"main.py", build.MAP_FILE}, names)
+        with open(os.path.join(self.out, "fs", "main.py")) as f:
+            self.assertEqual(f.read(), "import pico_main\n")
+
+    def test_frozen_map_asset(self):
+        ns = {}
+        with open(os.path.join(self.out, "frozen", "uk_map_asset.py")) as f:
+            exec(f.read(), ns)
+        self.assertEqual(ns["UK_MAP"], _map_bytes())
+
+    def test_manifest(self):
+        with open(os.path.join(self.out, "frozen", "manifest.py")) as f:
+            manifest = f.read()
+        for name in build.DEVICE_MODULES + ("uk_map_asset",):
+            self.assertIn('module("{}.py"'.format(name), manifest)
+            path = os.path.join(self.out, "frozen", name + ".py")
+            self.assertTrue(os.path.exists(path), path)
+
+    def test_rebuild_replaces_output(self):
+        stale = os.path.join(self.out, "fs", "stale.mpy")
+        open(stale, "w").close()
+        build.build(self.out)
+        self.assertFalse(os.path.exists(stale))
+
+
+@unittest.skipIf(build.find_mpy_cross() is None, "mpy-cross not installed")
+class TestBuildWithMpyCross(BuildTestCase):
+    mpy_cross = build.find_mpy_cross()
+
+    def test_modules_cross_compiled(self):
+        fs = os.path.join(self.out, "fs")
+        for name in build.DEVICE_MODULES:
+            with open(os.path.join(fs, name + ".mpy"), "rb") as f:
+                self.assertEqual(f.read(1), b"M", name)
+            self.assertFalse(os.path.exists(os.path.join(fs, name + ".py")))
+
+
+class TestDeviceModules(unittest.TestCase):
+    def test_every_local_import_is_shipped(self):
+        """Each .py module the device modules import is in DEVICE_MODULES."""
+        local = {f[:-3] for f in os.listdir(build.HERE) if f.endswith(".py")}
+        for name in build.DEVICE_MODULES:
+            with open(os.path.join(build.HERE, name + ".py")) as f:
+                tree = ast.parse(f.read())
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ImportFrom) and node.module:
+                    mods = [node.module]
+                elif isinstance(node, ast.Import):
+                    mods = [a.name for a in node.names]
+                else:
+                    continue
+                for mod in mods:
+                    if mod in local:
+                        self.assertIn(mod, build.DEVICE_MODULES, (name, mod))
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestMapSource(unittest.TestCase):
+    def frame(self, modules=None):
+        headless._DECODED.clear()
+        ns = headless.load_pico_main(modules=modules)
+        headless.fill_cache(ns)
+        return ns, headless.render(ns, 2)
+
+    def test_frozen_asset_matches_file(self):
+        ns_file, from_file = self.frame()
+        self.assertIsNone(ns_file["UK_MAP"])
+        asset = types.ModuleType("uk_map_asset")
+        asset.UK_MAP = _map_bytes()
+        ns_frozen, frozen = self.frame({"uk_map_asset": asset})
+        self.assertIs(ns_frozen["UK_MAP"], asset.UK_MAP)
+        self.assertEqual(from_file, frozen)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestBootHarness(unittest.TestCase):
+    def test_variants(self):
+        results = bench_boot.measure(rounds=1)
+        self.assertEqual(list(results), ["single file", "source", "mpy", "frozen"])
+        # Precompiled bytecode skips the compiler's allocations at boot
+        self.assertLess(results["mpy"][1], results["source"][1])
+        # The frozen map and bytecode are not on the heap
+        self.assertLess(results["frozen"][2], results["mpy"][2])
+        self.assertLess(results["source"][2], results["single file"][2])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,282 @@
+"""
+Tests for city_db.py (on-flash city database and picker) and pico_main's
+use of it. Includes the 5,000-city RAM/lookup-time check.
+Run: python3 -m pytest pico_weather/test_city_db.py -v
+"""
+
+import csv
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+import city_db
+import city_grid
+import headless
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import PIL
+except ImportError:  # headless text rendering needs Pillow
+    PIL = None
+
+
+def uk_towns():
+    with open(os.path.join(HERE, "uk_towns.csv"), newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    return [(n, float(lat), float(lon)) for n, lat, lon in rows]
+
+
+def synthetic(n, seed=1):
+    """n unique made-up town names with UK-ish coordinates."""
+    rng = random.Random(seed)
+    heads = ("Ash", "Brad", "Chester", "Dun", "East", "Fair", "Glen", "Hal",
+             "Kings", "Long", "Market", "New", "Old", "Ports", "Rich", "St ",
+             "Strat", "Thorn", "Up", "West", "Whit", "York")  # fmt: skip
+    tails = ("bury", "by", "caster", "ford", "ham", "ley", "mouth", "stead",
+             "ton", "wich", "wick", "worth", "dale", "field", "gate")  # fmt: skip
+    names = set()
+    while len(names) < n:
+        name = rng.choice(heads) + rng.choice(tails)
+        if rng.random() < 0.8:
+            name += " " + rng.choice(heads).strip() + rng.choice(tails)
+        names.add(name[: city_db.NAME_W])
+    return [
+        (name, rng.uniform(49.9, 60.8), rng.uniform(-6.4, 2.0))
+        for name in sorted(names)
+    ]
+
+
+class DBTestCase(unittest.TestCase):
+    rows = None
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.path = os.path.join(tmp, "cities.bin")
+        city_db.build(self.rows or uk_towns(), self.path)
+        self.db = city_db.CityDB(self.path)
+        self.addCleanup(self.db.close)
+
+
+class TestCityDB(DBTestCase):
+    def test_sorted_round_trip(self):
+        towns = uk_towns()
+        self.assertEqual(len(self.db), len(towns))
+        expected = sorted(towns, key=lambda t: t[0].upper())
+        for i, (name, lat, lon) in enumerate(expected):
+            got = self.db[i]
+            self.assertEqual(got[0], name)
+            self.assertAlmostEqual(got[1], lat, places=5)
+            self.assertAlmostEqual(got[2], lon, places=5)
+        self.assertEqual(self.db.name(0), expected[0][0])
+
+    def test_file_layout(self):
+        n = len(self.db)
+        blocks = (n + city_db.STRIDE - 1) // city_db.STRIDE
+        records = city_db.HEADER_SIZE + blocks * city_db.KEY_W + n * city_db.RECORD_SIZE
+        grid = self.db.grid()
+        cells = grid.cols * grid.rows
+        self.assertEqual(
+            os.path.getsize(self.path),
+            records + city_grid.GRID_HEADER_SIZE + 4 * (cells + 1) + 12 * n,
+        )
+
+    def test_grid_indexes_records(self):
+        grid = self.db.grid()
+        self.assertEqual(len(grid), len(self.db))
+        k = grid.nearest(52.25, 0.15)
+        self.assertEqual(grid.place(k), self.db[grid.index(k)])
+        self.assertEqual(grid.place(k)[0], "Cambridge")
+
+    def test_grid_missing(self):
+        # A records-only file (an older build) opens without a grid
+        n = len(self.db)
+        with open(self.path, "r+b") as f:
+            f.truncate(self.db._base + n * city_db.RECORD_SIZE)
+        db = city_db.CityDB(self.path)
+        self.addCleanup(db.close)
+        self.assertEqual(db[n - 1], self.db[n - 1])
+        self.assertIsNone(db.grid())
+
+    def test_index_error(self):
+        with self.assertRaises(IndexError):
+            self.db[len(self.db)]
+
+    def test_find_prefix(self):
+        self.assertEqual(self.db.name(self.db.find("Cambridge")), "Cambridge")
+        self.assertEqual(self.db.name(self.db.find("ches")), "Chester")
+        self.assertEqual(self.db.name(self.db.find("St")), "St Andrews")
+        self.assertEqual(self.db.find("Zz"), -1)
+        self.assertEqual(self.db.find("Cambridgeshire"), -1)
+
+    def test_bisect(self):
+        self.assertEqual(self.db.bisect(""), 0)
+        self.assertEqual(self.db.bisect("ZZZ"), len(self.db))
+        i = self.db.bisect("Lp")
+        self.assertEqual(self.db.name(i), "Luton")
+
+    def test_jump_letters(self):
+        i = self.db.find("Cambridge")
+        j = self.db.jump(i, 1)
+        self.assertEqual(self.db.name(j), "Darlington")
+        self.assertEqual(self.db.name(self.db.jump(j, -1)), "Cambridge")
+        self.assertEqual(self.db.name(self.db.jump(i, -1)), "Bangor")
+        # Wraps at both ends
+        self.assertEqual(self.db.jump(self.db.find("York"), 1), 0)
+        self.assertEqual(self.db.name(self.db.jump(0, -1)), "Yeovil")
+
+    def test_long_name_cut_on_character(self):
+        # "é" is 2 bytes of UTF-8 and straddles the NAME_W-byte limit
+        name = "x" * (city_db.NAME_W - 1) + "é"
+        city_db.build([(name, 45.0, 6.0), ("Ax", 1.0, 2.0)], self.path)
+        db = city_db.CityDB(self.path)
+        self.addCleanup(db.close)
+        self.assertEqual(db[1][0], name[:-1])
+        self.assertEqual(db.name(1), name[:-1])
+        short = "Besançon" + "x" * (city_db.NAME_W - 9)  # fits exactly
+        city_db.build([(short, 47.2, 6.0)], self.path)
+        db2 = city_db.CityDB(self.path)
+        self.addCleanup(db2.close)
+        self.assertEqual(db2.name(0), short)
+
+    def test_open_db_missing_or_invalid(self):
+        self.assertIsNone(city_db.open_db(self.path + ".missing"))
+        bad = self.path + ".bad"
+        with open(bad, "wb") as f:
+            f.write(b"JUNK" + bytes(8))
+        self.assertIsNone(city_db.open_db(bad))
+
+
+class TestFiveThousand(DBTestCase):
+    rows = synthetic(5000)
+
+    def test_ram_footprint(self):
+        # Everything held per open database: sparse index + one window
+        self.db.close()
+        tracemalloc.start()
+        try:
+            db = city_db.CityDB(self.path)
+            for i in range(0, len(db), 97):
+                db[i]
+            db.find("Kings")
+            _, peak = tracemalloc.get_traced_memory()
+            db.close()
+        finally:
+            tracemalloc.stop()
+        # Sparse index + window: ~2KB for 5,000 cities (140KB on flash)
+        self.assertLess(len(db._index) + len(db._win), 2560)
+        self.assertGreater(os.path.getsize(self.path), 50 * 2560)
+        # Total includes CPython's 4KB BufferedReader, which MicroPython lacks
+        self.assertLess(peak, 12 * 1024)
+
+    def test_grid_ram_footprint(self):
+        # The nearest-place grid stays on flash: one cell's slots in RAM
+        grid = self.db.grid()
+        rng = random.Random(5)
+        for _ in range(200):
+            grid.nearest(rng.uniform(49.9, 60.8), rng.uniform(-6.4, 2.0), 25)
+        self.assertLess(len(grid._buf) * grid._buf.itemsize, 256)
+        self.assertFalse(hasattr(grid, "_slots") or hasattr(grid, "_start"))
+
+    def test_lookup_time(self):
+        rng = random.Random(2)
+        probes = [rng.choice(self.rows)[0][:5] for _ in range(500)]
+        t0 = time.perf_counter()
+        for p in probes:
+            self.assertGreaterEqual(self.db.find(p), 0)
+        per_find = (time.perf_counter() - t0) / len(probes)
+        t0 = time.perf_counter()
+        for i in range(len(self.db)):
+            self.db[i]
+        per_item = (time.perf_counter() - t0) / len(self.db)
+        self.assertLess(per_find, 1e-3)
+        self.assertLess(per_item, 1e-4)
+
+    def test_find_matches_linear_scan(self):
+        keys = sorted(r[0].upper() for r in self.rows)
+        for prefix in ("A", "KINGSB", "ST W", "WHITW", "YORKW", "Q"):
+            expected = next((i for i, k in enumerate(keys) if k.startswith(prefix)), -1)
+            self.assertEqual(self.db.find(prefix), expected, prefix)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestPicker(DBTestCase):
+    def test_cursor_row_inverted(self):
+        g = headless.HeadlessGraphics()
+        cursor = self.db.find("London")
+        city_db.draw_picker(g, self.db, cursor)
+        rows = [y for y in range(14, 128) if not g.get_pixel(290, y)]
+        self.assertTrue(rows)  # cursor bar spans the width
+        self.assertLess(max(rows), 128)
+
+
+class _Wifi:
+    def connect(self):
+        return True
+
+    def power_down(self):
+        pass
+
+
+class TestPicoMainPicker(DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ns = headless.load_pico_main()
+        self.ns["cities"] = self.db
+        self.ns["wifi"] = _Wifi()
+        self.ns["_PRESETS_FILE"] = os.path.join(
+            os.path.dirname(self.path), "presets.json"
+        )
+        self.ns["http_client"].get = lambda url, timeout=None: _Resp()
+
+    def test_select_city_replaces_slot_and_persists(self):
+        ns = self.ns
+        ns["select_city"](3, self.db.find("York"))
+        self.assertEqual(ns["PRESET_CITIES"][3][0], "York")
+        self.assertEqual(ns["weather_cache"][3]["city"], "York")
+        ns["PRESET_CITIES"][3] = ("Manchester", 53.481, -2.243)
+        ns["load_presets"]()
+        self.assertEqual(ns["PRESET_CITIES"][3][0], "York")
+        self.assertIsNone(ns["PRESET_CITIES"][0][0])  # Auto untouched
+
+    def test_failed_fetch_drops_old_entry(self):
+        ns = self.ns
+        ns["weather_cache"][3] = {"city": "Manchester"}
+        ns["http_client"].get = headless._offline
+        ns["select_city"](3, self.db.find("York"))
+        self.assertIsNone(ns["weather_cache"][3])
+
+    def test_long_press_b(self):
+        ns = self.ns
+        now = [0]
+
+        class Pin:
+            def value(self):
+                return 0 if now[0] < 1000 else 1
+
+        def sleep_ms(ms):
+            now[0] += ms
+
+        ns["time"] = type("T", (), {"sleep_ms": staticmethod(sleep_ms)})
+        ns["_btn_a"] = type("Up", (), {"value": lambda self: 1})()
+        ns["_btn_b"] = Pin()
+        self.assertEqual(ns["btn_pressed"](), "B")
+
+
+class _Resp:
+    status_code = 200
+
+    def json(self):
+        return headless.SAMPLE_FORECAST
+
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,173 @@
+"""
+Tests for city_grid.py and its use for the Auto dot (pico_main) and
+/map labels (map_server).
+Run: python3 -m pytest pico_weather/test_city_grid.py -v
+"""
+
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import city_db
+import headless
+from city_db import read_csv
+from city_grid import KM_PER_DEG, CityGrid
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+)
+
+import bench_nearest  # noqa: E402
+
+try:
+    import map_server
+except ImportError:  # map_server needs Pillow
+    map_server = None
+
+TOWNS = read_csv(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "uk_towns.csv")
+)
+
+
+class TestNearest(unittest.TestCase):
+    def make_grid(self, places, project=None):
+        return CityGrid(places, project)
+
+    def check_against_linear(self, places, queries):
+        grid = self.make_grid(places)
+        for lat, lon in queries:
+            k = grid.nearest(lat, lon)
+            best = bench_nearest.linear_nearest(places, lat, lon, grid.kx)
+            _, blat, blon = places[best]
+            dx, dy = (blon - lon) * grid.kx, blat - lat
+            # Ties aside, the grid finds the same place
+            self.assertAlmostEqual(
+                grid.km(k, lat, lon), math.hypot(dx, dy) * KM_PER_DEG, places=2
+            )
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(3)
+        for n in (1, 30, 3000):
+            places = bench_nearest.random_places(n, seed=n)
+            queries = [
+                (rng.uniform(49.9, 60.8), rng.uniform(-6.4, 2.0)) for _ in range(200)
+            ]
+            self.check_against_linear(places, queries)
+
+    def test_queries_outside_the_grid(self):
+        places = bench_nearest.random_places(300)
+        self.check_against_linear(places, [(40.0, -20.0), (70.0, 10.0), (55.0, 30.0)])
+
+    def test_clustered_places(self):
+        rng = random.Random(4)
+        places = [
+            ("c{}".format(i), 51.5 + rng.random() * 0.01, -0.1 + rng.random() * 0.01)
+            for i in range(500)
+        ]
+        places.append(("far", 58.0, -3.0))
+        self.check_against_linear(places, [(51.505, -0.095), (57.0, -3.5), (50.0, 1.0)])
+
+    def test_towns(self):
+        grid = self.make_grid(TOWNS)
+        k = grid.nearest(52.25, 0.15)  # Histon, just north of Cambridge
+        self.assertEqual(grid.place(k)[0], "Cambridge")
+        self.assertLess(grid.km(k, 52.25, 0.15), 10)
+
+    def test_max_km(self):
+        grid = self.make_grid(TOWNS)
+        self.assertEqual(grid.nearest(45.0, -10.0, max_km=50), -1)
+        self.assertGreaterEqual(grid.nearest(51.6, -0.2, max_km=50), 0)
+
+    def test_empty(self):
+        self.assertEqual(self.make_grid([]).nearest(52.0, 0.0), -1)
+
+    def test_dots_precomputed(self):
+        ns = headless.load_pico_main()
+        grid = self.make_grid(TOWNS, ns["latlon_to_dot"])
+        for k in range(len(grid)):
+            _, lat, lon = grid.place(k)
+            self.assertEqual(grid.dot(k), ns["latlon_to_dot"](lat, lon))
+
+
+def built_grid(test, places, project=None):
+    """FlashGrid of a cities.bin built from places (as pico_main opens it)."""
+    tmp = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, tmp)
+    path = os.path.join(tmp, "cities.bin")
+    city_db.build(places, path)
+    db = city_db.CityDB(path)
+    test.addCleanup(db.close)
+    return db.grid(project)
+
+
+class TestFlashGrid(TestNearest):
+    """The same lookups through the grid section of cities.bin."""
+
+    def make_grid(self, places, project=None):
+        return built_grid(self, places, project)
+
+    def test_same_slots_as_ram_grid(self):
+        places = bench_nearest.random_places(3000, seed=7)
+        ram = CityGrid(places)
+        flash = self.make_grid(places)
+        rng = random.Random(8)
+        for _ in range(300):
+            lat, lon = rng.uniform(49.9, 60.8), rng.uniform(-6.4, 2.0)
+            a, b = ram.nearest(lat, lon, 25), flash.nearest(lat, lon, 25)
+            self.assertEqual(a < 0, b < 0)
+            if a >= 0:
+                self.assertEqual(ram.km(a, lat, lon), flash.km(b, lat, lon))
+
+
+class TestLookupCost(unittest.TestCase):
+    def test_constant_ish_lookup_cost(self):
+        _, small, _ = bench_nearest.measure(30, 300, linear=False)
+        _, large, _ = bench_nearest.measure(30000, 300, linear=False)
+        self.assertLess(large, 5 * small + 20e-6)
+
+
+class TestPicoMainDot(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        self.ns["places"] = built_grid(self, TOWNS, self.ns["latlon_to_dot"])
+
+    def entry(self, city, lat, lon):
+        return {"city": city, "lat": lat, "lon": lon}
+
+    def test_known_city_uses_table(self):
+        ns = self.ns
+        self.assertEqual(
+            ns["place_dot"](self.entry("Cambridge", 0, 0)), ns["city_dot"]("Cambridge")
+        )
+
+    def test_auto_snaps_to_nearest_place(self):
+        ns = self.ns
+        york = next(t for t in TOWNS if t[0] == "York")
+        dot = ns["place_dot"](self.entry("Haxby", 54.016, -1.075))
+        self.assertEqual(dot, ns["latlon_to_dot"](york[1], york[2]))
+
+    def test_far_from_everything_projects(self):
+        ns = self.ns
+        dot = ns["place_dot"](self.entry("Sea", 54.0, -10.0))
+        self.assertEqual(dot, ns["latlon_to_dot"](54.0, -10.0))
+
+    def test_without_database(self):
+        ns = self.ns
+        ns["places"] = None
+        dot = ns["place_dot"](self.entry("Haxby", 54.016, -1.075))
+        self.assertEqual(dot, ns["latlon_to_dot"](54.016, -1.075))
+
+
+@unittest.skipIf(map_server is None, "Pillow not installed")
+class TestMapServerLabel(unittest.TestCase):
+    def test_nearest_place(self):
+        self.assertEqual(map_server.nearest_place(52.25, 0.15), "Cambridge")
+        self.assertIsNone(map_server.nearest_place(45.0, -10.0))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,297 @@
+"""
+Tests for fetch_worker.py: the mailbox under concurrent updates, the
+worker's schedule on a fake clock, and pico_main's UI loop staying
+responsive while the worker is stuck in a fetch (threading stands in for
+the second core).
+Run: python3 -m pytest pico_weather/test_fetch_worker.py -v
+"""
+
+import threading
+import time
+import unittest
+
+import headless
+from fetch_worker import Mailbox, Worker
+
+SLOTS = 8
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Radio:
+    def __init__(self, up=True):
+        self.up = up
+        self.joins = 0
+        self.downs = 0
+
+    def connect(self):
+        self.joins += 1
+        return self.up
+
+    def disconnect(self):
+        self.downs += 1
+
+
+class TestMailbox(unittest.TestCase):
+    def test_take_latest_per_slot(self):
+        mb = Mailbox(SLOTS)
+        self.assertEqual(mb.take(), ())
+        mb.post(3, "old")
+        mb.post(1, "one")
+        mb.post(3, "new")
+        self.assertEqual(mb.take(), [(1, "one"), (3, "new")])
+        self.assertEqual(mb.take(), ())
+
+    def test_failure_is_posted(self):
+        mb = Mailbox(SLOTS)
+        mb.post(2, None)
+        self.assertEqual(mb.take(), [(2, None)])
+
+    def test_concurrent_post_and_take(self):
+        mb = Mailbox(SLOTS)
+        n = 20000
+        seen = [[] for _ in range(SLOTS)]
+        done = threading.Event()
+
+        def worker():
+            for i in range(1, n + 1):
+                mb.post(i % SLOTS, (i, -i))  # both halves must match
+            done.set()
+
+        def ui():
+            while True:
+                finished = done.is_set()
+                for idx, (a, b) in mb.take():
+                    self.assertEqual(a, -b)
+                    self.assertEqual(a % SLOTS, idx)
+                    seen[idx].append(a)
+                if finished:
+                    return
+
+        threads = [threading.Thread(target=worker), threading.Thread(target=ui)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        for idx in range(SLOTS):
+            self.assertEqual(seen[idx], sorted(set(seen[idx])))  # in order, once
+            self.assertEqual(seen[idx][-1], n - (n - idx) % SLOTS)  # latest kept
+
+    def test_concurrent_asks(self):
+        mb = Mailbox(SLOTS)
+        got = []
+
+        def ask(idx):
+            for _ in range(2000):
+                mb.ask(1 << idx)
+
+        def drain():
+            for _ in range(2000):
+                got.append(mb.wanted())
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(SLOTS)]
+        threads.append(threading.Thread(target=drain))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        got.append(mb.wanted())
+        mask = 0
+        for m in got:
+            mask |= m
+        self.assertEqual(mask, (1 << SLOTS) - 1)  # no ask lost
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.radio = Radio()
+        self.mb = Mailbox(SLOTS)
+        self.fetched = []
+        self.worker = Worker(
+            self.mb,
+            self.fetch,
+            self.radio.connect,
+            self.radio.disconnect,
+            600,
+            retry_in_ms=lambda: 4000,
+            clock=self.clock,
+        )
+
+    def fetch(self, idx):
+        self.fetched.append(idx)
+        if idx == 5:
+            raise OSError("timed out")
+        return ("record", idx)
+
+    def test_cycle_then_idle(self):
+        self.assertTrue(self.worker.step())
+        self.assertEqual(self.fetched, list(range(SLOTS)))
+        records = dict(self.mb.take())
+        self.assertEqual(records[2], ("record", 2))
+        self.assertIsNone(records[5])  # failure reported, not raised
+        self.assertEqual((self.mb.cycles, self.mb.last_refresh), (1, 1000.0))
+        self.assertEqual(self.radio.downs, 1)
+        self.clock.now += 599
+        self.assertFalse(self.worker.step())
+        self.clock.now += 1
+        self.assertTrue(self.worker.step())
+        self.assertEqual(self.mb.cycles, 2)
+
+    def test_asked_slot_fetched_alone(self):
+        self.worker.step()
+        del self.fetched[:]
+        self.mb.ask(1 << 3)
+        self.assertTrue(self.worker.step())
+        self.assertEqual(self.fetched, [3])
+        self.assertEqual(self.mb.cycles, 1)  # not a refresh cycle
+
+    def test_wifi_down(self):
+        self.radio.up = False
+        self.mb.ask(1 << 3)
+        self.clock.now = -1  # no refresh due yet
+        self.assertFalse(self.worker.step())
+        self.assertEqual(self.mb.retry_ms, 4000)
+        self.assertEqual((self.fetched, self.radio.downs), ([], 1))  # radio off
+        self.radio.up = True
+        self.assertTrue(self.worker.step())  # the ask was kept
+        self.assertEqual(self.fetched, [3])
+        self.assertEqual(self.mb.retry_ms, 0)
+
+    def test_thread_survives_errors(self):
+        calls = []
+
+        def connect():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RuntimeError("radio")
+            return True
+
+        self.worker.connect = connect
+        self.worker.clock = time.time
+        self.worker.start()
+        try:
+            deadline = time.time() + 5
+            while not self.mb.cycles and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.worker.stop()
+        self.assertEqual(self.mb.cycles, 1)
+        self.assertEqual(self.worker.errors, 2)
+
+
+class _Pin:
+    """Button released until press_at, then held down for 200ms."""
+
+    def __init__(self, press_at):
+        self.press_at = press_at
+        self.polls = []
+
+    def value(self):
+        now = time.monotonic()
+        self.polls.append(now)
+        return 0 if self.press_at <= now < self.press_at + 0.2 else 1
+
+
+class _Time:
+    time = staticmethod(time.time)
+
+    @staticmethod
+    def sleep_ms(ms):
+        time.sleep(ms / 1000)
+
+
+class TestPicoMainWorker(unittest.TestCase):
+    def setUp(self):
+        ns = self.ns = headless.load_pico_main()
+        ns["time"] = _Time
+        self.release = threading.Event()
+        self.fetching = threading.Event()
+        self.radio = Radio()
+
+        def fetch(idx):
+            self.fetching.set()
+            self.release.wait(10)  # a fetch stuck on a slow network
+            return ns["fetch_record"](idx)
+
+        ns["http_client"].get = _get
+        ns["worker"] = Worker(
+            ns["mailbox"], fetch, self.radio.connect, self.radio.disconnect, 600
+        )
+        self.addCleanup(ns["worker"].stop)
+        self.addCleanup(self.release.set)
+
+    def test_ui_polls_while_fetch_blocks(self):
+        ns = self.ns
+        idle = type("Up", (), {"value": lambda self: 1})()
+        ns["_btn_a"] = _Pin(time.monotonic() + 0.8)
+        ns["_btn_b"] = ns["_btn_c"] = idle
+        ns["worker"].start()
+        self.assertTrue(self.fetching.wait(5))
+        t0 = time.monotonic()
+        action = ns["wait_for_action"](time.time() + 5)
+        self.assertEqual(action, "a")
+        self.assertLess(time.monotonic() - t0, 2)
+        polls = ns["_btn_a"].polls
+        gaps = [b - a for a, b in zip(polls, polls[1:])]
+        self.assertLess(max(gaps), 0.5)  # never held up by the fetch
+        self.assertFalse(ns["mailbox"].cycles)  # and it really was stuck
+
+    def test_records_stored_on_core_0(self):
+        ns = self.ns
+        self.release.set()
+        ns["worker"].start()
+        deadline = time.time() + 10
+        while not ns["mailbox"].cycles and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(ns["take_records"]())
+        self.assertEqual(ns["weather_cache"][0]["city"], "Cambridge")
+        self.assertTrue(all(ns["weather_cache"]))
+        hours = len(headless.SAMPLE_FORECAST["hourly"]["temperature_2m"])
+        self.assertEqual(len(ns["hourly_cache"][1]), hours)
+        self.assertEqual(self.radio.downs, 1)
+
+    def test_select_city_asks_worker(self):
+        ns = self.ns
+        ns["cities"] = [("York", 53.96, -1.08)]
+        ns["_PRESETS_FILE"] = "/nonexistent/presets.json"
+        ns["select_city"](3, 0)
+        self.assertIsNone(ns["weather_cache"][3])
+        self.assertEqual(ns["mailbox"].wanted(), 1 << 3)
+        self.assertEqual(self.radio.joins, 0)  # Wi-Fi belongs to the worker
+
+    def test_stale_record_for_replaced_slot_dropped(self):
+        ns = self.ns
+        ns["mailbox"].post(3, ({"city": "Manchester"}, None))
+        ns["PRESET_CITIES"][3] = ("York", 53.96, -1.08)
+        ns["take_records"]()
+        self.assertIsNone(ns["weather_cache"][3])
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        pass
+
+
+def _get(url, timeout=None):
+    if "ip-api" in url:
+        return _Resp({"lat": 52.2, "lon": 0.12, "city": "Cambridge"})
+    return _Resp(headless.SAMPLE_FORECAST)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
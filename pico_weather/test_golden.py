@@ -0,0 +1,234 @@
+"""
+Pixel-level golden-image tests for pico_main.draw_cache.
+Renders every PRESET_CITIES entry plus edge-case weather on the headless
+renderer and XOR/popcount-diffs each frame against golden/<name>.pbm.
+Text comes from headless_fonts' approximate glyphs, so the goldens catch
+layout regressions on the host; they are not the device's exact pixels.
+
+Run: python3 -m pytest pico_weather/test_golden.py -v
+Regenerate after an intentional layout change:
+  UPDATE_GOLDEN=1 python3 -m pytest pico_weather/test_golden.py
+"""
+
+import copy
+import os
+import tempfile
+import time
+import unittest
+
+import headless
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+UPDATE = os.environ.get("UPDATE_GOLDEN") == "1"
+STRIDE = headless.WIDTH // 8
+
+
+def _forecast(current=None, daily=None):
+    """SAMPLE_FORECAST with some current_weather/daily fields replaced."""
+    f = copy.deepcopy(headless.SAMPLE_FORECAST)
+    f["current_weather"].update(current or {})
+    f["daily"].update(daily or {})
+    return f
+
+
+_NO_HOURLY = _forecast()
+del _NO_HOURLY["hourly"]
+
+# name -> (preset idx, forecast, ip-api location, cache entry overrides)
+EDGE_CASES = {
+    "negative_temps": (
+        3,
+        _forecast(
+            {"temperature": -12.4, "weathercode": 73},
+            {
+                "temperature_2m_max": [-3.0, -8.0],
+                "temperature_2m_min": [-15.0, -21.0],
+                "weathercode": [73, 75],
+            },
+        ),
+        None,
+        {},
+    ),
+    "missing_rain": (2, _forecast(daily={"precipitation_sum": [None, None]}), None, {}),
+    "long_description": (
+        4,
+        _forecast({"weathercode": 99, "winddirection": 45.0, "windspeed": 112.0}),
+        None,
+        {"desc": "Thunder, heavy hail", "tmr_desc": "Hvy Snow + gales"},
+    ),
+    "unknown_codes": (
+        5,
+        _forecast({"weathercode": 42}, {"weathercode": [3, 7]}),
+        None,
+        {},
+    ),
+    "missing_time_and_wind": (
+        6,
+        {
+            "current_weather": {"temperature": 7.9, "weathercode": 1},
+            "daily": headless.SAMPLE_FORECAST["daily"],
+        },
+        None,
+        {},
+    ),
+    "auto_unknown_town": (0, _forecast(), (50.12, -5.54, "Penzance"), {}),
+    "auto_long_city": (
+        0,
+        _forecast({"temperature": 21.6, "weathercode": 0}),
+        (53.22, -4.20, "Llanfairpwllgwyngyll"),
+        {},
+    ),
+    "auto_off_map": (0, _forecast(), (48.85, 2.35, "Paris"), {}),
+}
+
+# name -> (preset idx, forecast, hourly page)
+HOURLY_CASES = {
+    "hourly_london_p0": (1, _forecast(), 0),
+    "hourly_london_p3": (1, _forecast(), 3),
+    "hourly_dry_cold": (
+        4,
+        _forecast(daily={}, current={"temperature": -4.0}),
+        1,
+    ),
+    "hourly_missing": (2, _NO_HOURLY, 0),
+}
+HOURLY_CASES["hourly_dry_cold"][1]["hourly"].update(
+    temperature_2m=[-6.0 + (k % 24) / 4 for k in range(48)],
+    precipitation=[0.0] * 48,
+)
+
+
+def _corpus():
+    """Yield (name, ns, idx, page) with ns["weather_cache"][idx] ready to draw."""
+    ns = headless.load_pico_main()
+    headless.fill_cache(ns)
+    for idx, (name, _, _) in enumerate(ns["PRESET_CITIES"]):
+        yield "preset_{}_{}".format(idx, (name or "auto").lower()), ns, idx, None
+    cases = [(n, i, f, loc, o, None) for n, (i, f, loc, o) in EDGE_CASES.items()]
+    cases += [(n, i, f, None, {}, p) for n, (i, f, p) in HOURLY_CASES.items()]
+    for name, idx, forecast, location, overrides, page in cases:
+        ns["weather_cache"] = [None] * len(ns["PRESET_CITIES"])
+        ns["hourly_cache"][idx].clear()
+        ns["get_weather"] = lambda lat, lon, f=forecast: f
+        ns["get_location"] = lambda loc=location: loc
+        ns["fetch_weather"](idx)
+        entry = ns["weather_cache"][idx]
+        assert entry is not None, name
+        entry.update(overrides)
+        yield name, ns, idx, page
+
+
+def _golden_path(name):
+    return os.path.join(GOLDEN_DIR, name + ".pbm")
+
+
+def _diff(actual, expected):
+    """Number of differing pixels and their bounding box (x0, y0, x1, y1)."""
+    d = int.from_bytes(actual, "big") ^ int.from_bytes(expected, "big")
+    count = bin(d).count("1")
+    if not count:
+        return 0, None
+    rows = [
+        r
+        for r in range(headless.HEIGHT)
+        if actual[r * STRIDE : (r + 1) * STRIDE]
+        != expected[r * STRIDE : (r + 1) * STRIDE]
+    ]
+    cols = [
+        x
+        for r in rows
+        for x in range(headless.WIDTH)
+        if (actual[r * STRIDE + x // 8] ^ expected[r * STRIDE + x // 8]) >> (7 - x % 8)
+        & 1
+    ]
+    return count, (min(cols), rows[0], max(cols), rows[-1])
+
+
+def _render_all():
+    frames = {}
+    for name, ns, idx, page in _corpus():
+        frames[name] = headless.render(ns, idx, page)
+    return frames
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestGoldenImages(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = _render_all()
+        if UPDATE:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            for name, fb in cls.frames.items():
+                with open(_golden_path(name), "wb") as f:
+                    f.write(headless.to_pbm(fb))
+
+    def test_corpus_matches_goldens(self):
+        failures = []
+        for name, fb in sorted(self.frames.items()):
+            path = _golden_path(name)
+            if not os.path.exists(path):
+                failures.append("{}: no golden (run with UPDATE_GOLDEN=1)".format(name))
+                continue
+            with open(path, "rb") as f:
+                expected = headless.from_pbm(f.read())
+            count, box = _diff(fb, expected)
+            if count:
+                out = os.path.join(tempfile.gettempdir(), name + ".actual.png")
+                with open(out, "wb") as f:
+                    f.write(headless.to_png(fb))
+                failures.append(
+                    "{}: {} px differ in {} (actual: {})".format(name, count, box, out)
+                )
+        self.assertEqual(failures, [], "\n".join(failures))
+
+    def test_no_stale_goldens(self):
+        stored = {f[:-4] for f in os.listdir(GOLDEN_DIR) if f.endswith(".pbm")}
+        self.assertEqual(stored - set(self.frames), set())
+
+    def test_left_panel_gutter_is_clear(self):
+        # Text lives at x=4..143; the 4px before the divider must stay white.
+        for name, fb in self.frames.items():
+            for y in range(15, 126):
+                for x in range(144, 148):
+                    bit = fb[y * STRIDE + x // 8] >> (7 - x % 8) & 1
+                    self.assertEqual(bit, 1, "{}: ink at ({}, {})".format(name, x, y))
+
+    def test_map_panel_origin(self):
+        # Map border starts at MAP_X, MAP_Y: the divider column is solid black.
+        for name, fb in self.frames.items():
+            for y in range(14, 127):
+                bit = fb[y * STRIDE + 148 // 8] >> (7 - 148 % 8) & 1
+                self.assertEqual(bit, 0, "{}: divider broken at y={}".format(name, y))
+
+    def test_full_corpus_under_one_second(self):
+        t0 = time.perf_counter()
+        frames = _render_all()
+        for name, fb in frames.items():
+            with open(_golden_path(name), "rb") as f:
+                _diff(fb, headless.from_pbm(f.read()))
+        self.assertLess(time.perf_counter() - t0, 1.0)
+
+
+class TestDiff(unittest.TestCase):
+    def test_identical(self):
+        fb = bytes(4736)
+        self.assertEqual(_diff(fb, fb), (0, None))
+
+    def test_counts_and_locates(self):
+        a = bytearray(4736)
+        b = bytearray(4736)
+        b[10 * STRIDE + 2] = 0b00010001  # x=19 and x=23 on row 10
+        self.assertEqual(_diff(bytes(a), bytes(b)), (2, (19, 10, 23, 10)))
+
+    def test_pbm_round_trip(self):
+        fb = bytes(range(256)) * 18 + bytes(128)
+        self.assertEqual(headless.from_pbm(headless.to_pbm(fb)), fb)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
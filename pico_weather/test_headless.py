@@ -0,0 +1,260 @@
+"""
+Tests for the headless PicoGraphics renderer.
+Run: python3 -m pytest pico_weather/test_headless.py -v
+"""
+
+import sys
+import unittest
+
+import headless
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+BLACK, WHITE = 0, 15
+
+
+def _blank(pen=WHITE):
+    g = headless.HeadlessGraphics()
+    g.set_pen(pen)
+    g.clear()
+    return g
+
+
+def _black_pixels(g):
+    return {
+        (x, y) for y in range(g.height) for x in range(g.width) if not g.get_pixel(x, y)
+    }
+
+
+class TestFramebufferLayout(unittest.TestCase):
+    """Packed 1-bit, row-major, MSB first, set bit = white."""
+
+    def test_buffer_size(self):
+        g = headless.HeadlessGraphics()
+        self.assertEqual(len(g.buffer), 296 * 128 // 8)
+        self.assertEqual(headless.get_buffer_size(), len(g.buffer))
+
+    def test_clear_white_and_black(self):
+        g = _blank(WHITE)
+        self.assertEqual(set(g.buffer), {0xFF})
+        g.set_pen(BLACK)
+        g.clear()
+        self.assertEqual(set(g.buffer), {0x00})
+
+    def test_pixel_bit_order(self):
+        g = _blank(BLACK)
+        g.set_pen(WHITE)
+        g.pixel(0, 0)
+        g.pixel(9, 1)
+        self.assertEqual(g.buffer[0], 0x80)
+        self.assertEqual(g.buffer[37 + 1], 0x40)
+
+    def test_external_buffer_is_drawn_into(self):
+        fb = bytearray(headless.get_buffer_size())
+        g = headless.HeadlessGraphics(buffer=fb)
+        g.set_pen(WHITE)
+        g.rectangle(0, 0, 8, 1)
+        self.assertEqual(fb[0], 0xFF)
+
+
+class TestPrimitives(unittest.TestCase):
+    def test_rectangle(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.rectangle(10, 20, 3, 2)
+        expected = {(x, y) for x in range(10, 13) for y in range(20, 22)}
+        self.assertEqual(_black_pixels(g), expected)
+
+    def test_rectangle_clips(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.rectangle(290, 125, 20, 20)
+        self.assertEqual(len(_black_pixels(g)), 6 * 3)
+
+    def test_horizontal_line_excludes_end(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.line(4, 84, 143, 84)
+        px = _black_pixels(g)
+        self.assertIn((4, 84), px)
+        self.assertIn((142, 84), px)
+        self.assertNotIn((143, 84), px)
+
+    def test_vertical_line_excludes_end(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.line(148, 14, 148, 127)
+        self.assertEqual(len(_black_pixels(g)), 127 - 14)
+
+    def test_diagonal_line(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.line(0, 0, 10, 5)
+        px = _black_pixels(g)
+        self.assertEqual(len(px), 10)
+        self.assertIn((0, 0), px)
+        self.assertEqual(max(y for _, y in px), 4)
+
+    def test_circle_is_symmetric(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.circle(50, 50, 5)
+        px = _black_pixels(g)
+        self.assertIn((50, 50), px)
+        for x, y in px:
+            self.assertIn((100 - x, y), px)
+            self.assertIn((x, 100 - y), px)
+        self.assertEqual(max(x for x, _ in px), 55)
+
+    def test_circle_zero_radius(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.circle(3, 3, 0)
+        self.assertEqual(_black_pixels(g), {(3, 3)})
+
+
+class TestText(unittest.TestCase):
+    def test_measure_matches_drawn_extent(self):
+        for font in ("bitmap6", "bitmap8"):
+            for scale in (1, 3):
+                g = _blank()
+                g.set_pen(BLACK)
+                g.set_font(font)
+                g.text("H:14  L:8", 0, 0, scale=scale)
+                px = _black_pixels(g)
+                width = max(x for x, _ in px) + 1
+                self.assertEqual(width, g.measure_text("H:14  L:8", scale=scale))
+
+    def test_font_height(self):
+        g = _blank()
+        g.set_pen(BLACK)
+        g.set_font("bitmap8")
+        g.text("Hg", 0, 10, scale=2)
+        ys = [y for _, y in _black_pixels(g)]
+        self.assertGreaterEqual(min(ys), 10)
+        self.assertLess(max(ys), 10 + 8 * 2)
+
+    def test_white_text_on_black(self):
+        g = _blank(BLACK)
+        g.set_pen(WHITE)
+        g.set_font("bitmap6")
+        g.text("Cambridge", 3, 4, scale=1)
+        self.assertTrue(any(g.get_pixel(x, y) for x in range(60) for y in range(4, 10)))
+
+    def test_unknown_font_rejected(self):
+        with self.assertRaises(ValueError):
+            headless.HeadlessGraphics().set_font("serif")
+
+
+class TestPng(unittest.TestCase):
+    def test_png_signature_and_size(self):
+        png = headless.to_png(_blank().buffer)
+        self.assertTrue(png.startswith(b"\x89PNG\r\n\x1a\n"))
+        self.assertEqual(
+            png[16:24], (296).to_bytes(4, "big") + (128).to_bytes(4, "big")
+        )
+
+    @unittest.skipIf(PIL is None, "Pillow not installed")
+    def test_png_round_trip(self):
+        import io
+
+        from PIL import Image
+
+        g = _blank()
+        g.set_pen(BLACK)
+        g.rectangle(0, 0, 296, 14)
+        img = Image.open(io.BytesIO(headless.to_png(g.buffer)))
+        self.assertEqual(img.size, (296, 128))
+        self.assertEqual(img.convert("L").getpixel((5, 5)), 0)
+        self.assertEqual(img.convert("L").getpixel((5, 50)), 255)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestDrawCache(unittest.TestCase):
+    """pico_main.draw_cache rendered for real."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ns = headless.load_pico_main()
+        headless.fill_cache(cls.ns)
+
+    def test_stand_ins_do_not_leak(self):
+        pg = sys.modules.get("picographics")
+        self.assertIsNot(getattr(pg, "PicoGraphics", None), headless.HeadlessGraphics)
+        self.assertTrue(hasattr(sys.modules["gc"], "get_objects"))
+
+    def test_every_preset_renders(self):
+        for idx, entry in enumerate(self.ns["weather_cache"]):
+            self.assertIsNotNone(entry)
+            fb = headless.render(self.ns, idx)
+            self.assertEqual(len(fb), 4736)
+
+    def test_header_bar_and_divider(self):
+        g = self.ns["display"]
+        headless.render(self.ns, 2)
+        self.assertFalse(g.get_pixel(0, 0))
+        self.assertFalse(g.get_pixel(295, 13))
+        self.assertFalse(g.get_pixel(148, 60))
+        self.assertTrue(g.get_pixel(100, 120))
+
+    def test_single_update_per_draw(self):
+        g = self.ns["display"]
+        before = g.updates
+        headless.render(self.ns, 1)
+        self.assertEqual(g.updates, before + 1)
+
+    def test_cities_differ(self):
+        self.assertNotEqual(headless.render(self.ns, 1), headless.render(self.ns, 2))
+
+
+class TestHostScripts(unittest.TestCase):
+    """The scripts update_weather.py and weather_display.py push to the Pico."""
+
+    def record(self):
+        import json
+        import os
+
+        from providers import Wttr
+
+        path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "benchmarks",
+            "fixtures",
+            "wttr_in.json",
+        )
+        with open(path) as f:
+            return Wttr().parse(json.load(f))
+
+    def frame(self, fb):
+        g = headless.HeadlessGraphics(buffer=bytearray(fb))
+        return g, _black_pixels(g)
+
+    def test_update_weather(self):
+        import update_weather
+
+        w = update_weather.parse_weather(self.record(), "London")
+        g, black = self.frame(headless.render_script(update_weather.build_script(**w)))
+        self.assertIn((0, 0), black)  # header bar
+        self.assertIn((148, 60), black)  # today / tomorrow divider
+        self.assertNotIn((140, 60), black)
+
+    def test_weather_display(self):
+        import weather_display
+
+        w = weather_display.format_weather(self.record(), "London")
+        fb = headless.render_script(weather_display.build_pico_script(w))
+        g, black = self.frame(fb)
+        self.assertIn((0, 0), black)
+        self.assertIn((95, 60), black)  # divider
+        self.assertGreater(len(black), 1000)
+        w["temp"] = 7
+        self.assertNotEqual(
+            headless.render_script(weather_display.build_pico_script(w)), fb
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,214 @@
+"""
+Tests for hourly.py (ring storage, memory budget, sparkline) and its
+wiring into pico_main.
+Run: python3 -m pytest pico_weather/test_hourly.py -v
+"""
+
+import tracemalloc
+import unittest
+
+import headless
+import hourly
+from hourly import HOURS, NO_RAIN, PAGE_HOURS, HourlyRing
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+
+def _times(n, start_hour=8):
+    return ["2026-02-22T{:02d}:00".format((start_hour + k) % 24) for k in range(n)]
+
+
+class TestHourlyRing(unittest.TestCase):
+    def test_load_and_read_back(self):
+        r = HourlyRing()
+        r.load("2026-02-22T08:00", [5.4, 6.6, -2.5], [0.0, 1.25, None])
+        self.assertEqual(len(r), 3)
+        self.assertEqual([r.temp(k) for k in range(3)], [5, 7, -2])
+        self.assertEqual([r.rain_tenths(k) for k in range(3)], [0, 13, NO_RAIN])
+        self.assertEqual([r.hour(k) for k in range(3)], [8, 9, 10])
+
+    def test_typecodes(self):
+        r = HourlyRing()
+        self.assertEqual(r.temps.typecode, "b")
+        self.assertEqual(r.rain.typecode, "H")
+        self.assertEqual(len(r.temps), HOURS)
+
+    def test_clamps_to_storage_range(self):
+        r = HourlyRing(4)
+        r.push(300, 99999.0)
+        r.push(-300, -1.0)
+        self.assertEqual((r.temp(0), r.rain_tenths(0)), (127, NO_RAIN - 1))
+        self.assertEqual((r.temp(1), r.rain_tenths(1)), (-128, 0))
+
+    def test_push_wraps_and_advances_start_hour(self):
+        r = HourlyRing(4)
+        r.clear(22)
+        for t in range(6):
+            r.push(t, 0)
+        self.assertEqual(len(r), 4)
+        self.assertEqual([r.temp(k) for k in range(4)], [2, 3, 4, 5])
+        self.assertEqual(r.hour(0), 0)  # 22 + 2 wrapped past midnight
+
+    def test_load_truncates_and_reuses_arrays(self):
+        r = HourlyRing()
+        temps, rain = r.temps, r.rain
+        r.load(_times(72)[0], list(range(72)), [0.1] * 72)
+        self.assertEqual(len(r), HOURS)
+        self.assertIs(r.temps, temps)
+        self.assertIs(r.rain, rain)
+        r.load(_times(3)[0], [1, 2, 3], [])
+        self.assertEqual(len(r), 3)
+        self.assertEqual(r.rain_tenths(0), NO_RAIN)
+
+    def test_missing_temperature_repeats_previous(self):
+        r = HourlyRing()
+        r.load("2026-02-22T00:00", [None, 4.0, None], [0, 0, 0])
+        self.assertEqual([r.temp(k) for k in range(3)], [0, 4, 4])
+
+    def test_bad_time_defaults_to_midnight(self):
+        r = HourlyRing()
+        r.load("", [1.0], [0.0])
+        self.assertEqual(r.hour(0), 0)
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Ten cities of HOURS samples must fit HOURLY_BUDGET_BYTES."""
+
+    def _measure(self, build, filename):
+        """Bytes still held after build(), attributed to allocations in filename."""
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            data = build()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        only = [tracemalloc.Filter(True, filename)]
+        stats = after.filter_traces(only).compare_to(
+            before.filter_traces(only), "filename"
+        )
+        return data, sum(s.size_diff for s in stats if s.size_diff > 0)
+
+    def _filled_rings(self):
+        rings = [HourlyRing() for _ in range(10)]
+        for i, r in enumerate(rings):
+            r.load(
+                _times(HOURS)[0],
+                [i + k * 0.37 for k in range(HOURS)],
+                [k * 0.1 for k in range(HOURS)],
+            )
+        return rings
+
+    def test_ten_cities_within_budget(self):
+        _, used = self._measure(self._filled_rings, hourly.__file__)
+        self.assertLessEqual(used, hourly.HOURLY_BUDGET_BYTES)
+
+    def test_much_smaller_than_float_lists(self):
+        def floats():
+            return [
+                (
+                    [i + k * 0.37 for k in range(HOURS)],
+                    [k * 0.1 + 0.05 for k in range(HOURS)],
+                )
+                for i in range(10)
+            ]
+
+        _, rings = self._measure(self._filled_rings, hourly.__file__)
+        _, lists = self._measure(floats, __file__)
+        self.assertLess(rings * 3, lists)
+
+    def test_refresh_does_not_grow(self):
+        rings = self._filled_rings()
+
+        def refresh():
+            for r in rings:
+                r.load(_times(HOURS)[0], [3.3] * HOURS, [0.2] * HOURS)
+
+        _, used = self._measure(refresh, hourly.__file__)
+        self.assertEqual(used, 0)
+
+
+class _FakeResp:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        pass
+
+
+class TestPicoMainHourly(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+
+    def test_get_weather_requests_hourly(self):
+        urls = []
+
+        def get(url, timeout=None):
+            urls.append(url)
+            return _FakeResp(headless.SAMPLE_FORECAST)
+
+        self.ns["http_client"].get = get
+        self.ns["get_weather"](52.2, 0.12)
+        self.assertIn("hourly=temperature_2m,precipitation", urls[0])
+        self.assertIn("forecast_hours={}".format(HOURS), urls[0])
+
+    def test_fetch_fills_preallocated_ring(self):
+        ring = self.ns["hourly_cache"][2]
+        headless.fill_cache(self.ns)
+        self.assertIs(self.ns["hourly_cache"][2], ring)
+        self.assertEqual(len(ring), HOURS)
+        self.assertEqual(ring.hour(0), 8)
+
+    def test_fetch_without_hourly_keeps_ring(self):
+        headless.fill_cache(self.ns)
+        payload = dict(headless.SAMPLE_FORECAST)
+        del payload["hourly"]
+        self.ns["get_weather"] = lambda lat, lon: payload
+        self.ns["fetch_weather"](2)
+        self.assertEqual(len(self.ns["hourly_cache"][2]), HOURS)
+
+    def test_pages_cover_window(self):
+        self.assertEqual(hourly.PAGES * PAGE_HOURS, HOURS)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestDrawHourly(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        headless.fill_cache(self.ns)
+        self.g = self.ns["display"]
+
+    def _ink(self, x0, x1, y0, y1):
+        return sum(
+            not self.g.get_pixel(x, y) for x in range(x0, x1) for y in range(y0, y1)
+        )
+
+    def test_every_page_stays_in_left_panel(self):
+        for page in range(hourly.PAGES):
+            headless.render(self.ns, 1, page)
+            self.assertGreater(self._ink(4, 144, 16, 126), 100)
+            self.assertEqual(self._ink(144, 148, 15, 126), 0)
+
+    def test_hourly_view_differs_from_normal(self):
+        normal = headless.render(self.ns, 1)
+        self.assertNotEqual(headless.render(self.ns, 1, 0), normal)
+        self.assertNotEqual(
+            headless.render(self.ns, 1, 0), headless.render(self.ns, 1, 1)
+        )
+
+    def test_empty_ring_shows_placeholder(self):
+        self.ns["hourly_cache"][3].clear()
+        headless.render(self.ns, 3, 0)
+        self.assertGreater(self._ink(4, 60, 36, 44), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,369 @@
+"""
+Tests for http_client.py against a local socket server.
+Run: python3 -m pytest pico_weather/test_http_client.py -v
+"""
+
+import json
+import os
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+import headless
+import http_client
+from http_client import Client, split_url
+
+OPENSSL = shutil.which("openssl")
+
+DATA = {"hourly": {"temperature_2m": [round(i * 0.1, 1) for i in range(1000)]}}
+FORECAST = json.dumps(DATA).encode()
+
+
+def reply(body, status=200, length=True, headers=b""):
+    head = b"HTTP/1.1 %d X\r\nContent-Type: application/json\r\n" % status
+    if length:
+        head += b"CONTENT-LENGTH: %d\r\n" % len(body)
+    return head + headers + b"\r\n" + body
+
+
+def chunked(body, size):
+    """body as a chunked transfer-encoded reply."""
+    out = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+    for i in range(0, len(body), size):
+        part = body[i : i + size]
+        out += b"%x;ext=1\r\n" % len(part) + part + b"\r\n"
+    return out + b"0\r\n\r\n"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    rbufsize = 0  # keep the server's own buffers out of the traced peak
+
+    def handle(self):
+        server = self.server
+        server.accepts += 1
+        served = 0
+        while served != server.per_connection:
+            request = b""
+            while not request.endswith(b"\r\n\r\n"):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                request += line
+            server.requests.append(request)
+            data = server.reply(request) if callable(server.reply) else server.reply
+            for i in range(0, len(data), server.chunk):  # several reads
+                self.wfile.write(data[i : i + server.chunk])
+                self.wfile.flush()
+            served += 1
+        # then drop the connection without saying so, as an idle timeout would
+
+
+class Server(socketserver.ThreadingTCPServer):
+    """Local HTTP(S) server counting the connections it accepts."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, tls=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.tls = tls  # server-side SSLContext
+        self.accepts = 0
+        self.per_connection = -1  # requests before dropping the connection
+        self.requests = []
+        self.reply = reply(b"{}")
+        self.chunk = 1000
+        self.thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        if self.tls is not None:
+            sock = self.tls.wrap_socket(sock, server_side=True)
+        return sock, addr
+
+    def url(self, path="/"):
+        scheme = "https" if self.tls else "http"
+        return "{}://127.0.0.1:{}{}".format(scheme, self.server_address[1], path)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def server_tls_context(tmp):
+    """Server SSLContext with a throwaway self-signed certificate."""
+    cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+    subprocess.run(
+        [OPENSSL, "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True,
+        capture_output=True,
+    )
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+
+class ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = Server()
+        self.addCleanup(self.server.stop)
+        self.client = Client()
+        self.addCleanup(self.client.close)
+
+
+class TestSplitUrl(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(
+            split_url("https://api.open-meteo.com/v1/forecast?latitude=52.2"),
+            (True, "api.open-meteo.com", 443, "/v1/forecast?latitude=52.2"),
+        )
+        self.assertEqual(
+            split_url("http://ip-api.com/json/?fields=lat"),
+            (False, "ip-api.com", 80, "/json/?fields=lat"),
+        )
+        self.assertEqual(
+            split_url("http://localhost:8080"), (False, "localhost", 8080, "/")
+        )
+        with self.assertRaises(ValueError):
+            split_url("ftp://example.com/")
+
+
+class TestGet(ServerTestCase):
+    def test_json(self):
+        self.server.reply = reply(FORECAST)
+        r = self.client.get(self.server.url("/v1/forecast?x=1"))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), json.loads(FORECAST))
+        self.assertTrue(
+            self.server.requests[0].startswith(b"GET /v1/forecast?x=1 HTTP/1.1\r\n")
+        )
+        self.assertIn(b"Host: 127.0.0.1\r\n", self.server.requests[0])
+
+    def test_body_is_view_into_pool(self):
+        self.server.reply = reply(b'{"a": 1}')
+        r = self.client.get(self.server.url())
+        self.assertIsInstance(r.body, memoryview)
+        self.assertIs(r.body.obj, self.client.buf)
+        self.assertEqual(bytes(r.body), b'{"a": 1}')
+
+    def test_read_to_close_without_length(self):
+        self.server.reply = reply(FORECAST, length=False)
+        self.server.per_connection = 1
+        self.assertEqual(
+            self.client.get(self.server.url()).json(), json.loads(FORECAST)
+        )
+
+    def test_headers_split_across_reads(self):
+        self.server.reply = reply(b"[1, 2]", headers=b"X-Pad: " + b"p" * 50 + b"\r\n")
+        self.server.chunk = 7
+        self.assertEqual(self.client.get(self.server.url()).json(), [1, 2])
+
+    def test_error_status(self):
+        self.server.reply = reply(b'{"error": true}', status=429)
+        r = self.client.get(self.server.url())
+        self.assertEqual((r.status_code, r.retry_after), (429, -1))
+
+    def test_retry_after(self):
+        self.server.reply = reply(b"{}", status=503, headers=b"retry-AFTER: 120\r\n")
+        self.assertEqual(self.client.get(self.server.url()).retry_after, 120)
+        self.server.reply = reply(b"{}", headers=b"Retry-After: 120\r\n")
+        self.assertEqual(self.client.get(self.server.url()).retry_after, -1)
+
+    def test_too_large(self):
+        self.server.reply = reply(b"[" + b"0," * 600 + b"0]")
+        with self.assertRaises(OSError):
+            Client(size=1024).get(self.server.url())
+
+    def test_truncated(self):
+        self.server.reply = reply(FORECAST)[:-10]
+        self.server.per_connection = 1
+        with self.assertRaises(OSError):
+            self.client.get(self.server.url())
+
+    def test_module_get_shares_one_client(self):
+        self.server.reply = reply(b"[]")
+        r1 = http_client.get(self.server.url())
+        buf = http_client._client.buf
+        r2 = http_client.get(self.server.url())
+        self.assertIs(r1, r2)
+        self.assertIs(http_client._client.buf, buf)
+
+
+class TestPool(ServerTestCase):
+    def test_no_allocation_per_request(self):
+        """Fetching more cities allocates nothing beyond the pool."""
+        self.server.reply = reply(FORECAST)
+        url = self.server.url()
+        self.client.get(url)  # warm up sockets, DNS and the thread
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            for _ in range(20):
+                r = self.client.get(url)
+                self.assertEqual(len(r.body), len(FORECAST))
+            after = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            self.client.get(url)
+            peak = tracemalloc.get_traced_memory()[1] - base
+        finally:
+            tracemalloc.stop()
+        only = [tracemalloc.Filter(True, http_client.__file__)]
+        grown = sum(
+            s.size_diff
+            for s in after.filter_traces(only).compare_to(
+                before.filter_traces(only), "filename"
+            )
+        )
+        self.assertLess(grown, 1024)  # nothing kept per request
+        # A body copy would be 5+ KB; sockets and the server thread are not
+        self.assertGreater(len(FORECAST), 5000)
+        self.assertLess(peak, len(FORECAST) // 2)
+
+
+class TestKeepAlive(ServerTestCase):
+    def get_all(self, n, url=None):
+        for _ in range(n):
+            self.assertEqual(self.client.get(url or self.server.url()).json(), {})
+
+    def test_one_connection_per_cycle(self):
+        self.get_all(6)
+        self.assertEqual(self.server.accepts, 1)
+        self.assertEqual((self.client.connects, self.client.requests), (1, 6))
+
+    def test_reconnects_when_server_drops(self):
+        self.server.per_connection = 2
+        self.get_all(5)
+        self.assertEqual(self.server.accepts, 3)
+        self.assertEqual(self.client.connects, 3)
+        self.assertEqual(len(self.server.requests), 5)  # none sent twice
+
+    def test_connection_close_honoured(self):
+        self.server.reply = reply(b"{}", headers=b"Connection: close\r\n")
+        self.server.per_connection = 1
+        self.get_all(3)
+        self.assertEqual(self.server.accepts, 3)
+
+    def test_http_10_reply_not_reused(self):
+        self.server.reply = b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\n\r\n{}"
+        self.server.per_connection = 1
+        self.get_all(2)
+        self.assertEqual(self.server.accepts, 2)
+
+    def test_other_host_reconnects(self):
+        other = Server()
+        self.addCleanup(other.stop)
+        self.get_all(2)
+        self.get_all(2, other.url())
+        self.get_all(1)
+        self.assertEqual((self.server.accepts, other.accepts), (2, 1))
+
+    def test_chunked(self):
+        self.server.reply = chunked(FORECAST, 1500)
+        self.server.chunk = 7 * 97  # chunk framing split across reads
+        for _ in range(3):
+            r = self.client.get(self.server.url())
+            self.assertEqual(len(r.body), len(FORECAST))
+            self.assertEqual(bytes(r.body), FORECAST)
+        self.assertEqual(self.server.accepts, 1)
+
+    def test_refused_connection_raises(self):
+        url = self.server.url()
+        self.server.stop()
+        with self.assertRaises(OSError):
+            self.client.get(url)
+
+
+@unittest.skipIf(OPENSSL is None, "openssl not installed")
+class TestTLS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.context = server_tls_context(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.server = Server(tls=self.context)
+        self.addCleanup(self.server.stop)
+        self.server.reply = reply(FORECAST)
+        self.client = Client()
+        self.addCleanup(self.client.close)
+
+    def test_one_handshake_per_cycle(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.server.url()).json(), DATA)
+        self.assertEqual(self.server.accepts, 1)
+        self.assertEqual(self.client.handshakes, 1)
+
+    def test_handshake_again_after_drop(self):
+        self.server.per_connection = 3
+        for _ in range(5):
+            self.client.get(self.server.url())
+        self.assertEqual(self.client.handshakes, 2)
+        self.assertEqual(self.server.accepts, 2)
+
+
+class _Wifi:
+    def connect(self):
+        return True
+
+    def power_down(self):
+        pass
+
+
+@unittest.skipIf(OPENSSL is None, "openssl not installed")
+class TestPicoMainRefresh(unittest.TestCase):
+    """A refresh cycle against local stand-ins for ip-api and Open-Meteo."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.wx = Server(tls=server_tls_context(tmp.name))
+        self.wx.reply = reply(json.dumps(headless.SAMPLE_FORECAST).encode())
+        self.loc = Server()
+        self.loc.reply = reply(b'{"lat": 52.2, "lon": 0.12, "city": "Cambridge"}')
+        for s in (self.wx, self.loc):
+            self.addCleanup(s.stop)
+        ports = {443: self.wx.server_address, 80: self.loc.server_address}
+        getaddrinfo = socket.getaddrinfo
+        self.addCleanup(setattr, socket, "getaddrinfo", getaddrinfo)
+        socket.getaddrinfo = lambda host, port, *a: getaddrinfo(*ports[port], *a)
+        self.addCleanup(setattr, http_client, "_client", None)
+        http_client._client = None
+        self.ns = headless.load_pico_main(modules={"http_client": http_client})
+        self.ns["wifi"] = _Wifi()
+
+    def test_refresh_reuses_tls_session(self):
+        ns = self.ns
+        self.assertTrue(ns["refresh_all"]())
+        n = len(ns["PRESET_CITIES"])
+        self.assertTrue(all(ns["weather_cache"]))
+        self.assertEqual(ns["weather_cache"][0]["city"], "Cambridge")
+        self.assertEqual(
+            http_client.stats(), {"connects": 2, "handshakes": 1, "requests": n + 1}
+        )
+        self.assertEqual((self.wx.accepts, len(self.wx.requests)), (1, n))
+        self.assertIsNone(http_client._client.sock)  # closed before power-down
+
+
+class TestPicoMain(unittest.TestCase):
+    def test_fetches_through_http_client(self):
+        ns = headless.load_pico_main()
+        self.assertIs(ns["http_client"].get, headless._offline)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,93 @@
+"""
+Tests for the pico_main layout cache: memoised strings/widths per cache
+entry and the static background snapshot restored into _FB.
+Run: python3 -m pytest pico_weather/test_layout.py -v
+"""
+
+import os
+import sys
+import unittest
+
+import headless
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+)
+
+import bench_layout  # noqa: E402
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestLayoutCache(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        headless.fill_cache(self.ns)
+
+    def test_layout_memoised_per_entry(self):
+        headless.render(self.ns, 1)
+        layout = self.ns["_layouts"][1][1]
+        headless.render(self.ns, 1)
+        self.assertIs(self.ns["_layouts"][1][1], layout)
+
+    def test_new_entry_invalidates_layout(self):
+        headless.render(self.ns, 1)
+        old = self.ns["_layouts"][1][1]
+        self.ns["fetch_weather"](1)
+        self.ns["weather_cache"][1]["desc"] = "Fog"
+        headless.render(self.ns, 1)
+        layout = self.ns["_layouts"][1][1]
+        self.assertIsNot(layout, old)
+        self.assertEqual(layout[2][0][0], "Fog")
+
+    def test_snapshot_frame_matches_full_redraw(self):
+        for page in (None, 0):
+            for idx in (1, 4):
+                self.ns["_backgrounds"].clear()
+                self.ns["_layouts"].clear()
+                fresh = headless.render(self.ns, idx, page)
+                self.assertIn(0 if page is None else 1, self.ns["_backgrounds"])
+                headless.render(self.ns, 2, page)  # leave other content behind
+                self.assertEqual(headless.render(self.ns, idx, page), fresh)
+
+    def test_without_framebuffer_no_snapshot(self):
+        self.ns["_FB"] = None
+        expected = headless.render(self.ns, 3)
+        self.assertEqual(self.ns["_backgrounds"], {})
+        self.assertEqual(headless.render(self.ns, 3), expected)
+
+    def test_long_text_fits_panel(self):
+        self.ns["weather_cache"][4]["tmr_desc"] = "Thunderstorm with heavy hail"
+        headless.render(self.ns, 4)
+        # _fit measures in the font being drawn, so this holds on the device too
+        for text, x, _, w in self.ns["_layouts"][4][1][2]:
+            self.assertLessEqual(x + w, self.ns["PANEL_W"], text)
+
+    def test_fit_stops_before_divider(self):
+        ns = self.ns
+        ns["display"].set_font("bitmap6")
+        for n in range(1, 40):
+            for x in (4, 22, 27):
+                text, w = ns["_fit"]("Mi" * n, x)
+                self.assertLessEqual(x + w, ns["PANEL_W"], (n, x))
+                self.assertEqual(w, ns["_text_w"](text))
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestDrawCalls(unittest.TestCase):
+    def test_cached_frame_draws_less(self):
+        cold, cold_peak, _ = bench_layout.measure(frames=1, cold=True)
+        warm, warm_peak, _ = bench_layout.measure(frames=1, cold=False)
+        self.assertLess(sum(warm.values()), sum(cold.values()))
+        self.assertEqual(warm.get("measure_text", 0), 0)
+        self.assertEqual(warm.get("blit", 0), 0)
+        self.assertEqual(warm["update"], 1)
+        self.assertLess(warm_peak, cold_peak)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+"""
+Tests for map_proj.py: the fixed-point projection and the generated
+city_dots table agree with the float reference within one pixel.
+Run: python3 -m pytest pico_weather/test_map_proj.py -v
+"""
+
+import random
+import unittest
+
+import city_dots
+import gen_city_dots
+import map_proj
+from city_db import read_csv
+
+TOWNS = read_csv(gen_city_dots.TOWNS_CSV)
+
+
+class TestTable(unittest.TestCase):
+    def test_checked_in_table_is_current(self):
+        with open(gen_city_dots.OUT) as f:
+            self.assertEqual(
+                f.read(),
+                gen_city_dots.generate(TOWNS),
+                "city_dots.py is stale: run gen_city_dots.py",
+            )
+
+    def test_packed_layout(self):
+        self.assertEqual(list(city_dots.NAMES), sorted(set(city_dots.NAMES)))
+        self.assertEqual(len(city_dots.DOTS), 2 * len(city_dots.NAMES))
+
+    def test_table_matches_runtime_projection(self):
+        for name, lat, lon in TOWNS:
+            tx, ty = map_proj.city_dot(name)
+            rx, ry = map_proj.latlon_to_dot(lat, lon)
+            self.assertLessEqual(abs(tx - rx), 1, name)
+            self.assertLessEqual(abs(ty - ry), 1, name)
+            self.assertEqual((tx, ty), map_proj.project(lat, lon), name)
+
+    def test_lookup(self):
+        first, last = city_dots.NAMES[0], city_dots.NAMES[-1]
+        self.assertEqual(map_proj.city_dot(first), tuple(city_dots.DOTS[:2]))
+        self.assertEqual(map_proj.city_dot(last), tuple(city_dots.DOTS[-2:]))
+        self.assertIsNone(map_proj.city_dot("Atlantis"))
+        self.assertIsNone(map_proj.city_dot(""))
+
+    def test_generate_round_trip(self):
+        ns = {}
+        exec(gen_city_dots.generate([("B", 51.0, 0.0), ("A", 57.0, -4.0)]), ns)
+        self.assertEqual(ns["NAMES"], ("A", "B"))
+        self.assertEqual(
+            ns["DOTS"],
+            bytes(map_proj.project(57.0, -4.0) + map_proj.project(51.0, 0.0)),
+        )
+
+
+class TestFixedPoint(unittest.TestCase):
+    def test_within_one_pixel_of_float(self):
+        rng = random.Random(5)
+        exact = 0
+        n = 20000
+        for _ in range(n):
+            lat, lon = rng.uniform(48.0, 62.0), rng.uniform(-8.0, 3.0)
+            fx, fy = map_proj.project(lat, lon)
+            x, y = map_proj.latlon_to_dot(lat, lon)
+            self.assertLessEqual(abs(fx - x), 1, (lat, lon))
+            self.assertLessEqual(abs(fy - y), 1, (lat, lon))
+            exact += (fx, fy) == (x, y)
+        self.assertGreater(exact / n, 0.99)
+
+    def test_clamped(self):
+        x0 = map_proj.MAP_X + map_proj._X_OFF
+        y0 = map_proj.MAP_Y + map_proj._Y_OFF
+        self.assertEqual(map_proj.latlon_to_dot(90.0, -180.0), (x0, y0))
+        self.assertEqual(
+            map_proj.latlon_to_dot(-90.0, 180.0),
+            (x0 + map_proj._MAP_W, y0 + map_proj._MAP_H),
+        )
+
+    def test_integer_results(self):
+        x, y = map_proj.latlon_to_dot(52.205, 0.122)
+        self.assertIs(type(x), int)
+        self.assertIs(type(y), int)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,345 @@
+"""
+Tests for map_server: render/encode split, /metrics after a scripted load,
+/map size and zoom parameters and their buckets, and pre-generated maps
+served from the cache.
+Run: python3 -m pytest pico_weather/test_map_server.py -v
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import map_server
+    import PIL
+    from map_cache import MapCache, cache_key
+    from metrics import parse_exposition
+    from tile_store import TileStore
+except ImportError:  # map_server needs Pillow
+    PIL = None
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestMakeMap(unittest.TestCase):
+    def test_render_then_encode_matches_make_uk_map(self):
+        img = map_server.render_uk_map(52.2, 0.12, "Cambridge")
+        self.assertEqual(img.size, (148, 108))
+        jpeg = map_server.encode_jpeg(img)
+        self.assertTrue(jpeg.startswith(b"\xff\xd8"))
+        self.assertEqual(jpeg, map_server.make_uk_map(52.2, 0.12, "Cambridge"))
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestMetricsEndpoint(unittest.TestCase):
+    MAPS = 40
+    BAD = 5
+    MISSING = 3
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = map_server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), map_server.MapHandler
+        )
+        cls.base = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.before = cls.scrape()
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.sizes = cls.load()
+        # Handlers finish their accounting just after the client has the body
+        for _ in range(200):
+            cls.after = cls.scrape()
+            if cls.after[("mapserver_in_flight_requests", ())] == 1:
+                break
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    @classmethod
+    def get(cls, path):
+        try:
+            with urllib.request.urlopen(cls.base + path, timeout=10) as r:
+                return r.status, r.read()
+        except urllib.error.HTTPError as e:
+            return e.code, b""
+
+    @classmethod
+    def scrape(cls):
+        status, body = cls.get("/metrics")
+        assert status == 200
+        return parse_exposition(body.decode())
+
+    @classmethod
+    def load(cls):
+        """MAPS good /map requests from 8 threads plus bad and unknown paths."""
+        paths = [
+            "/map?lat={}&lon={}&city=C{}".format(50 + k % 9, -4 + k % 6, k)
+            for k in range(cls.MAPS)
+        ]
+        paths += ["/map?lat=oops&lon=1"] * cls.BAD
+        paths += ["/nope"] * cls.MISSING
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(cls.get, paths))
+        statuses = [s for s, _ in results]
+        assert statuses.count(200) == cls.MAPS, statuses
+        return [len(body) for s, body in results if s == 200]
+
+    def delta(self, name, **labels):
+        key = (name, tuple(labels.items()))
+        return self.after.get(key, 0) - self.before.get(key, 0)
+
+    def test_request_counts(self):
+        self.assertEqual(
+            self.delta("mapserver_requests_total", path="/map", code="200"),
+            self.MAPS,
+        )
+        self.assertEqual(
+            self.delta("mapserver_requests_total", path="/map", code="500"),
+            self.BAD,
+        )
+        self.assertEqual(
+            self.delta("mapserver_requests_total", path="other", code="404"),
+            self.MISSING,
+        )
+        # Earlier scrapes are counted once they have been answered
+        self.assertGreaterEqual(
+            self.delta("mapserver_requests_total", path="/metrics", code="200"), 1
+        )
+
+    def test_errors_by_stage(self):
+        self.assertEqual(self.delta("mapserver_errors_total", stage="params"), self.BAD)
+        self.assertEqual(self.delta("mapserver_errors_total", stage="render"), 0)
+
+    def test_latency_histograms(self):
+        for name in ("mapserver_render_seconds", "mapserver_encode_seconds"):
+            self.assertEqual(self.delta(name + "_count"), self.MAPS)
+            self.assertEqual(self.delta(name + "_bucket", le="+Inf"), self.MAPS)
+            self.assertGreater(self.delta(name + "_sum"), 0)
+        self.assertEqual(
+            self.delta("mapserver_request_seconds_count", path="/map"),
+            self.MAPS + self.BAD,
+        )
+
+    def test_bytes_sent(self):
+        self.assertEqual(
+            self.delta("mapserver_bytes_sent_total", path="/map"), sum(self.sizes)
+        )
+
+    def test_in_flight_is_only_the_scrape(self):
+        self.assertEqual(self.after[("mapserver_in_flight_requests", ())], 1)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestParams(unittest.TestCase):
+    def test_defaults(self):
+        a = map_server.map_params(52.2053, 0.1218, "Cambridge")
+        self.assertEqual(a, (52.21, 0.12, "Cambridge", 148, 108, 1, None, None))
+        self.assertEqual(
+            map_server.make_uk_map(*a), map_server.make_uk_map(52.21, 0.12, "Cambridge")
+        )
+
+    def test_buckets(self):
+        def key(*args, **kwargs):
+            return cache_key(map_server.map_params(*args, **kwargs))
+
+        cam = (52.2053, 0.1218, "Cambridge")
+        self.assertEqual(key(*cam), key(52.2071, 0.1249, "Cambridge"))
+        self.assertNotEqual(key(*cam), key(52.2053, 0.1218, "Camb."))
+        self.assertEqual(key(*cam, width=149, height=107), key(*cam))
+        self.assertEqual(key(*cam, zoom=1, centre=(55, -3)), key(*cam))
+        self.assertEqual(key(*cam, zoom=3.5), key(*cam, zoom=4))
+        # Neighbouring towns share a zoomed view's centre
+        self.assertEqual(
+            map_server.map_params(*cam, zoom=4)[6:],
+            map_server.map_params(52.25, 0.1, "Histon", zoom=4)[6:],
+        )
+
+    def test_clamped(self):
+        p = map_server.map_params(50.1, -5.5, "Penzance", 5000, 1, zoom=100)
+        self.assertEqual(p[3:6], (map_server.MAX_SIZE, map_server.MIN_SIZE, 16))
+        lon_min, _, lat_min, _ = map_server.view_bounds(*p[5:])
+        self.assertGreaterEqual(lon_min, map_server.LON_MIN - 1e-9)
+        self.assertGreaterEqual(lat_min, map_server.LAT_MIN - 1e-9)
+        self.assertEqual(map_server.map_params(50.1, -5.5, "P", zoom=0.2)[5], 1)
+
+    def test_zoomed_render(self):
+        p = map_server.map_params(52.2053, 0.1218, "Cambridge", 296, 128, zoom=4)
+        img = map_server.render_uk_map(*p)
+        self.assertEqual(img.size, (296, 128))
+        # The marker sits near the middle of a view centred on it
+        x, y = map_server.coord_to_px(
+            p[0], p[1], 296, 128, bounds=map_server.view_bounds(*p[5:])
+        )
+        self.assertLess(abs(x - 148), 296 / map_server.CENTRE_STEPS)
+        self.assertLess(abs(y - 64), 128 / map_server.CENTRE_STEPS)
+        self.assertNotEqual(img.tobytes(), map_server.render_uk_map(*p[:5]).tobytes())
+
+
+def renders():
+    state = map_server.RENDER_SECONDS.snapshot().get(())
+    return state[2] if state else 0
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestCache(unittest.TestCase):
+    PLACES = [("Cambridge", 52.2053, 0.1218), ("York", 53.959, -1.081)]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MapCache(self.tmp.name)
+        self.serve()
+
+    def serve(self, keep=(), budget=100):
+        handler = type(
+            "Handler",
+            (map_server.MapHandler,),
+            {
+                "cache": self.cache,
+                "keep": set(keep),
+                "budget": map_server.StoreBudget(budget),
+            },
+        )
+        self.server = map_server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def cached(self, params):
+        found = self.cache.get(cache_key(params))
+        if isinstance(found, str):
+            with open(found, "rb") as f:
+                return f.read()
+        return bytes(found)
+
+    def get_map(self, query):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with urllib.request.urlopen(self.base + "/map?" + query, timeout=10) as r:
+                return r.read()
+
+    def test_pregen(self):
+        self.assertEqual(map_server.pregen(self.PLACES, self.cache, 2), 2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(map_server.pregen(self.PLACES, self.cache, 2), 0)
+        params = map_server.map_params(52.2053, 0.1218, "Cambridge")
+        self.assertEqual(self.cached(params), map_server.make_uk_map(*params))
+        for _, _, files in os.walk(self.tmp.name):
+            self.assertFalse([f for f in files if f.endswith(".tmp")])
+
+    def test_served_without_rendering(self):
+        map_server.pregen(self.PLACES, self.cache, 1)
+        before = renders()
+        hits = map_server.CACHE_LOOKUPS.value(result="hit")
+        body = self.get_map("lat=52.2053&lon=0.1218&city=Cambridge")
+        params = map_server.map_params(52.2053, 0.1218, "Cambridge")
+        self.assertEqual(body, map_server.make_uk_map(*params))
+        self.assertEqual(map_server.CACHE_LOOKUPS.value(result="hit"), hits + 1)
+        self.assertEqual(renders(), before)
+
+    def test_size_and_zoom_requests(self):
+        from PIL import Image
+
+        q = "lat=52.2053&lon=0.1218&city=Cambridge&width=295&height=129&zoom=4"
+        body = self.get_map(q)
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (296, 128))
+        misses = map_server.CACHE_LOOKUPS.value(result="miss")
+        same = q.replace("295", "297") + "&centre=52.25,0.05"
+        self.assertEqual(self.get_map(same), body)  # the same buckets
+        self.assertEqual(map_server.CACHE_LOOKUPS.value(result="miss"), misses)
+        with self.assertRaises(urllib.error.HTTPError):
+            self.get_map("lat=52.2&lon=0.1&zoom=x")
+
+    def test_miss_rendered_once(self):
+        misses = map_server.CACHE_LOOKUPS.value(result="miss")
+        first = self.get_map("lat=51.5&lon=-0.12&city=London")
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.get_map("lat=51.5&lon=-0.12&city=London"), first)
+        self.assertEqual(map_server.CACHE_LOOKUPS.value(result="miss"), misses + 1)
+
+    def test_store_bounded(self):
+        # Past the budget only the --cities maps are kept; the rest render
+        self.server.shutdown()
+        self.server.server_close()
+        self.serve(map_server.place_keys(self.PLACES[:1]), budget=1)
+        full = map_server.CACHE_STORES.value(result="full")
+        london = self.get_map("lat=51.5&lon=-0.12&city=London")
+        for name in ("Leeds", "Bath", "London"):
+            self.get_map("lat=51.5&lon=-0.12&city=" + name)
+        self.get_map("lat=52.2053&lon=0.1218&city=Cambridge")
+        self.assertEqual(len(self.cache), 2)  # London, then Cambridge
+        self.assertEqual(map_server.CACHE_STORES.value(result="full"), full + 2)
+        before = renders()
+        self.assertEqual(self.get_map("lat=51.5&lon=-0.12&city=London"), london)
+        self.get_map("lat=51.5&lon=-0.12&city=Bath")
+        self.get_map("lat=52.2053&lon=0.1218&city=Cambridge")
+        self.assertEqual(renders(), before + 1)  # Bath only
+
+    def where(self):
+        """compact's arguments for this cache, and a fresh view of it."""
+        return ["--cache", self.tmp.name], MapCache(self.tmp.name)
+
+    def test_compact_drops_unlisted(self):
+        self.get_map("lat=51.5&lon=-0.12&city=London")
+        map_server.pregen(self.PLACES, self.cache, 1)
+        self.assertEqual(len(self.cache), 3)
+        csv = os.path.join(self.tmp.name, "keep.csv")
+        with open(csv, "w") as f:
+            f.write("name,lat,lon\n")
+            f.writelines("{},{},{}\n".format(*p) for p in self.PLACES)
+        args, _ = self.where()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            map_server.main(["compact", "--cities", csv] + args)
+        self.assertIn(": 3 maps, ", out.getvalue())
+        args, cache = self.where()
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(
+            cache.get(cache_key(map_server.map_params(51.5, -0.12, "London")))
+        )
+
+
+class TestStore(TestCache):
+    """The same, with maps in a TileStore file instead of a directory."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TileStore(os.path.join(self.tmp.name, "maps.tiles"))
+        self.serve()
+
+    def tearDown(self):
+        self.cache.close()
+        super().tearDown()
+
+    def where(self):
+        path = os.path.join(self.tmp.name, "maps.tiles")
+        store = TileStore(path)
+        self.addCleanup(store.close)
+        return ["--store", path], store
+
+    def test_restart_serves_cached(self):
+        map_server.pregen(self.PLACES, self.cache, 1)
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.close()
+        self.cache = TileStore(os.path.join(self.tmp.name, "maps.tiles"))
+        self.serve()
+        before = renders()
+        body = self.get_map("lat=53.959&lon=-1.081&city=York")
+        self.assertEqual(body, map_server.make_uk_map(53.96, -1.08, "York"))
+        self.assertEqual(renders(), before)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
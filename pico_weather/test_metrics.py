@@ -0,0 +1,99 @@
+"""
+Tests for metrics.py (counters, gauges, histograms and text exposition).
+Run: python3 -m pytest pico_weather/test_metrics.py -v
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry, parse_exposition
+
+
+class TestCounter(unittest.TestCase):
+    def test_inc_with_labels(self):
+        c = Counter("reqs_total", "Requests", ("path", "code"))
+        c.inc(path="/map", code=200)
+        c.inc(3, path="/map", code=200)
+        c.inc(path="/x", code=404)
+        self.assertEqual(c.value(path="/map", code=200), 4)
+        self.assertEqual(c.value(path="/x", code=404), 1)
+        self.assertEqual(c.value(path="/y", code=404), 0)
+
+    def test_wrong_labels_rejected(self):
+        c = Counter("reqs_total", "Requests", ("path",))
+        with self.assertRaises(ValueError):
+            c.inc(code=200)
+
+    def test_gauge_up_down(self):
+        g = Gauge("in_flight", "In flight")
+        g.inc()
+        g.inc()
+        g.dec()
+        self.assertEqual(g.value(), 1)
+
+    def test_threads_lose_no_updates(self):
+        c = Counter("n_total", "n")
+        h = Histogram("lat_seconds", "lat", buckets=(0.5,))
+
+        def work():
+            for _ in range(5000):
+                c.inc()
+                h.observe(0.25)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(c.value(), 40000)
+        counts, total, n = h.snapshot()[()]
+        self.assertEqual((counts, n), ([40000, 0], 40000))
+        self.assertAlmostEqual(total, 10000.0)
+
+    def test_writer_folds_backlog(self):
+        c = Counter("n_total", "n")
+        with mock.patch.object(metrics, "FOLD_AT", 10):
+            for _ in range(25):
+                c.inc()
+            self.assertLessEqual(len(c._pending), 10)
+        self.assertEqual(c.value(), 25)
+
+
+class TestExposition(unittest.TestCase):
+    def test_histogram_buckets_cumulative(self):
+        h = Histogram("render_seconds", "Render", buckets=(0.01, 0.1))
+        for v in (0.005, 0.05, 0.05, 3.0):
+            h.observe(v)
+        text = Registry(h).exposition()
+        self.assertIn("# TYPE render_seconds histogram", text)
+        m = parse_exposition(text)
+        self.assertEqual(m[("render_seconds_bucket", (("le", "0.01"),))], 1)
+        self.assertEqual(m[("render_seconds_bucket", (("le", "0.1"),))], 3)
+        self.assertEqual(m[("render_seconds_bucket", (("le", "+Inf"),))], 4)
+        self.assertEqual(m[("render_seconds_count", ())], 4)
+        self.assertAlmostEqual(m[("render_seconds_sum", ())], 3.105)
+
+    def test_counter_lines(self):
+        c = Counter("reqs_total", "Requests", ("path", "code"))
+        c.inc(2, path="/map", code=200)
+        text = Registry(c).exposition()
+        self.assertEqual(
+            text,
+            "# HELP reqs_total Requests\n"
+            "# TYPE reqs_total counter\n"
+            'reqs_total{path="/map",code="200"} 2\n',
+        )
+
+    def test_registry_order(self):
+        a = Counter("a_total", "A")
+        b = Gauge("b", "B")
+        reg = Registry(a)
+        reg.register(b)
+        text = reg.exposition()
+        self.assertLess(text.index("a_total"), text.index("# HELP b "))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,272 @@
+"""
+Tests for perf.py and the spans pico_main records with it.
+Run: python3 -m pytest pico_weather/test_perf.py -v
+"""
+
+import threading
+import time
+import tracemalloc
+import types
+import unittest
+
+import headless
+import perf
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+
+class PerfTestCase(unittest.TestCase):
+    def setUp(self):
+        perf.reset()
+        perf.enable()
+        self.addCleanup(perf.reset)
+        self.addCleanup(perf.enable, False)
+
+
+class TestRecorder(PerfTestCase):
+    def test_span_recorded(self):
+        t = perf.start()
+        time.sleep(0.002)
+        perf.stop("work", t)
+        (name, us, free), *rest = perf.spans()
+        self.assertEqual((name, rest), ("work", []))
+        self.assertGreaterEqual(us, 2000)
+        self.assertEqual(perf.low_free, free)
+
+    def test_ring_keeps_latest_oldest_first(self):
+        for k in range(perf.SIZE + 5):
+            perf.stop("s{}".format(k), perf.start())
+        names = [n for n, _, _ in perf.spans()]
+        self.assertEqual(len(names), perf.SIZE)
+        self.assertEqual(names[0], "s5")
+        self.assertEqual(names[-1], "s{}".format(perf.SIZE + 4))
+
+    def test_summary_and_counters(self):
+        for _ in range(3):
+            perf.stop("a", perf.start())
+        perf.stop("b", perf.start())
+        perf.count("refresh")
+        perf.count("refresh", 2)
+        summary = perf.summary()
+        self.assertEqual(summary["a"][0], 3)
+        self.assertEqual(summary["b"][0], 1)
+        self.assertEqual(perf.counters, {"refresh": 3})
+
+    def test_dump(self):
+        perf.stop("a", perf.start())
+        perf.count("refresh")
+        lines = []
+        perf.dump(lines.append)
+        self.assertEqual(lines[0], "perf: 1 spans")
+        self.assertTrue(lines[1].startswith("span a "))
+        self.assertTrue(lines[2].startswith("sum a n=1 "))
+        self.assertIn("count refresh 1", lines)
+        self.assertTrue(lines[-1].startswith("mem low_free="))
+
+    def test_reset(self):
+        perf.stop("a", perf.start())
+        perf.count("x")
+        perf.reset()
+        self.assertEqual((list(perf.spans()), perf.counters), ([], {}))
+        self.assertEqual(perf.low_free, -1)
+
+    def test_two_threads(self):
+        # Core 1's fetches record while core 0 draws and reads the ring
+        def record(name):
+            for _ in range(2000):
+                perf.stop(name, perf.start())
+                perf.count(name)
+
+        threads = [threading.Thread(target=record, args=(n,)) for n in "ab"]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            self.assertLessEqual(len(perf.spans()), perf.SIZE)
+            perf.dump(lambda line: None)
+        for t in threads:
+            t.join()
+        self.assertEqual(perf.counters, {"a": 2000, "b": 2000})
+        self.assertEqual(len(perf.spans()), perf.SIZE)
+        self.assertNotIn(None, [n for n, _, _ in perf.spans()])
+
+    def test_enabled_recording_does_not_allocate(self):
+        perf.stop("warm", perf.start())
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            for _ in range(perf.SIZE * 2):
+                perf.stop("wx_http", perf.start())
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        only = [tracemalloc.Filter(True, perf.__file__)]
+        stats = after.filter_traces(only).compare_to(
+            before.filter_traces(only), "filename"
+        )
+        self.assertEqual(sum(s.size_diff for s in stats if s.size_diff > 0), 0)
+
+
+class TestDisabled(unittest.TestCase):
+    def setUp(self):
+        perf.reset()
+        perf.enable(False)
+
+    def test_nothing_recorded(self):
+        t = perf.start()
+        self.assertEqual(t, 0)
+        perf.stop("a", t)
+        perf.count("x")
+        self.assertEqual((list(perf.spans()), perf.counters), ([], {}))
+
+    def test_span_started_while_disabled_is_dropped(self):
+        t = perf.start()
+        perf.enable()
+        try:
+            perf.stop("a", t)
+            self.assertEqual(list(perf.spans()), [])
+        finally:
+            perf.enable(False)
+
+    def test_overhead_near_zero(self):
+        n = 20000
+
+        def loop():
+            t0 = time.perf_counter()
+            for _ in range(n):
+                perf.stop("a", perf.start())
+            return time.perf_counter() - t0
+
+        off = min(loop() for _ in range(3))
+        perf.enable()
+        try:
+            on = min(loop() for _ in range(3))
+        finally:
+            perf.enable(False)
+            perf.reset()
+        self.assertLess(off / n, 1e-6)  # well under 1us per span on the host
+        self.assertLess(off, on)
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        pass
+
+
+class _Wifi:
+    def connect(self):
+        return True
+
+    def power_down(self):
+        pass
+
+
+def _get(url, timeout=None):
+    if "ip-api" in url:
+        return _Resp({"lat": 52.2, "lon": 0.12, "city": "Cambridge"})
+    return _Resp(headless.SAMPLE_FORECAST)
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestPicoMainSpans(PerfTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ns = headless.load_pico_main()
+        self.ns["http_client"].get = _get
+        self.ns["wifi"] = _Wifi()
+
+    def names(self):
+        return [n for n, _, _ in perf.spans()]
+
+    def test_refresh_spans(self):
+        self.assertTrue(self.ns["refresh_all"]())
+        names = self.names()
+        self.assertEqual(
+            names[:5], ["wifi", "loc_http", "loc_json", "wx_http", "wx_json"]
+        )
+        self.assertEqual(names.count("wx_json"), len(self.ns["PRESET_CITIES"]))
+        self.assertEqual(perf.counters, {"refresh": 1})
+
+    def test_fetch_failure_counted(self):
+        self.ns["http_client"].get = headless._offline
+        self.ns["fetch_weather"](1)
+        self.assertEqual(perf.counters, {"fetch_fail": 1})
+
+    def test_draw_spans(self):
+        self.ns["refresh_all"]()
+        perf.reset()
+        headless.render(self.ns, 1)
+        headless.render(self.ns, 2)
+        # The map is decoded once; later frames reuse the background snapshot
+        self.assertEqual(self.names(), ["jpeg", "update", "update"])
+
+    def test_disabled_records_nothing(self):
+        perf.enable(False)
+        self.ns["refresh_all"]()
+        headless.render(self.ns, 1)
+        self.assertEqual(self.names(), [])
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestDiagnosticsPage(PerfTestCase):
+    def setUp(self):
+        super().setUp()
+        self.g = headless.HeadlessGraphics()
+
+    def _ink(self):
+        return self.g.buffer.count(0xFF) < len(self.g.buffer)
+
+    def test_draws_summary(self):
+        for name in ("wifi", "wx_http", "jpeg"):
+            perf.stop(name, perf.start())
+        perf.draw_diagnostics(self.g)
+        self.assertTrue(self._ink())
+        # Text stays on screen
+        rows = [y for y in range(128) for x in range(296) if not self.g.get_pixel(x, y)]
+        self.assertLess(max(rows), 127)
+
+    def test_disabled_page(self):
+        perf.enable(False)
+        perf.draw_diagnostics(self.g)
+        self.assertTrue(self._ink())
+
+
+class TestLongPressA(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        self.now = 0
+        self.ns["time"] = types.SimpleNamespace(sleep_ms=self._sleep)
+
+    def _sleep(self, ms):
+        self.now += ms
+
+    def _pin(self, hold_ms):
+        test = self
+
+        class Pin:
+            def value(self):
+                return 0 if test.now < hold_ms else 1
+
+        return Pin()
+
+    def test_held_a_opens_diagnostics(self):
+        self.ns["_btn_a"] = self._pin(1000)
+        self.assertEqual(self.ns["btn_pressed"](), "A")
+
+    def test_tap_a_is_previous(self):
+        self.ns["_btn_a"] = self._pin(200)
+        self.assertEqual(self.ns["btn_pressed"](), "a")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -29,13 +29,15 @@ net.STA_IF = 1
 mach = _make_mock_module("machine")
 mach.Pin = MagicMock()
 
-# urequests
-ureq = _make_mock_module("urequests")
+# http_client
+httpc = _make_mock_module("http_client")
 
 # picographics
 pg = _make_mock_module("picographics")
 pg.PicoGraphics = MagicMock()
 pg.DISPLAY_INKY_PACK = "INKY_PACK"
+pg.PEN_1BIT = 0
+pg.get_buffer_size = MagicMock(return_value=296 * 128 // 8)
 
 # jpegdec
 jd = _make_mock_module("jpegdec")
@@ -73,20 +75,22 @@ def _load_logic():
 
 NS = _load_logic()
 
+import map_proj  # noqa: E402
+from providers import WMO  # noqa: E402
+
 # Pull names into module scope for convenience
 deg_to_compass = NS["deg_to_compass"]
 latlon_to_dot = NS["latlon_to_dot"]
 parse_time = NS["parse_time"]
-WMO = NS["WMO"]
-CITY_DOTS = NS["CITY_DOTS"]
+city_dot = NS["city_dot"]
 PRESET_CITIES = NS["PRESET_CITIES"]
 HOME_CITY_IDX = NS["HOME_CITY_IDX"]
 MAP_X = NS["MAP_X"]
 MAP_Y = NS["MAP_Y"]
-_X_OFF = NS["_X_OFF"]
-_MAP_W = NS["_MAP_W"]
-_Y_OFF = NS["_Y_OFF"]
-_MAP_H = NS["_MAP_H"]
+_X_OFF = map_proj._X_OFF
+_MAP_W = map_proj._MAP_W
+_Y_OFF = map_proj._Y_OFF
+_MAP_H = map_proj._MAP_H
 MANUAL_TIMEOUT = NS["MANUAL_TIMEOUT"]
 
 # ── Tests ─────────────────────────────────────────────────────────────────────
@@ -223,13 +227,13 @@ class TestPresetCities(unittest.TestCase):
             self.assertLess(lon, 3.0, msg=f"{name} lon too far east")
 
     def test_preset_cities_in_city_dots(self):
-        """Every named preset city should have a dot in CITY_DOTS."""
+        """Every named preset city should have a precomputed dot."""
         missing = []
         for name, lat, lon in PRESET_CITIES[1:]:
-            if name not in CITY_DOTS:
+            if city_dot(name) is None:
                 missing.append(name)
         self.assertEqual(
-            missing, [], msg="Missing CITY_DOTS entries: {}".format(missing)
+            missing, [], msg="Missing city_dots entries: {}".format(missing)
         )
 
 
@@ -264,7 +268,7 @@ class TestFetchWeather(unittest.TestCase):
 
         mock_resp = MagicMock()
         mock_resp.json.return_value = weather
-        ureq.get = MagicMock(return_value=mock_resp)
+        httpc.get = MagicMock(return_value=mock_resp)
 
         NS["get_weather"] = MagicMock(return_value=weather)
         NS["get_location"] = MagicMock(return_value=location)
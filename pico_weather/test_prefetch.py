@@ -0,0 +1,160 @@
+"""
+Tests for pico_main's prefetch of the neighbouring city frames: the
+swapped-in frame matches a full render, stale and low-heap cases fall
+back to rendering, and press-to-update-start latency with and without
+prefetch on a display that timestamps update().
+Run: python3 -m pytest pico_weather/test_prefetch.py -v
+"""
+
+import statistics
+import time
+import unittest
+
+import headless
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+
+class TimedDisplay(headless.HeadlessGraphics):
+    """Records when each update() starts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.update_at = []
+
+    def update(self):
+        self.update_at.append(time.perf_counter())
+        super().update()
+
+
+def browse(ns, presses, prefetch):
+    """Seconds from each B press to the start of its update (main loop order)."""
+    ns["PREFETCH"] = prefetch
+    g = ns["display"]
+    n = len(ns["PRESET_CITIES"])
+    idx = 0
+    ns["draw_cache"](ns["weather_cache"][idx], idx)
+    out = []
+    for _ in range(presses):
+        ns["prefetch_around"](idx)
+        while ns["prefetch_step"]():  # the idle polls before the press
+            pass
+        idx = (idx + 1) % n
+        t0 = time.perf_counter()
+        ns["draw_cache"](ns["weather_cache"][idx], idx)
+        out.append(g.update_at[-1] - t0)
+    return out
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main(display=TimedDisplay())
+        headless.fill_cache(self.ns)
+
+    def test_frames_match_full_render(self):
+        ns = self.ns
+        expected = [headless.render(ns, i) for i in range(len(ns["PRESET_CITIES"]))]
+        idx = 3
+        ns["prefetch_around"](idx)
+        rendered = 0
+        while ns["prefetch_step"]():
+            rendered += 1
+        self.assertEqual(rendered, 2)
+        self.assertEqual(sorted(ns["_frames"]), [2, 4])
+        for k in (2, 4):
+            self.assertEqual(headless.render(ns, k), expected[k])
+        self.assertFalse(ns["prefetch_step"]())  # nothing left to do
+
+    def test_swap_skips_render(self):
+        ns = self.ns
+        calls = []
+        render = ns["render_cache"]
+        ns["render_cache"] = lambda *a: calls.append(a) or render(*a)
+        ns["prefetch_around"](0)
+        while ns["prefetch_step"]():
+            pass
+        del calls[:]
+        headless.render(ns, 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(ns["display"].updates, 1)
+
+    def test_refreshed_entry_rerendered(self):
+        ns = self.ns
+        ns["prefetch_around"](0)
+        while ns["prefetch_step"]():
+            pass
+        old = headless.render(ns, 1)
+        entry = dict(ns["weather_cache"][1], temp=-7)
+        ns["weather_cache"][1] = entry
+        new = headless.render(ns, 1)
+        self.assertNotEqual(new, old)  # not the stale prefetched frame
+        self.assertTrue(ns["prefetch_step"]())  # and it is prefetched again
+        self.assertIs(ns["_frames"][1][0], entry)
+
+    def test_spares_reused(self):
+        ns = self.ns
+        for idx in (0, 1, 2, 3):
+            ns["prefetch_around"](idx)
+            while ns["prefetch_step"]():
+                pass
+        bufs = {id(b) for _, b in ns["_frames"].values()} | {
+            id(b) for b in ns["_spare"]
+        }
+        self.assertLessEqual(len(bufs), 3)
+
+    def test_low_heap_skips_prefetch(self):
+        ns = self.ns
+        ns["gc"].mem_free = lambda: ns["PREFETCH_FREE"]  # no room for a spare
+        ns["prefetch_around"](0)
+        self.assertFalse(ns["prefetch_step"]())
+        self.assertEqual(ns["_frames"], {})
+        self.assertEqual(len(headless.render(ns, 1)), 4736)
+
+    def test_hourly_view_not_swapped(self):
+        ns = self.ns
+        ns["prefetch_around"](0)
+        while ns["prefetch_step"]():
+            pass
+        normal = bytes(ns["_frames"][1][1])
+        self.assertNotEqual(headless.render(ns, 1, hourly_page=0), normal)
+
+    def test_idle_polls_prefetch(self):
+        ns = self.ns
+
+        class Time:
+            time = staticmethod(time.time)
+
+            @staticmethod
+            def sleep_ms(ms):
+                pass
+
+        class Pin:
+            def value(self):
+                return 0 if len(ns["_frames"]) == 2 else 1  # press once both done
+
+        ns["time"] = Time
+        ns["_btn_a"] = ns["_btn_c"] = type("Up", (), {"value": lambda s: 1})()
+        ns["_btn_b"] = Pin()
+        ns["last_refresh"] = time.time()
+        ns["prefetch_around"](0)
+        self.assertEqual(ns["wait_for_action"](time.time() + 5), "B")
+        self.assertEqual(sorted(ns["_frames"]), [1, len(ns["PRESET_CITIES"]) - 1])
+
+    def test_press_to_update_latency(self):
+        ns = self.ns
+        browse(ns, 3, prefetch=False)  # warm the background and layouts
+        without = statistics.median(browse(ns, 24, prefetch=False))
+        with_ = statistics.median(browse(ns, 24, prefetch=True))
+        print(
+            "\npress -> update start: {:.3f} ms without prefetch, "
+            "{:.3f} ms with".format(without * 1e3, with_ * 1e3)
+        )
+        self.assertLess(with_, without / 3)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,247 @@
+"""
+Tests for providers.py and weather_api.py: both providers' recorded
+payloads to the same record, the host scripts on either, hedged fetches
+against local stand-in servers with injected latency, and many locations
+at once (benchmarks/bench_many.py).
+Run: python3 -m pytest pico_weather/test_providers.py -v
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import update_weather
+import weather_api
+import weather_display
+from providers import _WTTR, WMO, OpenMeteo, Wttr, _wttr_time, describe
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+FIXTURES = os.path.join(BENCHMARKS, "fixtures")
+sys.path.insert(0, BENCHMARKS)
+
+from bench_many import StandIn  # noqa: E402
+
+CAMBRIDGE = ("Cambridge", 52.2053, 0.1218)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class TestRecords(unittest.TestCase):
+    def test_open_meteo(self):
+        rec = OpenMeteo().parse(json.loads(fixture("open_meteo.json")))
+        self.assertEqual((rec["temp"], rec["code"], rec["tmr_code"]), (12, 3, 61))
+        self.assertEqual((rec["hmax"], rec["hmin"], rec["tmax"]), (14, 8, 11))
+        self.assertEqual((rec["feels"], rec["humidity"]), (None, None))
+        self.assertEqual(rec["time"], "2026-02-22T08:45")
+        self.assertEqual(rec["hourly"][0], "2026-02-22T08:00")
+
+    def test_wttr(self):
+        rec = Wttr().parse(json.loads(fixture("wttr_in.json")))
+        self.assertEqual((rec["temp"], rec["feels"], rec["humidity"]), (6, 3, 81))
+        self.assertEqual(describe(rec["code"]), "P.Cloudy")
+        self.assertEqual(describe(rec["tmr_code"]), "Overcast")
+        self.assertEqual((rec["rain_0"], rec["rain_1"]), (1.8, 1.2))
+        self.assertEqual(rec["time"], "2026-02-22T08:14")
+        self.assertIsNone(rec["hourly"])
+
+    def test_same_keys(self):
+        a = OpenMeteo().parse(json.loads(fixture("open_meteo.json")))
+        b = Wttr().parse(json.loads(fixture("wttr_in.json")))
+        self.assertEqual(sorted(a), sorted(b))
+
+    def test_every_wttr_code_described(self):
+        for wttr, wmo in _WTTR:
+            self.assertIn(wmo, WMO, wttr)
+        self.assertEqual(describe(999), "?")
+
+    def test_device_labels_kept(self):
+        # What pico_main showed for these codes before the tables merged
+        device = {
+            0: "Clear",
+            1: "Clear",
+            2: "P.Cloudy",
+            3: "Overcast",
+            45: "Fog",
+            48: "Icy Fog",
+            51: "Drizzle",
+            53: "Drizzle",
+            55: "Drizzle",
+            61: "Lt Rain",
+            63: "Rain",
+            65: "Hvy Rain",
+            71: "Lt Snow",
+            73: "Snow",
+            75: "Hvy Snow",
+            80: "Showers",
+            81: "Showers",
+            82: "Showers",
+            95: "Thunder",
+            96: "Thunder",
+            99: "Thunder",
+        }
+        self.assertEqual({k: describe(k) for k in device}, device)
+
+    def test_wttr_time(self):
+        self.assertEqual(_wttr_time("2026-02-22 08:14 PM"), "2026-02-22T20:14")
+        self.assertEqual(_wttr_time("2026-02-22 12:05 AM"), "2026-02-22T00:05")
+        self.assertEqual(_wttr_time("2026-02-22 12:05 PM"), "2026-02-22T12:05")
+        self.assertEqual(_wttr_time(""), "")
+
+    def test_urls(self):
+        self.assertIsNone(OpenMeteo().url(None, None, "Nowhere"))
+        self.assertIn("current=apparent", OpenMeteo(feels=True).url(52.2, 0.12))
+        self.assertNotIn("current=", OpenMeteo().url(52.2, 0.12))
+        self.assertEqual(
+            Wttr().url(None, None, "St Ives"), "https://wttr.in/St+Ives?format=j1"
+        )
+
+
+class TestHostScripts(unittest.TestCase):
+    def records(self):
+        yield OpenMeteo().parse(json.loads(fixture("open_meteo.json")))
+        yield Wttr().parse(json.loads(fixture("wttr_in.json")))
+
+    def test_update_weather(self):
+        for rec in self.records():
+            w = update_weather.parse_weather(rec, "London")
+            self.assertEqual(w["temp"], rec["temp"])
+            self.assertEqual(w["desc"], describe(rec["code"]))
+            self.assertIn("London", update_weather.build_script(**w))
+
+    def test_weather_display(self):
+        for rec in self.records():
+            w = weather_display.format_weather(rec)
+            self.assertNotIn("(?)", str(w))
+            self.assertTrue(weather_display.build_pico_script(w))
+
+    def test_resolve(self):
+        name, lat, lon = weather_api.resolve("cambridge")
+        self.assertEqual(name, "Cambridge")
+        self.assertAlmostEqual(lat, 52.2, places=1)
+        self.assertEqual(weather_api.resolve("Atlantis"), ("Atlantis", None, None))
+
+    def test_read_locations(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("# towns\nYork\n\n  St Andrews  # Fife\n")
+        try:
+            got = weather_api.read_locations(["Leeds", "@" + f.name, "Bath"])
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(got, ["Leeds", "York", "St Andrews", "Bath"])
+        places = weather_api.resolve_many(got)
+        self.assertEqual([p[0] for p in places], got)
+        self.assertIsNotNone(places[1][1])
+
+
+def percentile(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+class TestHedging(unittest.TestCase):
+    STALL_S = 0.5
+
+    def setUp(self):
+        # The primary stalls on one request in four; the fallback is steady
+        self.slow = StandIn(
+            fixture("open_meteo.json"), stall_every=4, stall_s=self.STALL_S
+        )
+        self.fast = StandIn(fixture("wttr_in.json"))
+        self.providers = (OpenMeteo(self.slow.base), Wttr(self.fast.base))
+
+    def tearDown(self):
+        self.slow.stop()
+        self.fast.stop()
+
+    def latencies(self, hedge_s, n=40):
+        out = []
+        for _ in range(n):
+            t = time.perf_counter()
+            rec, p = weather_api.fetch_record(CAMBRIDGE, self.providers, hedge_s)
+            out.append(time.perf_counter() - t)
+            self.assertEqual(rec["temp"], 12 if p.name == "open-meteo" else 6)
+        return out
+
+    def test_hedging_cuts_tail(self):
+        plain = self.latencies(None)
+        hedged = self.latencies(0.1)
+        p95 = percentile(plain, 0.95), percentile(hedged, 0.95)
+        print(
+            "\np95 fetch: {:.0f} ms single provider, {:.0f} ms hedged at 100 ms; "
+            "fallback asked {} times in 40".format(
+                p95[0] * 1000, p95[1] * 1000, self.fast.hits
+            )
+        )
+        self.assertGreaterEqual(p95[0], self.STALL_S)
+        self.assertLess(p95[1], p95[0] / 2)
+        self.assertLess(max(hedged), self.STALL_S)
+        self.assertLessEqual(self.fast.hits, 15)  # only the slow ones
+
+    def test_failure_falls_back_at_once(self):
+        self.slow.status = 500
+        t = time.perf_counter()
+        rec, p = weather_api.fetch_record(CAMBRIDGE, self.providers, hedge_s=10)
+        self.assertLess(time.perf_counter() - t, 5)
+        self.assertEqual(p.name, "wttr.in")
+
+    def test_all_failing(self):
+        self.slow.status = self.fast.status = 503
+        with self.assertRaises(OSError) as cm:
+            weather_api.fetch_record(CAMBRIDGE, self.providers, hedge_s=0.1)
+        self.assertIn("open-meteo", str(cm.exception))
+        self.assertIn("wttr.in", str(cm.exception))
+
+    def test_no_coordinates_skips_open_meteo(self):
+        rec, p = weather_api.fetch_record(("Atlantis", None, None), self.providers)
+        self.assertEqual((p.name, self.slow.hits), ("wttr.in", 0))
+
+
+class TestMany(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(fixture("open_meteo.json"), delay_s=0.05)
+        self.providers = (OpenMeteo(self.server.base),)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_concurrent_faster(self):
+        places = weather_api.resolve_many(["York", "Leeds", "Hull", "Bath"] * 5)
+        t = time.perf_counter()
+        results = weather_api.fetch_many(places, self.providers, workers=10)
+        dt = time.perf_counter() - t
+        print("\n20 places at 50 ms each: {:.0f} ms".format(dt * 1000))
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(r[0]["temp"] == 12 for r in results))
+        self.assertLess(dt, 20 * 0.05 / 3)
+
+    def test_failures_in_place(self):
+        places = weather_api.resolve_many(["York", "Atlantis", "Leeds"])
+        results = weather_api.fetch_many(places, self.providers)
+        self.assertIsInstance(results[1], OSError)  # no coordinates
+        self.assertEqual([r[1].name for r in results[::2]], ["open-meteo"] * 2)
+        self.assertEqual(weather_api.fetch_many([], self.providers), [])
+
+    def test_write_scripts(self):
+        for mod in (update_weather, weather_display):
+            with tempfile.TemporaryDirectory() as out:
+                paths = mod.write_scripts(
+                    ["York", "St Andrews", "Atlantis"],
+                    out,
+                    providers=self.providers,
+                )
+                self.assertEqual(sorted(paths), ["St Andrews", "York"])
+                self.assertEqual(
+                    sorted(os.listdir(out)), ["st_andrews.py", "york.py"], mod
+                )
+                with open(paths["St Andrews"]) as f:
+                    self.assertIn("St Andrews", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,190 @@
+"""
+Tests for pico_main skipping the e-ink update when a refresh changes
+nothing that is shown, and sending only the changed rows when it does:
+update counts over a recorded morning of 10-minute refreshes, and the
+panel (skipped frames and partial updates included) always matches a
+full render.
+Run: python3 -m pytest pico_weather/test_redraw.py -v
+"""
+
+import copy
+import json
+import os
+import unittest
+
+import headless
+from scheduler import TokenBucket
+
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures"
+)
+
+# Open-Meteo's current_weather for Cambridge at each 10-minute refresh of
+# a morning: (time, temperature, weathercode, windspeed, winddirection).
+# Observations come every 15 minutes, so every third refresh sees the same
+# one again.
+MORNING = (
+    ("2026-02-22T08:45", 12.3, 3, 18.0, 250.0),
+    ("2026-02-22T08:45", 12.3, 3, 18.0, 250.0),
+    ("2026-02-22T09:00", 12.6, 3, 18.4, 250.0),
+    ("2026-02-22T09:15", 12.9, 3, 19.0, 252.0),
+    ("2026-02-22T09:15", 12.9, 3, 19.0, 252.0),
+    ("2026-02-22T09:30", 13.1, 61, 21.0, 255.0),
+    ("2026-02-22T09:45", 13.0, 61, 21.0, 255.0),
+    ("2026-02-22T09:45", 13.0, 61, 21.0, 255.0),
+    ("2026-02-22T10:00", 13.0, 61, 21.6, 255.0),
+    ("2026-02-22T10:15", 13.4, 61, 22.0, 260.0),
+    ("2026-02-22T10:15", 13.4, 61, 22.0, 260.0),
+    ("2026-02-22T10:30", 13.8, 3, 20.0, 260.0),
+)
+
+
+class PanelDisplay(headless.HeadlessGraphics):
+    """Keeps a copy of what update() and partial_update() send to the panel."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.panel = None
+        self.bands = []  # (y, h) per partial_update
+
+    def update(self):
+        super().update()
+        self.panel = bytearray(self.buffer)
+
+    def partial_update(self, x, y, w, h):
+        super().partial_update(x, y, w, h)
+        assert (x, w) == (0, self.width)
+        rows = slice(y * self._stride, (y + h) * self._stride)
+        self.panel[rows] = self.buffer[rows]
+        self.bands.append((y, h))
+
+
+def forecasts():
+    with open(os.path.join(FIXTURES, "open_meteo.json")) as f:
+        base = json.load(f)
+    for t, temp, code, spd, deg in MORNING:
+        d = copy.deepcopy(base)
+        d["current_weather"].update(
+            time=t, temperature=temp, weathercode=code, windspeed=spd
+        )
+        d["current_weather"]["winddirection"] = deg
+        d["generationtime_ms"] = len(t) * temp  # differs, never shown
+        yield d
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def close(self):
+        pass
+
+
+class _Wifi:
+    def connect(self):
+        return True
+
+    def power_down(self):
+        pass
+
+
+class TestRedraw(unittest.TestCase):
+    def setUp(self):
+        ns = self.ns = headless.load_pico_main(display=PanelDisplay())
+        ns["wifi"] = _Wifi()
+        ns["sched"].bucket = TokenBucket(size=1 << 30)
+        ns["http_client"].get = self.get
+        self.payload = next(forecasts())
+        ns["refresh_all"]()  # fill the cache without drawing
+        self.g = ns["display"]
+
+    def get(self, url, timeout=None):
+        if "ip-api" in url:
+            return _Resp({"lat": 52.2, "lon": 0.12, "city": "Cambridge"})
+        return _Resp(self.payload)
+
+    def refresh_and_draw(self, payload):
+        ns = self.ns
+        self.payload = payload
+        self.assertTrue(ns["refresh_all"]())
+        ns["draw_cache"](ns["weather_cache"][0], 0)
+
+    def sent(self):
+        return self.g.updates, self.g.partials
+
+    def full_render(self):
+        """A full render of the city shown, leaving the panel as it was."""
+        ns, g = self.ns, self.g
+        saved = g.panel, self.sent(), ns["_partials"]
+        frame = headless.render(ns, 0)
+        g.panel, (g.updates, g.partials), ns["_partials"] = saved
+        return frame
+
+    def test_recorded_morning(self):
+        ns = self.ns
+        drawn = []
+        for payload in forecasts():
+            before = self.g.updates + self.g.partials
+            self.refresh_and_draw(payload)
+            drawn.append(self.g.updates + self.g.partials - before)
+            # What a full render would have sent, skipped or partial
+            self.assertEqual(self.full_render(), self.g.panel)
+        self.assertEqual(drawn, [1, 0, 1, 1, 0, 1, 1, 0, 1, 1, 0, 1])
+        self.assertEqual(self.sent(), (1, 7))  # not 12 full updates
+        # The tomorrow rows are left alone on every partial
+        self.assertTrue(all(y + h <= 88 for y, h in self.g.bands))
+
+    def test_partials_then_full(self):
+        ns = self.ns
+        payloads = list(forecasts())
+        ns["PARTIAL_MAX"] = 2
+        for k in (0, 2, 3, 5, 6):
+            self.refresh_and_draw(payloads[k])
+        self.assertEqual(self.sent(), (2, 3))  # full, 2 partials, full, partial
+        ns["PARTIAL"] = False
+        self.refresh_and_draw(payloads[8])
+        self.assertEqual(self.sent(), (3, 3))
+        self.assertEqual(self.g.panel, self.full_render())
+
+    def test_unchanged_figures_skipped(self):
+        ns = self.ns
+        payloads = list(forecasts())
+        self.refresh_and_draw(payloads[8])  # 10:00, 13.0C 21km/h
+        self.refresh_and_draw(payloads[8])
+        self.assertEqual(self.g.updates, 1)
+        payloads[8]["current_weather"]["temperature"] = 13.9  # still 13C
+        self.refresh_and_draw(payloads[8])
+        self.assertEqual(self.g.updates, 1)
+        payloads[8]["current_weather"]["winddirection"] = 256.0  # arrow turns
+        self.refresh_and_draw(payloads[8])
+        self.assertEqual(self.sent(), (1, 1))
+        self.assertEqual(self.g.bands, [(56, 32)])  # the arrow's rows only
+        self.assertEqual(self.g.panel, self.full_render())
+
+    def test_other_city_redrawn(self):
+        ns = self.ns
+        for idx in (0, 1, 0, 0):
+            ns["draw_cache"](ns["weather_cache"][idx], idx)
+        self.assertEqual(self.g.updates, 3)
+
+    def test_other_screens_reset(self):
+        ns = self.ns
+        c = ns["weather_cache"][0]
+        ns["draw_cache"](c, 0)
+        ns["draw_cache"](c, 0, hourly_page=0)
+        ns["draw_cache"](c, 0, hourly_page=0)  # hourly view always drawn
+        ns["draw_cache"](c, 0)
+        self.assertEqual(self.g.updates, 4)
+        ns["show_error"](self.g, "timed out")
+        ns["draw_cache"](c, 0)
+        self.assertEqual(self.g.updates, 6)
+        self.assertEqual(self.g.panel, headless.render(ns, 0))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
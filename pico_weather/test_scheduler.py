@@ -0,0 +1,325 @@
+"""
+Tests for scheduler.py: the token bucket, jittered refresh times, 429
+backoff with Retry-After, the adaptive refresh period, pico_main's api_get
+and the worker on a schedule, and the fleet and week simulations from
+benchmarks/bench_fleet.py and bench_refresh.py.
+Run: python3 -m pytest pico_weather/test_scheduler.py -v
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+import headless
+from fetch_worker import Mailbox, Worker
+from hourly import HourlyRing
+from scheduler import (
+    BACKOFF_MAX_S,
+    BACKOFF_S,
+    BOOT_JITTER_S,
+    REFRESH_FAST_S,
+    REFRESH_SLOW_S,
+    SPREAD,
+    Scheduler,
+    TokenBucket,
+    refresh_period,
+)
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+)
+
+import bench_fleet  # noqa: E402
+import bench_refresh  # noqa: E402
+
+
+def fixed(x):
+    return lambda: x
+
+
+def ring(temps, rain=()):
+    r = HourlyRing()
+    r.load("2026-02-22T10:00", temps, list(rain) + [0.0] * (len(temps) - len(rain)))
+    return r
+
+
+MILD = [8, 8, 9, 9, 9, 9, 8, 8, 7, 7, 6, 6]
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refill(self):
+        b = TokenBucket(size=3, per_s=0.5, now=0)
+        self.assertEqual([b.take(0) for _ in range(4)], [True] * 3 + [False])
+        self.assertEqual(b.wait_s(0), 2)
+        self.assertFalse(b.take(1))
+        self.assertTrue(b.take(2))
+        self.assertTrue(b.take(100, n=3))  # capped at size
+        self.assertFalse(b.take(100))
+
+
+class TestScheduler(unittest.TestCase):
+    def test_boot_jitter(self):
+        self.assertEqual(Scheduler(600, now=100, rand=fixed(0)).wake_at(), 100)
+        s = Scheduler(600, now=100, rand=fixed(0.999))
+        self.assertFalse(s.due(100))
+        self.assertTrue(s.due(100 + BOOT_JITTER_S))
+
+    def test_refresh_gaps(self):
+        for r in (0, 0.5, 0.999):
+            s = Scheduler(600, rand=fixed(r))
+            s.refreshed(0)
+            self.assertTrue(300 <= s.next_at < 900)  # first: phase scattered
+            s.refreshed(1000)
+            gap = s.next_at - 1000
+            self.assertTrue(600 * (1 - SPREAD) <= gap <= 600 * (1 + SPREAD))
+
+    def test_backoff_doubles_and_resets(self):
+        s = Scheduler(600, rand=fixed(0))
+        waits = []
+        for _ in range(8):
+            s.throttled(0)
+            waits.append(s.blocked_until)
+        self.assertEqual(waits[:3], [BACKOFF_S, 2 * BACKOFF_S, 4 * BACKOFF_S])
+        self.assertEqual(waits[-1], BACKOFF_MAX_S)
+        s.ok()
+        s.throttled(0)
+        self.assertEqual(s.blocked_until, BACKOFF_S)
+
+    def test_retry_after_honoured(self):
+        s = Scheduler(600, rand=fixed(0.5))
+        s.throttled(1000, retry_after=300)
+        self.assertEqual(s.blocked_until, 1000 + 300 * (1 + SPREAD / 2))
+        self.assertFalse(s.acquire(1100))
+        self.assertEqual(s.denied, 1)
+        self.assertFalse(s.due(1100))
+
+    def test_refresh_cut_short_goes_again_after_backoff(self):
+        s = Scheduler(600, rand=fixed(0))
+        s.refreshed(0)
+        s.throttled(1000)
+        s.refreshed(1000)
+        self.assertEqual(s.wake_at(), 1000 + BACKOFF_S)
+        self.assertTrue(s.due(1000 + BACKOFF_S))
+
+    def test_budget_caps_calls(self):
+        s = Scheduler(600, bucket=TokenBucket(size=9, per_s=0.01))
+        self.assertEqual(sum(s.acquire(0) for _ in range(20)), 9)
+        self.assertEqual(s.denied, 11)
+
+    def test_burst_covers_a_full_refresh(self):
+        ns = headless.load_pico_main()
+        calls = 1 + len(ns["PRESET_CITIES"])  # ip-api, then each forecast
+        bucket = ns["sched"].bucket
+        self.assertEqual(bucket.size, calls + 1)
+        self.assertEqual(Scheduler(600, burst=calls).bucket.size, calls)
+        # The refill covers a full refresh every REFRESH_FAST_S
+        self.assertGreaterEqual(bucket.per_s * REFRESH_FAST_S, calls)
+
+    def test_budget_shared_by_two_threads(self):
+        # Fetches on core 1 and one-off fetches on core 0 draw on one bucket
+        s = Scheduler(600, bucket=TokenBucket(size=5000, per_s=0))
+        taken = [0, 0]
+
+        def spend(k):
+            for _ in range(4000):
+                taken[k] += s.acquire(0)
+
+        threads = [threading.Thread(target=spend, args=(k,)) for k in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual((sum(taken), s.denied), (5000, 3000))
+
+
+class TestRefreshPeriod(unittest.TestCase):
+    def test_settled(self):
+        self.assertEqual(refresh_period(600, ring(MILD), 12), REFRESH_SLOW_S)
+
+    def test_overnight(self):
+        stormy = ring(MILD, [0, 3.0, 5.0])
+        for hour in (22, 23, 0, 5):
+            self.assertEqual(refresh_period(600, stormy, hour, True), REFRESH_SLOW_S)
+        self.assertEqual(refresh_period(600, stormy, 6), REFRESH_FAST_S)
+
+    def test_changing_quickly(self):
+        self.assertEqual(refresh_period(600, ring(MILD), 12, True), REFRESH_FAST_S)
+        front = ring([9, 8, 6, 5] + MILD)
+        self.assertEqual(refresh_period(600, front, 12), REFRESH_FAST_S)
+
+    def test_rain(self):
+        onset = ring(MILD, [0, 0, 0.8, 2.0])
+        self.assertEqual(refresh_period(600, onset, 12), REFRESH_FAST_S)
+        stopping = ring(MILD, [1.0, 0.6, 0])
+        self.assertEqual(refresh_period(600, stopping, 12), REFRESH_FAST_S)
+        steady = ring(MILD, [1.0] * 8)  # small swing, raining throughout
+        self.assertEqual(refresh_period(600, steady, 12), REFRESH_FAST_S)
+        late = ring(MILD, [0, 0, 0, 0.4])  # only in the last hour of SOON_H
+        self.assertEqual(refresh_period(600, late, 12), REFRESH_FAST_S)
+        later = ring(MILD, [0, 0, 0, 0, 0, 0.5])  # not settled, not soon
+        self.assertEqual(refresh_period(600, later, 12), 600)
+
+    def test_no_forecast(self):
+        self.assertEqual(refresh_period(600, HourlyRing()), 600)
+
+    def test_set_period_stretches_planned_wait(self):
+        s = Scheduler(600, rand=fixed(0.5))
+        s.refreshed(1000)
+        self.assertEqual(s.next_at, 1600)
+        s.set_period(3600)
+        self.assertEqual(s.next_at, 4600)
+        s.set_period(300)
+        self.assertEqual(s.next_at, 1300)
+
+
+class _Resp:
+    def __init__(self, status, retry_after=-1):
+        self.status_code = status
+        self.retry_after = retry_after
+        self.closed = False
+
+    def json(self):
+        return {"lat": 52.2, "lon": 0.12, "city": "Cambridge"}
+
+    def close(self):
+        self.closed = True
+
+
+class TestApiGet(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        self.sent = []
+
+    def serve(self, resp):
+        self.ns["http_client"].get = lambda url, timeout=None: (
+            self.sent.append(url) or resp
+        )
+
+    def test_429_backs_off(self):
+        ns = self.ns
+        resp = _Resp(429, retry_after=900)
+        self.serve(resp)
+        with self.assertRaises(OSError):
+            ns["get_location"]()
+        self.assertTrue(resp.closed)
+        sched = ns["sched"]
+        self.assertEqual(sched.throttles, 1)
+        self.assertGreater(sched.blocked_until - ns["time"].time(), 890)
+        with self.assertRaises(OSError):
+            ns["get_location"]()
+        self.assertEqual(len(self.sent), 1)  # held back, not sent
+
+    def test_ok_resets_strikes(self):
+        ns = self.ns
+        ns["sched"].strikes = 3
+        self.serve(_Resp(200))
+        self.assertEqual(ns["get_location"](), (52.2, 0.12, "Cambridge"))
+        self.assertEqual(ns["sched"].strikes, 0)
+
+    def test_refresh_spends_budget(self):
+        ns = self.ns
+        self.serve(_Resp(200))
+        ns["sched"].bucket = TokenBucket(size=4, per_s=0)
+        ns["wifi"] = type(
+            "Wifi", (), {"connect": lambda s: True, "power_down": lambda s: None}
+        )()
+        ns["refresh_all"]()
+        self.assertEqual(len(self.sent), 4)  # location, then 3 forecasts
+        self.assertEqual(ns["sched"].denied, len(ns["PRESET_CITIES"]) - 3)
+
+
+class TestPlanRefresh(unittest.TestCase):
+    def setUp(self):
+        self.ns = headless.load_pico_main()
+        self.entry = dict(headless.fill_cache(self.ns)[0])
+
+    def store(self, hour, temps, rain=()):
+        entry = dict(self.entry, date_str="22/2 {:02d}:15".format(hour))
+        hourly = ("2026-02-22T{:02d}:00".format(hour), temps, rain)
+        self.ns["store_record"](0, (entry, hourly))
+        return self.ns["sched"].period
+
+    def test_period_follows_home_forecast(self):
+        self.assertEqual(self.store(12, MILD), REFRESH_SLOW_S)
+        self.assertEqual(self.store(12, MILD, [0, 0, 1.5]), REFRESH_FAST_S)
+        self.assertEqual(self.store(2, MILD, [0, 0, 1.5]), REFRESH_SLOW_S)
+        self.ns["store_record"](3, (self.entry, None))  # other slots: no say
+        self.assertEqual(self.ns["sched"].period, REFRESH_SLOW_S)
+
+    def test_weathercode_change(self):
+        self.store(12, MILD)
+        self.entry["desc"] = "Lt Rain"
+        self.assertEqual(self.store(12, MILD), REFRESH_FAST_S)
+
+    def test_fixed_period(self):
+        self.ns = headless.load_pico_main()
+        self.ns["ADAPTIVE"] = False
+        headless.fill_cache(self.ns)
+        self.assertEqual(self.store(12, MILD), self.ns["REFRESH_S"])
+
+
+class TestWorkerSchedule(unittest.TestCase):
+    def test_worker_follows_schedule(self):
+        now = [1000.0]
+        sched = Scheduler(600, now=now[0], rand=fixed(0.5))
+        mb = Mailbox(2)
+        fetched = []
+        w = Worker(
+            mb,
+            fetched.append,
+            lambda: True,
+            lambda: None,
+            600,
+            clock=lambda: now[0],
+            schedule=sched,
+        )
+        self.assertFalse(w.step())  # boot jitter
+        now[0] += BOOT_JITTER_S / 2
+        self.assertTrue(w.step())
+        self.assertEqual((fetched, sched.refreshes), ([0, 1], 1))
+        now[0] += 599
+        self.assertFalse(w.step())
+        now[0] += 1
+        self.assertTrue(w.step())
+
+
+class TestFleet(unittest.TestCase):
+    def test_scheduled_fleet_spreads_load(self):
+        base = bench_fleet.simulate(100, hours=3, scheduled=False)
+        sched = bench_fleet.simulate(100, hours=3, scheduled=True)
+        print(
+            "\nrequests/10s after boot: {} fixed, {} scheduled; "
+            "429s: {} fixed, {} scheduled".format(
+                base["steady_peak"],
+                sched["steady_peak"],
+                base["refused"],
+                sched["refused"],
+            )
+        )
+        self.assertLess(sched["peak"], base["peak"] / 3)
+        self.assertLess(sched["steady_peak"], base["steady_peak"] / 5)
+        self.assertLess(sched["refused"], base["refused"] / 50)
+        # and the fleet still refreshes about once a period
+        self.assertGreater(sched["ok_per_device_hour"], 0.9 * 6 * bench_fleet.CALLS)
+
+    def test_adaptive_week(self):
+        week = bench_refresh.load_week()
+        base = bench_refresh.average(week, adaptive=False, runs=5)
+        adaptive = bench_refresh.average(week, adaptive=True, runs=5)
+        print(
+            "\nfetches a week: {:.0f} fixed, {:.0f} adaptive; daytime change "
+            "shown after {:.1f} / {:.1f} min".format(
+                base["fetches"],
+                adaptive["fetches"],
+                base["day_lag_s"] / 60,
+                adaptive["day_lag_s"] / 60,
+            )
+        )
+        self.assertLess(adaptive["fetches"], 0.85 * base["fetches"])
+        self.assertLess(adaptive["updates"], 0.75 * base["updates"])
+        self.assertLess(adaptive["day_lag_s"], base["day_lag_s"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,395 @@
+"""
+Tests for sleep_mode.py and pico_main's LOW_POWER loop.
+
+The 24-hour schedule runs the whole of pico_main (MAIN included) against
+a simulated clock: time spent in machine.lightsleep/deepsleep counts as
+asleep, everything else (polling, fetches, e-ink updates, boots) as awake.
+Run: python3 -m pytest pico_weather/test_sleep_mode.py -v
+"""
+
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+import unittest
+from unittest import mock
+
+import headless
+from hourly import NO_RAIN, HourlyRing
+
+sys.modules.setdefault("machine", headless.host_modules()["machine"])
+
+import sleep_mode  # noqa: E402
+
+try:
+    import PIL
+except ImportError:  # JPEG decode needs Pillow
+    PIL = None
+
+DAY_MS = 24 * 3600 * 1000
+EPOCH = 1771747200  # 2026-02-22 08:00 UTC
+FETCH_MS = 300  # per HTTP request
+JOIN_MS = 1200  # Wi-Fi association
+UPDATE_MS = 1500  # e-ink refresh
+BOOT_MS = 1000  # reset to MAIN after deepsleep
+
+# (ms into the day, button, hold ms)
+PRESSES = [
+    (3600 * 1000 + 123, "b", 200),
+    (3600 * 1000 + 4000, "b", 200),
+    (5 * 3600 * 1000 + 77, "c", 200),
+    (9 * 3600 * 1000 + 500, "c", 1000),  # long press: hourly view
+    (9 * 3600 * 1000 + 4500, "b", 200),  # next hourly page
+    (15 * 3600 * 1000 + 250, "a", 200),
+]
+PIN_NAMES = {12: "a", 13: "b", 14: "c"}
+
+
+class _DayOver(Exception):
+    pass
+
+
+class _Reset(Exception):
+    pass
+
+
+class Sim:
+    """Fake clock plus the time/machine/network/http_client modules on top of it."""
+
+    def __init__(self, presses=PRESSES):
+        self.now = 0
+        self.awake = 0
+        self.asleep = 0
+        self.presses = presses
+        self.irqs = {}
+        self.requests = 0
+        self.frames = []  # (ms, framebuffer) per display.update()
+
+    def advance(self, ms, awake=True):
+        ms = max(0, int(ms))
+        if self.now + ms >= DAY_MS:
+            ms = DAY_MS - self.now
+        self.now += ms
+        if awake:
+            self.awake += ms
+        else:
+            self.asleep += ms
+        if self.now >= DAY_MS:
+            raise _DayOver
+
+    def held(self, name):
+        return any(n == name and t <= self.now < t + d for t, n, d in self.presses)
+
+    def next_edge(self, until):
+        for t, name, _ in self.presses:
+            if self.now < t <= until:
+                return t, name
+        return None
+
+    def _sleep(self, ms):
+        edge = self.next_edge(self.now + ms)
+        if edge is None:
+            self.advance(ms, awake=False)
+            return
+        self.advance(edge[0] - self.now, awake=False)
+        handler = self.irqs.get(edge[1])
+        if handler:
+            handler(None)
+
+    def modules(self):
+        sim = self
+        mods = headless.host_modules()
+
+        # Host libraries imported lazily (Pillow) still need the real time API
+        t = mods["time"] = types.ModuleType("time")
+        t.__dict__.update(vars(time))
+        t.time = lambda: EPOCH + sim.now // 1000
+        t.ticks_ms = lambda: sim.now
+        t.ticks_diff = lambda a, b: a - b
+        t.ticks_add = lambda a, b: a + b
+        t.sleep_ms = lambda ms: sim.advance(ms)
+        t.sleep = lambda s: sim.advance(s * 1000)
+
+        class Pin(headless._Pin):
+            def __init__(self, gpio, *args, **kwargs):
+                self.name = PIN_NAMES.get(gpio)
+
+            def value(self, *args):
+                return 0 if sim.held(self.name) else 1
+
+            def irq(self, trigger=None, handler=None):
+                sim.irqs[self.name] = handler
+
+        def deepsleep(ms=0):
+            sim._sleep(ms)
+            raise _Reset
+
+        m = mods["machine"]
+        m.Pin = Pin
+        m.lightsleep = sim._sleep
+        m.deepsleep = deepsleep
+
+        class WLAN(headless._WLAN):
+            up_at = None
+
+            def active(self, on=None):
+                if on is False:
+                    self.up_at = None
+
+            def connect(self, *args, **kwargs):
+                self.up_at = sim.now + JOIN_MS
+
+            def disconnect(self):
+                self.up_at = None
+
+            def isconnected(self):
+                return self.up_at is not None and sim.now >= self.up_at
+
+            def status(self):
+                return 3 if self.isconnected() else 1
+
+        mods["network"].WLAN = WLAN
+
+        class Resp:
+            status_code = 200
+
+            def __init__(self, payload):
+                self.payload = payload
+
+            def json(self):
+                return copy.deepcopy(self.payload)
+
+            def close(self):
+                pass
+
+        def get(url, timeout=None):
+            sim.requests += 1
+            sim.advance(FETCH_MS)
+            if "ip-api" in url:
+                return Resp({"lat": 52.2, "lon": 0.12, "city": "Cambridge"})
+            return Resp(headless.SAMPLE_FORECAST)
+
+        mods["http_client"].get = get
+
+        class Display(headless.HeadlessGraphics):
+            def update(self):
+                super().update()
+                sim.frames.append((sim.now, bytes(self.buffer)))
+                sim.advance(UPDATE_MS)
+
+        mods["picographics"].PicoGraphics = Display
+        return mods
+
+    def run(self, low_power=False, deep=False):
+        """Run pico_main for one simulated day; returns the awake fraction."""
+        with open(headless._PICO_MAIN) as f:
+            src = f.read()
+        src = src.replace("LOW_POWER = False", "LOW_POWER = {}".format(low_power), 1)
+        src = src.replace("DEEP_SLEEP = False", "DEEP_SLEEP = {}".format(deep), 1)
+        # One simulated clock: fetch on the UI thread, as on a single core
+        src = src.replace("WORKER = True", "WORKER = False", 1)
+        src = src.replace("ADAPTIVE = True", "ADAPTIVE = False", 1)  # fixed period
+        code = compile(src, headless._PICO_MAIN, "exec")
+        mods = self.modules()
+        names = list(mods) + ["sleep_mode", "wifi_manager"]
+        saved = {name: sys.modules.get(name) for name in names}
+        cwd = os.getcwd()
+        tmp = tempfile.TemporaryDirectory()
+        try:
+            os.chdir(tmp.name)
+            self.boots = 0
+            while True:
+                for name in names:
+                    sys.modules.pop(name, None)
+                sys.modules.update(mods)
+                self.boots += 1
+                try:
+                    exec(code, {"__name__": "__main__"})
+                except _Reset:
+                    self.advance(BOOT_MS)
+                except _DayOver:
+                    break
+            self.state_saved = os.path.exists(sleep_mode.STATE_FILE)
+        finally:
+            os.chdir(cwd)
+            tmp.cleanup()
+            for name, mod in saved.items():
+                if mod is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = mod
+        return self.awake / (self.awake + self.asleep)
+
+    def frames_after_presses(self):
+        """The first frame drawn after each press."""
+        out = []
+        for t, _, _ in PRESSES:
+            out.append(next(fb for ms, fb in self.frames if ms > t))
+        return out
+
+
+class TestState(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def test_round_trip(self):
+        cache = [None, {"city": "London", "temp": 7, "wind_deg": 22.5}]
+        rings = [HourlyRing(), HourlyRing()]
+        rings[1].load("2026-02-22T21:00", [1.0, -2.0, 3.0], [0.0, None, 2.5])
+        self.assertTrue(
+            sleep_mode.save_state(cache, rings, 1, "manual", 1234, path=self.path)
+        )
+        state = sleep_mode.load_state(self.path)
+        self.assertEqual(state["cache"], cache)
+        self.assertEqual(
+            (state["city_idx"], state["mode"], state["last_refresh"]),
+            (1, "manual", 1234),
+        )
+        restored = [HourlyRing(), HourlyRing()]
+        restored[0].push(9, 9)
+        sleep_mode.restore_hourly(restored, state["hourly"])
+        self.assertEqual(len(restored[0]), 0)
+        r = restored[1]
+        self.assertEqual(len(r), 3)
+        self.assertEqual([r.temp(k) for k in range(3)], [1, -2, 3])
+        self.assertEqual([r.rain_tenths(k) for k in range(3)], [0, NO_RAIN, 25])
+        self.assertEqual(r.hour(0), 21)
+
+    def test_missing_or_corrupt(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(sleep_mode.load_state(self.path))
+        with open(self.path, "w") as f:
+            f.write('{"cache": []}')
+        self.assertIsNone(sleep_mode.load_state(self.path))
+        self.assertIsNone(sleep_mode.load_state(self.path + ".missing"))
+
+
+class TestWakeSource(unittest.TestCase):
+    class Pin:
+        def __init__(self, level=1):
+            self.level = level
+
+        def value(self):
+            return self.level
+
+    def state(self, saved_at, wake_at):
+        return {"saved_at": saved_at, "wake_at": wake_at}
+
+    def test_timer_and_early_wake(self):
+        up = [self.Pin(), self.Pin()]
+        self.assertFalse(sleep_mode.button_woke(self.state(1000, 1600), up, 1601))
+        self.assertTrue(sleep_mode.button_woke(self.state(1000, 1600), up, 1200))
+        self.assertTrue(sleep_mode.button_woke({"wake_at": 1600}, up, 1200))
+
+    def test_clock_back_after_reset(self):
+        # RTC back at its power-on default: earlier than both saved times
+        up = [self.Pin(), self.Pin()]
+        state = self.state(EPOCH, EPOCH + 600)
+        self.assertFalse(sleep_mode.button_woke(state, up, 1609459200))
+        held = [self.Pin(), self.Pin(0)]
+        self.assertTrue(sleep_mode.button_woke(state, held, 1609459200))
+
+    def test_save_records_clock(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with mock.patch.object(sleep_mode.time, "time", return_value=EPOCH):
+            sleep_mode.save_state([], [], 0, "default", 0, EPOCH + 600, path=path)
+        state = sleep_mode.load_state(path)
+        self.assertEqual((state["saved_at"], state["wake_at"]), (EPOCH, EPOCH + 600))
+
+
+class TestButtonWake(unittest.TestCase):
+    def test_first_edge_wins_and_resets(self):
+        handlers = {}
+
+        class Pin:
+            def __init__(self, name):
+                self.name = name
+
+            def irq(self, trigger=None, handler=None):
+                handlers[self.name] = handler
+
+        w = sleep_mode.ButtonWake({"a": Pin("a"), "b": Pin("b")})
+        sleeps = []
+
+        def lightsleep(ms):
+            sleeps.append(ms)
+            handlers["b"](None)
+            handlers["a"](None)
+
+        with mock.patch.object(
+            sleep_mode.machine, "lightsleep", lightsleep, create=True
+        ):
+            self.assertEqual(w.sleep(5000), "b")
+        self.assertEqual(sleeps, [5000])
+        with mock.patch.object(
+            sleep_mode.machine, "lightsleep", sleeps.append, create=True
+        ):
+            self.assertIsNone(w.sleep(10))
+
+
+@unittest.skipIf(PIL is None, "Pillow not installed")
+class TestDutyCycle(unittest.TestCase):
+    """Awake fraction of a 24-hour day with six button presses."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sims = {}
+        for name, low, deep in (
+            ("busy", False, False),
+            ("light", True, False),
+            ("deep", True, True),
+        ):
+            sim = Sim()
+            random.seed(2)  # the same refresh jitter in each mode
+            sim.fraction = sim.run(low, deep)
+            cls.sims[name] = sim
+
+    def test_busy_poll_never_sleeps(self):
+        self.assertEqual(self.sims["busy"].fraction, 1.0)
+
+    def test_low_power_mostly_asleep(self):
+        for name in ("light", "deep"):
+            self.assertLess(self.sims[name].fraction, 0.02, name)
+
+    def test_same_refresh_schedule(self):
+        # ip-api + one forecast per city; each period also includes the fetch
+        counts = {name: sim.requests / 11 for name, sim in self.sims.items()}
+        for name, n in counts.items():
+            self.assertEqual(n, int(n), name)
+            self.assertGreaterEqual(n, 86400 // 610, name)
+        self.assertLessEqual(max(counts.values()) - min(counts.values()), 1)
+
+    def test_light_sleep_handles_presses_like_polling(self):
+        busy = self.sims["busy"].frames_after_presses()
+        light = self.sims["light"].frames_after_presses()
+        self.assertEqual(len(set(busy)), len(PRESSES) - 1)  # last press -> London
+        self.assertEqual(light, busy)
+
+    def test_deep_sleep_resumes_from_state(self):
+        sim = self.sims["deep"]
+        self.assertTrue(sim.state_saved)
+        self.assertGreater(sim.boots, 144)
+        # Only one "Loading..." screen: later boots resume from the state file
+        auto = self.sims["busy"].frames[1][1]
+        self.assertEqual(sim.frames[1][1], auto)
+        self.assertEqual(sum(fb == sim.frames[0][1] for _, fb in sim.frames), 1)
+
+    def test_deep_sleep_button_wake_then_acts(self):
+        # The waking press only redraws; the next one within MANUAL_TIMEOUT acts.
+        auto = self.sims["busy"].frames[1][1]
+        busy = self.sims["busy"].frames_after_presses()
+        deep = self.sims["deep"].frames_after_presses()
+        self.assertEqual(deep[0], auto)
+        self.assertEqual(deep[1], busy[0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
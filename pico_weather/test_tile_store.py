@@ -0,0 +1,182 @@
+"""
+Tests for tile_store.py: zero-copy reads, reopening, torn appends cut off
+on open, two writers on one file, and compaction.
+Run: python3 -m pytest pico_weather/test_tile_store.py -v
+"""
+
+import os
+import tempfile
+import unittest
+
+from map_cache import cache_key
+from tile_store import FILE_HEADER, RECORD, TileStore, compact
+
+
+def key(i):
+    return cache_key((i,))
+
+
+def blob(i):
+    return bytes([i % 256]) * (100 + i)
+
+
+class TestTileStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "maps.tiles")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fill(self, n):
+        store = TileStore(self.path)
+        for i in range(n):
+            self.assertTrue(store.put(key(i), blob(i)))
+        return store
+
+    def test_put_get(self):
+        store = self.fill(5)
+        self.assertIsNone(store.get(key(99)))
+        view = store.get(key(3))
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(bytes(view), blob(3))
+        self.assertFalse(store.put(key(3), b"other"))  # first one stays
+        self.assertEqual(len(store), 5)
+        store.put(key(5), blob(5))
+        self.assertEqual(bytes(view), blob(3))  # earlier views stay valid
+        store.close()
+
+    def test_reopen(self):
+        self.fill(20).close()
+        store = TileStore(self.path)
+        self.assertEqual(len(store), 20)
+        self.assertEqual(bytes(store.get(key(17))), blob(17))
+        self.assertEqual(store.size, os.path.getsize(self.path))
+        store.close()
+
+    def test_puts_remap_once(self):
+        store = self.fill(3)
+        store.get(key(0))
+        mapped = store._map
+        for i in range(3, 10):
+            store.put(key(i), blob(i))
+        self.assertIs(store._map, mapped)  # no remap per put
+        self.assertEqual(bytes(store.get(key(9))), blob(9))
+        self.assertEqual(bytes(store.get(key(4))), blob(4))
+        self.assertEqual(store._mapped, store.size)
+        store.close()
+
+    def test_two_writers(self):
+        # pregen appending while the server does: offsets from the real end
+        with TileStore(self.path) as a, TileStore(self.path) as b:
+            a.put(key(0), blob(0))
+            b.put(key(1), blob(1))
+            a.put(key(2), blob(2))
+            self.assertFalse(b.put(key(2), b"other"))  # a got there first
+            self.assertEqual(bytes(b.get(key(0))), blob(0))  # a miss rescans
+            self.assertEqual(bytes(a.get(key(1))), blob(1))
+            self.assertEqual(a.size, b.size)
+            self.assertEqual(a.size, os.path.getsize(self.path))
+        with TileStore(self.path) as store:
+            self.assertEqual(len(store), 3)
+            for i in range(3):
+                self.assertEqual(bytes(store.get(key(i))), blob(i))
+
+    def test_empty_and_foreign_files(self):
+        store = TileStore(self.path)
+        self.assertIsNone(store.get(key(0)))
+        store.close()
+        self.assertEqual(os.path.getsize(self.path), FILE_HEADER.size)
+        with open(self.path, "wb") as f:
+            f.write(b"not a tile store at all")
+        with self.assertRaises(ValueError):
+            TileStore(self.path)
+
+    def test_torn_append_dropped(self):
+        self.fill(4).close()
+        good = os.path.getsize(self.path)
+        # Every way the last append can be cut short by a crash
+        for cut in (1, RECORD.size - 1, RECORD.size, RECORD.size + 50):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+                f.seek(good)
+                f.write(
+                    (RECORD.pack(b"TILE", bytes.fromhex(key(9)), 200, 0) + blob(9))[
+                        :cut
+                    ]
+                )
+            store = TileStore(self.path)
+            self.assertEqual(len(store), 4, cut)
+            self.assertEqual(os.path.getsize(self.path), good)
+            store.put(key(9), blob(9))  # and appends carry on cleanly
+            store.close()
+            with TileStore(self.path) as store:
+                self.assertEqual(bytes(store.get(key(9))), blob(9))
+
+    def test_corrupt_blob_dropped(self):
+        self.fill(3).close()
+        with open(self.path, "r+b") as f:
+            f.seek(-10, os.SEEK_END)
+            f.write(b"\0" * 10)  # written out of order, then the crash
+        store = TileStore(self.path)
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get(key(2)))
+        store.close()
+
+    def test_damaged_record_skipped(self):
+        self.fill(5).close()
+        size = os.path.getsize(self.path)
+        with TileStore(self.path) as store:
+            blob_at = store.index[bytes.fromhex(key(1))][0]
+            head_at = store.index[bytes.fromhex(key(3))][0] - RECORD.size
+        with open(self.path, "r+b") as f:
+            f.seek(blob_at + 5)
+            f.write(b"\xff")  # a flipped byte in a blob
+            f.seek(head_at)
+            f.write(b"XXXX")  # and in a record header
+        with TileStore(self.path) as store:
+            self.assertEqual((len(store), store.skipped), (3, 2))
+            self.assertEqual(os.path.getsize(self.path), size)  # nothing cut
+            for i in (0, 2, 4):
+                self.assertEqual(bytes(store.get(key(i))), blob(i))
+            self.assertIsNone(store.get(key(3)))
+            store.put(key(5), blob(5))
+        with TileStore(self.path) as store:
+            self.assertEqual(len(store), 4)
+            self.assertEqual(bytes(store.get(key(5))), blob(5))
+        compact(self.path)
+        with TileStore(self.path) as store:
+            self.assertEqual((len(store), store.skipped), (4, 0))
+
+    def test_compact(self):
+        self.fill(10).close()
+        keep = {key(i) for i in range(0, 10, 2)}
+        (n0, b0), (n1, b1) = compact(self.path, keep)
+        self.assertEqual((n0, n1), (10, 5))
+        self.assertLess(b1, b0)
+        store = TileStore(self.path)
+        self.assertEqual(len(store), 5)
+        self.assertEqual(bytes(store.get(key(4))), blob(4))
+        self.assertIsNone(store.get(key(5)))
+        store.close()
+        self.assertEqual(os.listdir(self.tmp.name), ["maps.tiles"])
+
+    def test_compact_under_open_store(self):
+        # A server keeps its store open across a compact
+        serving = self.fill(4)
+        view = serving.get(key(1))
+        compact(self.path, {key(1), key(2)})
+        self.assertEqual(bytes(view), blob(1))  # replies in flight
+        self.assertTrue(serving.put(key(7), blob(7)))  # lands in the new file
+        self.assertIsNone(serving.get(key(0)))
+        self.assertEqual(bytes(serving.get(key(2))), blob(2))
+        serving.close()
+        with TileStore(self.path) as store:
+            self.assertEqual(
+                sorted(store.index), sorted(bytes.fromhex(key(i)) for i in (1, 2, 7))
+            )
+            self.assertEqual(store.size, os.path.getsize(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
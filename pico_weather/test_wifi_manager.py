@@ -0,0 +1,338 @@
+"""
+Tests for wifi_manager.py against a scripted network.WLAN and a fake clock.
+Run: python3 -m pytest pico_weather/test_wifi_manager.py -v
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import headless
+
+sys.modules.setdefault("network", headless.host_modules()["network"])
+
+import wifi_manager  # noqa: E402
+from wifi_manager import (  # noqa: E402
+    BACKOFF_MAX_MS,
+    BACKOFF_MS,
+    FAST_TIMEOUT_MS,
+    TIMEOUT_MS,
+    WifiManager,
+)
+
+AP = b"\x10\x7b\x44\x00\x00\x01"
+OTHER_AP = b"\x10\x7b\x44\x00\x00\x02"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def ticks_ms(self):
+        return self.now
+
+    def sleep_ms(self, ms):
+        self.now += ms
+
+
+class FlakyWLAN:
+    """network.WLAN stand-in.
+
+    Joining takes scan_ms per scan plus join_ms, or fast_join_ms when a
+    BSSID is given (the driver then skips its own scan). The first `fail` connect() calls never
+    associate; `status_on_fail` is what status() reports meanwhile.
+    """
+
+    def __init__(self, clock, fail=0, join_ms=3000, fast_join_ms=800, scan_ms=1500):
+        self.clock = clock
+        self.fail = fail
+        self.join_ms = join_ms
+        self.fast_join_ms = fast_join_ms
+        self.scan_ms = scan_ms
+        self.status_on_fail = 1  # still joining
+        self.aps = [
+            (b"HomeNet", AP, 6, -60, 3, False),
+            (b"Other", OTHER_AP, 1, -40, 3, False),
+        ]
+        self.on = False
+        self.up_at = None
+        self.connects = []
+        self.scans = 0
+        self.bad = False
+
+    def active(self, on=None):
+        if on is None:
+            return self.on
+        self.on = on
+        if not on:
+            self.up_at = None
+
+    def scan(self):
+        self.scans += 1
+        self.clock.now += self.scan_ms
+        return list(self.aps)
+
+    def connect(self, ssid, key, bssid=None):
+        assert self.on, "connect() with radio off"
+        self.connects.append(bssid)
+        if self.fail:
+            self.fail -= 1
+            self.bad = True
+            self.up_at = None
+            return
+        self.bad = False
+        if bssid is not None and bssid not in [ap[1] for ap in self.aps]:
+            self.bad = True
+            self.status_on_fail = -2  # no matching AP
+            return
+        delay = self.fast_join_ms if bssid is not None else self.join_ms
+        self.up_at = self.clock.now + delay
+
+    def disconnect(self):
+        self.up_at = None
+
+    def isconnected(self):
+        return self.on and self.up_at is not None and self.clock.now >= self.up_at
+
+    def status(self):
+        if self.bad:
+            return self.status_on_fail
+        return 3 if self.isconnected() else 1
+
+    def drop(self):
+        """Simulate the AP going away."""
+        self.up_at = None
+
+
+class WifiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        fd, self.cache = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.cache)
+        self.addCleanup(lambda: os.path.exists(self.cache) and os.remove(self.cache))
+
+    def make(self, **kw):
+        self.wlan = FlakyWLAN(self.clock, **kw)
+        return WifiManager(
+            "HomeNet",
+            "pw",
+            wlan=self.wlan,
+            ticks_ms=self.clock.ticks_ms,
+            sleep_ms=self.clock.sleep_ms,
+            cache_file=self.cache,
+        )
+
+
+class TestConnect(WifiTestCase):
+    def test_cold_join_scans_and_caches_ap(self):
+        w = self.make()
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.scans, 1)
+        self.assertEqual((w.bssid, w.channel), (AP, 6))
+        self.assertEqual(self.wlan.connects, [AP])  # the AP the scan picked
+        with open(self.cache) as f:
+            self.assertEqual(f.read(), "107b44000001,6")
+        self.assertEqual(w.stats()["last_connect_ms"], 1500 + 800)
+
+    def test_cold_join_targets_strongest_ap(self):
+        w = self.make()
+        self.wlan.aps.append((b"HomeNet", OTHER_AP, 11, -50, 3, False))
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.connects, [OTHER_AP])
+        self.assertEqual((w.bssid, w.channel), (OTHER_AP, 11))
+        w.power_down()
+        self.assertTrue(w.connect())  # the cached AP is the one joined
+        self.assertEqual(self.wlan.connects, [OTHER_AP, OTHER_AP])
+        self.assertEqual(w.fast_joins, 1)
+
+    def test_unscanned_network_joined_without_cache(self):
+        w = self.make()
+        self.wlan.aps = []  # hidden SSID: the scan finds nothing
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.connects, [None])
+        self.assertIsNone(w.bssid)
+        self.assertFalse(os.path.exists(self.cache))
+
+    def test_already_connected_does_nothing(self):
+        w = self.make()
+        w.connect()
+        self.assertTrue(w.connect())
+        self.assertEqual(len(self.wlan.connects), 1)
+        self.assertEqual(w.attempts, 1)
+
+    def test_reconnect_after_power_down_uses_cached_bssid(self):
+        w = self.make()
+        w.connect()
+        cold = w.last_connect_ms
+        w.power_down()
+        self.assertFalse(self.wlan.on)
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.connects[-1], AP)
+        self.assertEqual(self.wlan.scans, 1)
+        self.assertEqual(w.fast_joins, 1)
+        self.assertLess(w.last_connect_ms, cold / 2)  # no scan
+
+    def test_cached_ap_survives_restart(self):
+        self.make().connect()
+        w = self.make()  # fresh manager, e.g. after a reset
+        self.assertEqual(w.bssid, AP)
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.scans, 0)
+
+    def test_stale_bssid_falls_back_to_full_join(self):
+        with open(self.cache, "w") as f:
+            f.write("deadbeef0000,11")
+        w = self.make()
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.connects, [bytes.fromhex("deadbeef0000"), AP])
+        self.assertEqual(w.bssid, AP)
+        self.assertLessEqual(w.last_connect_ms, 100 + 1500 + 800)
+
+    def test_corrupt_cache_ignored(self):
+        with open(self.cache, "w") as f:
+            f.write("not a cache")
+        w = self.make()
+        self.assertIsNone(w.bssid)
+        self.assertTrue(w.connect())
+
+    def test_link_drop_reconnects(self):
+        w = self.make()
+        w.connect()
+        self.wlan.drop()
+        self.assertTrue(w.connect())
+        self.assertEqual(self.wlan.connects, [AP, AP])
+
+    def test_failure_status_aborts_early(self):
+        w = self.make(fail=1)
+        self.wlan.status_on_fail = -3  # wrong password
+        self.assertFalse(w.connect())
+        self.assertLess(w.last_connect_ms, 1500 + 2 * wifi_manager.POLL_MS)
+
+
+class TestBackoff(WifiTestCase):
+    def test_timeout_then_exponential_backoff(self):
+        w = self.make(fail=3)
+        self.assertFalse(w.connect())
+        self.assertEqual(w.last_connect_ms, 1500 + TIMEOUT_MS)
+        delays = [w.retry_in_ms()]
+        for _ in range(2):
+            self.clock.now += w.retry_in_ms()
+            self.assertFalse(w.connect())
+            delays.append(w.retry_in_ms())
+        self.assertEqual(delays, [BACKOFF_MS, 2 * BACKOFF_MS, 4 * BACKOFF_MS])
+        self.clock.now += w.retry_in_ms()
+        self.assertTrue(w.connect())
+        self.assertEqual((w.failures, w.retry_in_ms()), (0, 0))
+
+    def test_no_attempt_while_backing_off(self):
+        w = self.make(fail=1)
+        w.connect()
+        self.clock.now += BACKOFF_MS - 1
+        self.assertFalse(w.connect())
+        self.assertEqual(len(self.wlan.connects), 1)
+        self.clock.now += 1
+        self.assertTrue(w.connect())
+
+    def test_radio_off_after_failed_join_and_in_backoff(self):
+        w = self.make(fail=2)
+        self.assertFalse(w.connect())
+        self.assertFalse(self.wlan.on)
+        for _ in range(3):  # polled while backing off
+            self.clock.now += 1000
+            self.assertFalse(w.connect())
+            self.assertFalse(self.wlan.on)
+        self.assertEqual(len(self.wlan.connects), 1)
+        on = w.stats()["radio_on_ms"]
+        self.clock.now += w.retry_in_ms()
+        self.assertFalse(w.connect())
+        self.assertFalse(self.wlan.on)
+        # Only the two join attempts count as radio time
+        self.assertEqual(w.stats()["radio_on_ms"], 2 * on)
+
+    def test_backoff_capped(self):
+        w = self.make(fail=1000)
+        for _ in range(20):
+            self.clock.now += w.retry_in_ms()
+            w.connect()
+        self.assertEqual(w.retry_in_ms(), BACKOFF_MAX_MS)
+
+    def test_flaky_link_recovers_within_schedule(self):
+        # Every other join fails; ten refresh cycles 10 min apart.
+        w = self.make()
+        ok = 0
+        for cycle in range(10):
+            self.clock.now = cycle * 600000
+            self.wlan.fail = cycle % 2
+            while not w.connect():
+                self.clock.now += w.retry_in_ms()
+            self.assertLess(
+                self.clock.now - cycle * 600000, 2 * TIMEOUT_MS + BACKOFF_MS
+            )
+            ok += 1
+            w.power_down()
+        self.assertEqual(ok, 10)
+        # Odd cycles: fast join fails, the scan + full join refreshes the AP
+        self.assertEqual(w.fast_joins, 4)
+        self.assertEqual(self.wlan.scans, 1 + 5)
+
+
+class TestPowerAndMetrics(WifiTestCase):
+    def test_radio_on_time_accumulates(self):
+        w = self.make()
+        w.connect()
+        self.clock.now += 2000  # fetch
+        w.power_down()
+        first = w.stats()["radio_on_ms"]
+        self.assertEqual(first, 1500 + 800 + 2000)
+        self.clock.now += 600000  # asleep: radio off
+        w.connect()
+        w.power_down()
+        self.assertLess(w.stats()["radio_on_ms"] - first, FAST_TIMEOUT_MS)
+
+    def test_power_down_is_idempotent(self):
+        w = self.make()
+        w.power_down()
+        w.connect()
+        w.power_down()
+        w.power_down()
+        self.assertFalse(self.wlan.on)
+
+    def test_stats(self):
+        w = self.make(fail=1)
+        w.connect()
+        self.clock.now += w.retry_in_ms()
+        w.connect()
+        s = w.stats()
+        self.assertEqual((s["attempts"], s["successes"], s["failures"]), (2, 1, 0))
+        self.assertEqual(s["channel"], 6)
+        self.assertGreater(s["avg_connect_ms"], 0)
+
+
+class TestPicoMainWiring(WifiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ns = headless.load_pico_main()
+        self.ns["wifi"] = self.make(fail=1)
+        self.fetched = []
+        self.ns["fetch_weather"] = self.fetched.append
+
+    def test_refresh_skipped_while_offline(self):
+        self.assertFalse(self.ns["refresh_all"]())
+        self.assertEqual(self.fetched, [])
+        self.assertFalse(self.wlan.on)
+        self.clock.now += 1000
+        self.assertFalse(self.ns["refresh_all"]())  # backing off
+        self.assertFalse(self.wlan.on)
+
+    def test_refresh_fetches_then_powers_down(self):
+        self.ns["refresh_all"]()
+        self.clock.now += BACKOFF_MS
+        self.assertTrue(self.ns["refresh_all"]())
+        self.assertEqual(self.fetched, list(range(len(self.ns["PRESET_CITIES"]))))
+        self.assertFalse(self.wlan.on)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
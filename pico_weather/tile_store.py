@@ -0,0 +1,248 @@
+"""
+Single-file store of rendered /map JPEGs for map_server (host side).
+
+One file of packed records after a short file header:
+
+    file header    MAGIC, VERSION                       (12 bytes)
+    record         REC_MAGIC, key (20-byte SHA-1), length, CRC-32 of blob
+                   then the blob itself                 (32 + length bytes)
+
+Records are only ever appended. Opening the store walks the record
+headers (not the blobs) to build the key -> (offset, length) index, and
+maps the file with mmap, so get() returns a memoryview straight into
+the page cache: no copy, and a restarted server serves every map it had
+at once. A torn last record (a crash mid-append) fails its length or
+CRC check and is cut off on the next open. A damaged record with good
+ones after it (bit rot) is only skipped, and compact() drops it.
+
+Several processes can share a store (pregen while the server runs).
+Appends hold an exclusive flock and go at the file's real end, after
+indexing whatever the others appended; a get() that misses picks those
+up too. compact() replaces the file under the same lock, and a store
+still open on the old one reopens it at its next put() or miss. The map
+is only redone when a get() reaches past it, so a run of puts costs one
+remap rather than one each.
+
+    store = TileStore("maps.tiles")
+    view = store.get(key)      # memoryview, or None
+    store.put(key, jpeg)
+    compact("maps.tiles")      # drop superseded and unwanted records
+
+Keys are map_cache.cache_key() hex strings.
+"""
+
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b"MAPTILES"
+VERSION = 1
+FILE_HEADER = struct.Struct("<8sI")
+REC_MAGIC = b"TILE"
+RECORD = struct.Struct("<4s20sII")  # magic, key, blob length, crc32
+
+
+def _record(m, off, end):
+    """(key, blob start, length) of a good record at off, else None."""
+    magic, key, n, crc = RECORD.unpack_from(m, off)
+    start = off + RECORD.size
+    if magic != REC_MAGIC or start + n > end:
+        return None
+    if zlib.crc32(m[start : start + n]) != crc:
+        return None
+    return key, start, n
+
+
+def _next_record(m, off, end):
+    """Offset of the first good record at or after off, or -1.
+
+    A damaged length cannot be trusted to step over the blob, so this
+    looks for the next record magic whose record checks out.
+    """
+    while True:
+        off = m.find(REC_MAGIC, off, end - RECORD.size + len(REC_MAGIC))
+        if off < 0 or _record(m, off, end) is not None:
+            return off
+        off += 1
+
+
+class TileStore:
+    """Append-only record file, read through mmap."""
+
+    def __init__(self, path, sync=False):
+        self.path = path
+        self.sync = sync  # fsync after each put
+        self.lock = threading.Lock()
+        self._f = None
+        self._map = self._view = None
+        self._open()
+        try:
+            with self._flock():
+                self._scan()
+        except ValueError:
+            self._f.close()
+            raise
+
+    def _open(self):
+        """(Re)open path with an empty index."""
+        if self._f is not None:
+            self._f.close()
+        self._f = open(self.path, "a+b")
+        self._ino = os.fstat(self._f.fileno()).st_ino
+        self.index = {}
+        self.skipped = 0  # damaged records passed over by _scan
+        self.size = 0  # end of the last indexed record (0: header not read)
+        self._mapped = 0
+
+    def _replaced(self):
+        """True once compact() has renamed a new file over ours."""
+        try:
+            return os.stat(self.path).st_ino != self._ino
+        except FileNotFoundError:
+            return False
+
+    @contextlib.contextmanager
+    def _flock(self):
+        """Hold the file's exclusive lock, following a compact()."""
+        while True:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+            if not self._replaced():
+                break
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            self._open()
+        try:
+            if not self.size:
+                self._header()
+            yield
+        finally:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+
+    def _header(self):
+        self._f.seek(0, os.SEEK_END)
+        if self._f.tell() < FILE_HEADER.size:
+            self._f.truncate(0)
+            self._f.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self._f.flush()
+        self._f.seek(0)
+        head = self._f.read(FILE_HEADER.size)
+        if FILE_HEADER.unpack(head) != (MAGIC, VERSION):
+            raise ValueError("{} is not a tile store".format(self.path))
+        self.size = FILE_HEADER.size
+
+    def _scan(self):
+        """Index the records after self.size, whoever appended them.
+
+        Called with the flock held, so no append is in progress. A record
+        failing its checks is skipped if a good one follows it (counted
+        in skipped); with none after it, it is a torn tail and cut off.
+        """
+        end = os.fstat(self._f.fileno()).st_size
+        off = self.size
+        if end <= off:
+            return
+        m = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            while off + RECORD.size <= end:
+                entry = _record(m, off, end)
+                if entry is None:
+                    nxt = _next_record(m, off + 1, end)
+                    if nxt < 0:
+                        break
+                    self.skipped += 1
+                    off = nxt
+                    continue
+                key, start, n = entry
+                self.index[key] = (start, n)
+                off = start + n
+        finally:
+            m.close()
+        if off < end:
+            # A torn append: drop it so the next record starts cleanly
+            self._f.truncate(off)
+            self._f.flush()
+        self.size = off
+
+    def _remap(self):
+        # An old map stays alive while a reply is still sending from it
+        self._map = mmap.mmap(self._f.fileno(), self.size, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._mapped = self.size
+
+    def get(self, key):
+        """memoryview of the blob stored under key, or None."""
+        k = bytes.fromhex(key)
+        with self.lock:
+            entry = self.index.get(k)
+            if entry is None:
+                with self._flock():  # another process may have added it
+                    self._scan()
+                entry = self.index.get(k)
+                if entry is None:
+                    return None
+            start, n = entry
+            if start + n > self._mapped:
+                self._remap()
+            return self._view[start : start + n]
+
+    def put(self, key, blob):
+        """Append blob under key (skipped if key is already stored)."""
+        k = bytes.fromhex(key)
+        with self.lock:
+            if k in self.index:
+                return False
+            with self._flock():
+                self._scan()  # the end of the file, not of our last put
+                if k in self.index:
+                    return False
+                rec = RECORD.pack(REC_MAGIC, k, len(blob), zlib.crc32(blob))
+                self._f.write(rec + blob)
+                self._f.flush()
+                if self.sync:
+                    os.fsync(self._f.fileno())
+                start = self.size + RECORD.size
+                self.size = start + len(blob)
+                self.index[k] = (start, len(blob))
+        return True
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def compact(path, keep=None):
+    """Rewrite path with only indexed records (and only keys in keep).
+
+    The new file is written next to path, synced and renamed over it
+    with the old file's lock held, so an append from another process
+    either lands before the copy or waits and goes to the new file. A
+    crash leaves either the old store or the new one. Returns (records,
+    bytes) before and after.
+    """
+    tmp = path + ".compact"
+    with TileStore(path) as store, store._flock():
+        store._scan()
+        before = (len(store), store.size)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        store._remap()
+        with TileStore(tmp) as out:
+            for k, (start, n) in store.index.items():
+                key = k.hex()
+                if keep is None or key in keep:
+                    out.put(key, store._view[start : start + n])
+            os.fsync(out._f.fileno())
+            after = (len(out), out.size)
+        os.replace(tmp, path)
+    return before, after
@@ -1,58 +1,43 @@
 #!/usr/bin/env python3
 """
 Weather updater for Pimoroni Pico Inky Pack (296x128 E-Ink)
-- Fetches weather from wttr.in
+- Fetches weather from Open-Meteo or wttr.in, whichever answers first
 - Writes + runs MicroPython script on Pico via serial REPL
 - No replug needed!
+- Several locations (or @file of them): fetched concurrently, one script
+  per location written to --out instead of being sent
 """
 
-import json
+import argparse
+import os
 import sys
 import time
-import urllib.request
 from datetime import datetime
 
 import serial
+from providers import describe
+from weather_api import fetch_many, fetch_record, read_locations, resolve, resolve_many
 
 LOCATION = "London"
 DEVICE = "/dev/ttyACM0"
-
-WEATHER_CODES = {
-    "113": "Sunny",
-    "116": "P.Cloudy",
-    "119": "Cloudy",
-    "122": "Overcast",
-    "143": "Mist",
-    "176": "Patchy Rain",
-    "179": "Patchy Snow",
-    "200": "Thunder",
-    "227": "Blowing Snow",
-    "248": "Fog",
-    "263": "Drizzle",
-    "266": "Drizzle",
-    "293": "Light Rain",
-    "296": "Light Rain",
-    "299": "Mod Rain",
-    "302": "Mod Rain",
-    "305": "Heavy Rain",
-    "308": "Heavy Rain",
-    "317": "Sleet",
-    "320": "Mod Snow",
-    "326": "Light Snow",
-    "329": "Mod Snow",
-    "335": "Heavy Snow",
-    "353": "Light Rain",
-    "356": "Heavy Rain",
-    "386": "Thunder",
-    "389": "Thunder",
-}
-
-
-def get_weather(location):
-    url = f"https://wttr.in/{location.replace(' ', '+')}?format=j1"
-    req = urllib.request.Request(url, headers={"User-Agent": "curl/7.68.0"})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read())
+OUT_DIR = "pico_scripts"
+
+
+def parse_weather(record, location):
+    """build_script() keyword arguments from a providers.py record."""
+    feels = record["feels"]
+    return {
+        "location": location,
+        "temp": record["temp"],
+        "desc": describe(record["code"]),
+        "feels": "--" if feels is None else feels,
+        "hmax": record["hmax"],
+        "hmin": record["hmin"],
+        "tmax": record["tmax"],
+        "tmin": record["tmin"],
+        "tmr_desc": describe(record["tmr_code"]),
+        "date_str": datetime.now().strftime("%a %d %b"),
+    }
 
 
 def send_to_pico(script, device=DEVICE):
@@ -113,37 +98,59 @@ print("done!")
 """
 
 
+def write_scripts(locations, out_dir=OUT_DIR, **kwargs):
+    """Fetch locations concurrently and write a build_script() for each.
+
+    Returns {location: script path}; failed locations are left out.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    places = resolve_many(locations)
+    paths = {}
+    for loc, result in zip(locations, fetch_many(places, **kwargs)):
+        if isinstance(result, OSError):
+            print(f"  {loc}: fetch failed: {result}")
+            continue
+        record, provider = result
+        w = parse_weather(record, loc)
+        path = os.path.join(out_dir, loc.lower().replace(" ", "_") + ".py")
+        with open(path, "w") as f:
+            f.write(build_script(**w))
+        print(f"  {loc}: {w['temp']}C, {w['desc']} ({provider.name}) -> {path}")
+        paths[loc] = path
+    return paths
+
+
 def main():
-    loc = sys.argv[1] if len(sys.argv) > 1 else LOCATION
+    ap = argparse.ArgumentParser(
+        description="Fetch the weather and show it on the Pico"
+    )
+    ap.add_argument(
+        "locations", nargs="*", help="place names, or @file with one per line"
+    )
+    ap.add_argument("--out", default=OUT_DIR, help="script directory for several")
+    args = ap.parse_args()
+    locations = read_locations(args.locations) or [LOCATION]
+
+    if len(locations) > 1:
+        print(f"Fetching weather for {len(locations)} locations...")
+        paths = write_scripts(locations, args.out)
+        print(f"Wrote {len(paths)} scripts to {args.out}")
+        return 0 if len(paths) == len(locations) else 1
+
+    loc = locations[0]
     print(f"Fetching weather for {loc}...")
 
     try:
-        data = get_weather(loc)
-        c = data["current_condition"][0]
-        today = data["weather"][0]
-        tmr = data["weather"][1]
-
-        temp = c["temp_C"]
-        feels = c["FeelsLikeC"]
-        desc = WEATHER_CODES.get(c["weatherCode"], c["weatherDesc"][0]["value"][:12])
-        hmax = today["maxtempC"]
-        hmin = today["mintempC"]
-        tmax = tmr["maxtempC"]
-        tmin = tmr["mintempC"]
-        tmr_code = tmr["hourly"][4]["weatherCode"]
-        tmr_desc = WEATHER_CODES.get(
-            tmr_code, tmr["hourly"][4]["weatherDesc"][0]["value"][:12]
+        record, provider = fetch_record(resolve(loc))
+        w = parse_weather(record, loc)
+        print(
+            f"  {w['temp']}C, {w['desc']}, H:{w['hmax']}/L:{w['hmin']} ({provider.name})"
         )
-        date_str = datetime.now().strftime("%a %d %b")
-
-        print(f"  {temp}C, {desc}, H:{hmax}/L:{hmin}")
     except Exception as e:
         print(f"Weather fetch failed: {e}")
         return 1
 
-    script = build_script(
-        loc, temp, desc, feels, hmax, hmin, tmax, tmin, tmr_desc, date_str
-    )
+    script = build_script(**w)
 
     print("Sending to Pico...")
     if send_to_pico(script):
@@ -0,0 +1,130 @@
+"""
+Host-side weather fetching for update_weather.py and weather_display.py:
+providers.py records over urllib, with hedged requests.
+
+fetch_record() asks the first provider and, if it has not answered within
+HEDGE_S (or has failed), the next one as well; the first record to arrive
+wins. A slow or stalled provider then costs HEDGE_S instead of the full
+timeout, for at most one extra request in the slow cases.
+
+fetch_many() does the same for a list of places, WORKERS at a time: the
+requests are almost all waiting on the network, so threads around urllib
+are enough to overlap them.
+
+    place = resolve("Cambridge")  # (name, lat, lon) from uk_towns.csv
+    record, provider = fetch_record(place)
+    results = fetch_many(resolve_many(read_locations(["Leeds", "@towns.txt"])))
+"""
+
+import json
+import os
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from city_db import read_csv
+from providers import OpenMeteo, Wttr
+
+HEDGE_S = 1.0  # latency budget before the next provider is asked too
+TIMEOUT_S = 15
+WORKERS = 16  # places fetched at once by fetch_many()
+TOWNS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uk_towns.csv")
+USER_AGENT = "curl/7.68.0"  # wttr.in serves JSON to curl-like clients
+
+
+def default_providers():
+    return (OpenMeteo(feels=True), Wttr())
+
+
+def resolve(location, path=TOWNS_CSV):
+    """(name, lat, lon) for a place name; lat/lon None if it is not in path."""
+    return resolve_many([location], path)[0]
+
+
+def resolve_many(locations, path=TOWNS_CSV):
+    """resolve() for each of locations, reading path once."""
+    try:
+        towns = {name.lower(): (name, lat, lon) for name, lat, lon in read_csv(path)}
+    except OSError:
+        towns = {}
+    return [towns.get(loc.strip().lower(), (loc, None, None)) for loc in locations]
+
+
+def read_locations(args):
+    """Place names from args; "@path" reads one name per line of path.
+
+    Blank lines and "#" comments are skipped.
+    """
+    out = []
+    for arg in args:
+        if not arg.startswith("@"):
+            out.append(arg)
+            continue
+        with open(arg[1:]) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    out.append(line)
+    return out
+
+
+def get_json(url, timeout=TIMEOUT_S):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def fetch(provider, place, timeout=TIMEOUT_S):
+    """provider's record for place (raises on any failure)."""
+    name, lat, lon = place
+    return provider.parse(get_json(provider.url(lat, lon, name), timeout))
+
+
+def fetch_record(place, providers=None, hedge_s=HEDGE_S, timeout=TIMEOUT_S):
+    """(record, provider) from the first of providers to answer for place.
+
+    Each provider is asked once the one before has failed or taken hedge_s
+    (hedge_s=None: only after a failure). Raises OSError if all fail.
+    """
+    name, lat, lon = place
+    todo = [p for p in providers or default_providers() if p.url(lat, lon, name)]
+    if not todo:
+        raise OSError(f"no provider for {name}")
+    pool = ThreadPoolExecutor(max_workers=len(todo))
+    pending = {}
+    errors = []
+    try:
+        while todo or pending:
+            if todo:
+                p = todo.pop(0)
+                pending[pool.submit(fetch, p, place, timeout)] = p
+            # Each pass ends in a failure or the budget running out: either
+            # way the next provider goes at the top of the loop.
+            done, _ = wait(pending, hedge_s if todo else None, FIRST_COMPLETED)
+            for f in done:
+                p = pending.pop(f)
+                try:
+                    return f.result(), p
+                except Exception as e:
+                    errors.append(f"{p.name}: {e}")
+    finally:
+        pool.shutdown(wait=False)  # a losing request finishes on its own
+    raise OSError("; ".join(errors))
+
+
+def fetch_many(places, providers=None, workers=WORKERS, **kwargs):
+    """fetch_record() for each of places, workers at a time.
+
+    Returns a list in the order of places: (record, provider), or the
+    OSError for a place no provider answered for.
+    """
+
+    def one(place):
+        try:
+            return fetch_record(place, providers, **kwargs)
+        except OSError as e:
+            return e
+
+    if not places:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(places))) as pool:
+        return list(pool.map(one, places))
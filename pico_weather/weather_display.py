@@ -1,116 +1,80 @@
 #!/usr/bin/env python3
 """
 Weather Display for Pimoroni Pico Inky Pack (296x128 E-Ink)
-Fetches weather from wttr.in, pushes display script to Pico via mpremote.
+Fetches weather from Open-Meteo or wttr.in (whichever answers first),
+pushes display script to Pico via mpremote.
+Several locations (or @file of them) are fetched concurrently and one
+script per location is written to --out instead.
 """
 
-import json
+import argparse
+import os
 import subprocess
 import sys
-import urllib.request
 from datetime import datetime
 
+from providers import describe
+from weather_api import fetch_many, fetch_record, read_locations, resolve, resolve_many
+
 LOCATION = "London"
 DEVICE = "/dev/ttyACM0"
+OUT_DIR = "pico_scripts"
 MPREMOTE = [sys.executable, "-m", "mpremote"]
 
-WEATHER_CODES = {
-    "113": ("Sunny", "( * )"),
-    "116": ("P.Cloudy", "(~*~)"),
-    "119": ("Cloudy", "( ~ )"),
-    "122": ("Overcast", "( -- )"),
-    "143": ("Mist", "( .. )"),
-    "176": ("Patchy Rain", "( .v.)"),
-    "179": ("Patchy Snow", "( .*."),
-    "185": ("Patchy Sleet", "(.v.*)"),
-    "200": ("Thunder", "(/!\\ )"),
-    "227": ("Blowing Snow", "(*-*) "),
-    "230": ("Blizzard", "(***) "),
-    "248": ("Fog", "(-.-) "),
-    "260": ("Freezing Fog", "(-*-) "),
-    "263": ("Drizzle", "( ...) "),
-    "266": ("Drizzle", "( ...) "),
-    "281": ("Fz Drizzle", "( .*.) "),
-    "284": ("Fz Drizzle", "( .*.) "),
-    "293": ("Light Rain", "( .v.) "),
-    "296": ("Light Rain", "( .v.) "),
-    "299": ("Mod Rain", "(.v.v) "),
-    "302": ("Mod Rain", "(.v.v) "),
-    "305": ("Heavy Rain", "(vvvv) "),
-    "308": ("Heavy Rain", "(vvvv) "),
-    "311": ("Light Sleet", "(.v.*) "),
-    "314": ("Mod Sleet", "(.v.*) "),
-    "317": ("Light Sleet", "(.v.*) "),
-    "320": ("Mod Snow", "( .*.) "),
-    "323": ("Patchy Snow", "( .*.) "),
-    "326": ("Light Snow", "( *** ) "),
-    "329": ("Mod Snow", "(****) "),
-    "332": ("Mod Snow", "(****) "),
-    "335": ("Heavy Snow", "(*****) "),
-    "338": ("Heavy Snow", "(*****) "),
-    "350": ("Ice Pellets", "( ooo) "),
-    "353": ("Light Rain", "( .v.) "),
-    "356": ("Heavy Rain", "(vvvv) "),
-    "359": ("Torrential", "(VVVV) "),
-    "362": ("Lt Sleet Sh", "(.v.*) "),
-    "365": ("Mod Sleet", "(.v.*) "),
-    "368": ("Lt Snow Sh", "( *** ) "),
-    "371": ("Mod Snow Sh", "(****) "),
-    "374": ("Lt Ice", "( ooo) "),
-    "377": ("Mod Ice", "( OOO) "),
-    "386": ("Thunder", "(/!\\ ) "),
-    "389": ("Hvr Thunder", "(!!!!!) "),
-    "392": ("Sn Thunder", "(/!\\*) "),
-    "395": ("Blizzard", "(***!!) "),
+# Text icon per WMO code (providers.py normalises every provider to WMO)
+ICONS = {
+    0: "( * )",
+    1: "( * )",
+    2: "(~*~)",
+    3: "( -- )",
+    45: "(-.-) ",
+    48: "(-*-) ",
+    51: "( ...) ",
+    53: "( ...) ",
+    55: "( ...) ",
+    56: "( .*.) ",
+    57: "( .*.) ",
+    61: "( .v.) ",
+    63: "(.v.v) ",
+    65: "(vvvv) ",
+    66: "(.v.*) ",
+    67: "(.v.*) ",
+    68: "(.v.*) ",
+    69: "(.v.*) ",
+    71: "( *** ) ",
+    73: "(****) ",
+    75: "(*****) ",
+    77: "( ooo) ",
+    80: "( .v.)",
+    81: "(.v.v) ",
+    82: "(VVVV) ",
+    85: "( *** ) ",
+    86: "(****) ",
+    95: "(/!\\ ) ",
+    96: "(!!!!!) ",
+    99: "(!!!!!) ",
 }
 
 
-def get_weather(location):
-    url = f"https://wttr.in/{location.replace(' ', '+')}?format=j1"
-    req = urllib.request.Request(url, headers={"User-Agent": "curl/7.68.0"})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read())
-
-
-def format_weather(data):
-    current = data["current_condition"][0]
-    today = data["weather"][0]
-    tomorrow = data["weather"][1]
-
-    temp_c = current["temp_C"]
-    feels_c = current["FeelsLikeC"]
-    humidity = current["humidity"]
-    desc = current["weatherDesc"][0]["value"]
-    code = current["weatherCode"]
-
-    today_max = today["maxtempC"]
-    today_min = today["mintempC"]
-    tmr_max = tomorrow["maxtempC"]
-    tmr_min = tomorrow["mintempC"]
-    tmr_code = tomorrow["hourly"][4]["weatherCode"]
-    tmr_desc = WEATHER_CODES.get(tmr_code, ("?", "(?)"))[0]
-
-    icon = WEATHER_CODES.get(code, ("?", "(?)"))[1]
-    short_desc = WEATHER_CODES.get(code, (desc[:10], ""))[0]
-
+def format_weather(record, location=LOCATION):
+    """build_pico_script() fields from a providers.py record."""
     now = datetime.now()
-    date_str = now.strftime("%a %d %b")
-    time_str = now.strftime("%H:%M")
-
+    feels = record["feels"]
+    humidity = record["humidity"]
     return {
-        "temp": temp_c,
-        "feels": feels_c,
-        "humidity": humidity,
-        "desc": short_desc,
-        "icon": icon,
-        "today_max": today_max,
-        "today_min": today_min,
-        "tmr_max": tmr_max,
-        "tmr_min": tmr_min,
-        "tmr_desc": tmr_desc,
-        "date": date_str,
-        "time": time_str,
-        "location": LOCATION,
+        "temp": record["temp"],
+        "feels": "--" if feels is None else feels,
+        "humidity": "--" if humidity is None else humidity,
+        "desc": describe(record["code"]),
+        "icon": ICONS.get(record["code"], "(?)"),
+        "today_max": record["hmax"],
+        "today_min": record["hmin"],
+        "tmr_max": record["tmax"],
+        "tmr_min": record["tmin"],
+        "tmr_desc": describe(record["tmr_code"]),
+        "date": now.strftime("%a %d %b"),
+        "time": now.strftime("%H:%M"),
+        "location": location,
     }
 
 
@@ -201,14 +165,53 @@ def push_to_pico(script_path, device):
     return True
 
 
+def write_scripts(locations, out_dir=OUT_DIR, **kwargs):
+    """Fetch locations concurrently and write a build_pico_script() for each.
+
+    Returns {location: script path}; failed locations are left out.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    places = resolve_many(locations)
+    paths = {}
+    for loc, result in zip(locations, fetch_many(places, **kwargs)):
+        if isinstance(result, OSError):
+            print(f"  {loc}: fetch failed: {result}")
+            continue
+        record, provider = result
+        w = format_weather(record, loc)
+        path = os.path.join(out_dir, loc.lower().replace(" ", "_") + ".py")
+        with open(path, "w") as f:
+            f.write(build_pico_script(w))
+        print(f"  {loc}: {w['temp']}C, {w['desc']} ({provider.name}) -> {path}")
+        paths[loc] = path
+    return paths
+
+
 def main():
-    loc = LOCATION if len(sys.argv) < 2 else sys.argv[1]
+    ap = argparse.ArgumentParser(description="Push a weather display to the Pico")
+    ap.add_argument(
+        "locations", nargs="*", help="place names, or @file with one per line"
+    )
+    ap.add_argument("--out", default=OUT_DIR, help="script directory for several")
+    args = ap.parse_args()
+    locations = read_locations(args.locations) or [LOCATION]
+
+    if len(locations) > 1:
+        print(f"Fetching weather for {len(locations)} locations...")
+        paths = write_scripts(locations, args.out)
+        print(f"Wrote {len(paths)} scripts to {args.out}")
+        return 0 if len(paths) == len(locations) else 1
+
+    loc = locations[0]
     print(f"Fetching weather for {loc}...")
 
     try:
-        data = get_weather(loc)
-        w = format_weather(data)
-        print(f"  {w['temp']}C, {w['desc']}, H:{w['today_max']} L:{w['today_min']}")
+        record, provider = fetch_record(resolve(loc))
+        w = format_weather(record, loc)
+        print(
+            f"  {w['temp']}C, {w['desc']}, H:{w['today_max']} L:{w['today_min']}"
+            f" ({provider.name})"
+        )
     except Exception as e:
         print(f"Weather fetch failed: {e}")
         return 1
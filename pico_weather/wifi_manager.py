@@ -0,0 +1,202 @@
+"""
+Wi-Fi station management for pico_main.
+
+WifiManager joins the configured network, remembers the access point it
+joined (BSSID + channel, persisted to WIFI_CACHE_FILE) so the next join
+can skip the scan, backs off exponentially after failures instead of
+giving up, and switches the radio off between scheduled refreshes.
+Connection timings are kept in plain counters (see stats()).
+"""
+
+import binascii
+import time
+
+import network
+
+WIFI_CACHE_FILE = "wifi_ap.txt"
+POLL_MS = 100  # isconnected() poll interval while joining
+FAST_TIMEOUT_MS = 5000  # join via cached BSSID
+TIMEOUT_MS = 20000  # full join (scan + connect)
+BACKOFF_MS = 5000  # first retry delay after a failed join
+BACKOFF_MAX_MS = 600000  # never wait longer than one refresh period
+
+try:
+    _ticks_ms = time.ticks_ms
+    _ticks_diff = time.ticks_diff
+    _ticks_add = time.ticks_add
+    _sleep_ms = time.sleep_ms
+except AttributeError:  # CPython
+
+    def _ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def _ticks_diff(a, b):
+        return a - b
+
+    def _ticks_add(a, b):
+        return a + b
+
+    def _sleep_ms(ms):
+        time.sleep(ms / 1000)
+
+
+class WifiManager:
+    """Connect/reconnect/power-save wrapper around one network.WLAN."""
+
+    def __init__(
+        self,
+        ssid,
+        password,
+        wlan=None,
+        ticks_ms=None,
+        sleep_ms=None,
+        cache_file=WIFI_CACHE_FILE,
+    ):
+        self.ssid = ssid
+        self.password = password
+        self.wlan = wlan if wlan is not None else network.WLAN(network.STA_IF)
+        self._ticks = ticks_ms or _ticks_ms
+        self._sleep = sleep_ms or _sleep_ms
+        self.cache_file = cache_file
+        self.bssid, self.channel = self._load_ap()
+        self.failures = 0  # consecutive failed joins
+        self._retry_at = None  # ticks before which connect() will not try
+        self._on_at = None  # ticks when the radio was switched on
+        # Metrics
+        self.attempts = 0
+        self.successes = 0
+        self.fast_joins = 0  # joins that used the cached BSSID
+        self.last_connect_ms = 0
+        self.total_connect_ms = 0
+        self.radio_on_ms = 0
+
+    # -- cached access point --
+
+    def _load_ap(self):
+        try:
+            with open(self.cache_file) as f:
+                bssid, channel = f.read().strip().split(",")
+            return binascii.unhexlify(bssid), int(channel)
+        except Exception:
+            return None, None
+
+    def _save_ap(self):
+        try:
+            with open(self.cache_file, "w") as f:
+                f.write(
+                    "{},{}".format(binascii.hexlify(self.bssid).decode(), self.channel)
+                )
+        except Exception:
+            pass
+
+    def _scan(self):
+        """Strongest AP advertising our SSID as (bssid, channel), or (None, None)."""
+        best = None
+        try:
+            # (ssid, bssid, channel, rssi, security, hidden)
+            for ap in self.wlan.scan():
+                if ap[0] == self.ssid.encode() and (best is None or ap[3] > best[3]):
+                    best = ap
+        except OSError:
+            pass
+        return (best[1], best[2]) if best else (None, None)
+
+    # -- connecting --
+
+    def _radio_on(self):
+        if self._on_at is None:
+            self.wlan.active(True)
+            self._on_at = self._ticks()
+
+    def _join(self, timeout_ms, bssid=None):
+        """One connect attempt; True once isconnected() within timeout_ms."""
+        if bssid is None:
+            self.wlan.connect(self.ssid, self.password)
+        else:
+            self.wlan.connect(self.ssid, self.password, bssid=bssid)
+        start = self._ticks()
+        while _ticks_diff(self._ticks(), start) < timeout_ms:
+            if self.wlan.isconnected():
+                return True
+            if self.wlan.status() < 0:  # wrong password / no AP / join failed
+                break
+            self._sleep(POLL_MS)
+        self.wlan.disconnect()
+        return False
+
+    def retry_in_ms(self):
+        """Milliseconds until connect() will try again (0 = now)."""
+        if self._retry_at is None:
+            return 0
+        left = _ticks_diff(self._retry_at, self._ticks())
+        return left if left > 0 else 0
+
+    def connect(self):
+        """Join the network unless already connected or backing off.
+
+        The radio is only powered for a join attempt, and switched off
+        again when the attempt fails, so it stays off through a backoff.
+        """
+        if self.retry_in_ms():
+            return False
+        self._radio_on()
+        if self.wlan.isconnected():
+            return True
+        self.attempts += 1
+        start = self._ticks()
+        ok = False
+        if self.bssid is not None:
+            ok = self._join(FAST_TIMEOUT_MS, self.bssid)
+            if ok:
+                self.fast_joins += 1
+            else:
+                self.bssid = self.channel = None  # AP moved or gone
+        if not ok:
+            # Join the AP the scan picked, so the one cached is the one joined
+            bssid, channel = self._scan()
+            ok = self._join(TIMEOUT_MS, bssid)
+            if ok and bssid is not None:
+                self.bssid, self.channel = bssid, channel
+                self._save_ap()
+        elapsed = _ticks_diff(self._ticks(), start)
+        self.last_connect_ms = elapsed
+        self.total_connect_ms += elapsed
+        if ok:
+            self.successes += 1
+            self.failures = 0
+            self._retry_at = None
+        else:
+            self.failures += 1
+            delay = BACKOFF_MS << min(self.failures - 1, 16)
+            self._retry_at = _ticks_add(self._ticks(), min(delay, BACKOFF_MAX_MS))
+            self.power_down()
+        return ok
+
+    def power_down(self):
+        """Disconnect and switch the radio off until the next connect()."""
+        if self._on_at is None:
+            return
+        try:
+            self.wlan.disconnect()
+        except OSError:
+            pass
+        self.wlan.active(False)
+        self.radio_on_ms += _ticks_diff(self._ticks(), self._on_at)
+        self._on_at = None
+
+    def stats(self):
+        """Connection metrics as a dict."""
+        radio = self.radio_on_ms
+        if self._on_at is not None:
+            radio += _ticks_diff(self._ticks(), self._on_at)
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "fast_joins": self.fast_joins,
+            "last_connect_ms": self.last_connect_ms,
+            "avg_connect_ms": self.total_connect_ms // (self.attempts or 1),
+            "radio_on_ms": radio,
+            "retry_in_ms": self.retry_in_ms(),
+            "channel": self.channel,
+        }